@@ -674,10 +674,11 @@ class Controller():
             2. model_login.login() aufrufen → Authentifizierung mit bcrypt
             3. Bei Erfolg: Zur Hauptansicht wechseln
             4. Benutzerdaten laden (update_model_time_tracking)
-            5. ALLE Arbeitszeitschutz-Prüfungen durchführen:
+            5. Fehlende Tage/Stempel prüfen und Gleitzeit berechnen:
                - checke_arbeitstage() - Fehlende Arbeitstage identifizieren
                - checke_stempel() - Fehlende Stempel identifizieren
                - berechne_gleitzeit() - Gleitzeit aktualisieren (MUSS vor set_ampel_farbe!)
+            6. checke_arbeitszeitschutz() - alle Prüfungen der Codes 3-9, 12 in einem Durchlauf:
                - checke_ruhezeiten() - ArbZG § 5 (11h Ruhezeit)
                - checke_durchschnittliche_arbeitszeit() - ArbZG § 3 (Ø 8h/Tag über 6 Monate)
                - checke_max_arbeitszeit() - 10h/Tag Maximum
@@ -686,7 +687,7 @@ class Controller():
                - checke_arbeitstage_pro_woche_minderjaehrige() - JArbSchG § 15 (max. 5 Tage)
                - checke_arbeitszeitfenster_minderjaehrige() - JArbSchG § 14 (6-20 Uhr)
                - checke_pausenzeiten() - ArbZG § 4 / JArbSchG § 11 (Mindestpausen)
-            6. Benachrichtigungs-Korrektur: pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen()
+               - danach Benachrichtigungs-Korrektur (pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen)
                → Löscht Benachrichtigungen für korrigierte Verstöße (MUSS vor get_messages()!)
             7. Daten für UI holen: get_messages(), set_ampel_farbe(), kummuliere_gleitzeit()
             8. Mitarbeiter-Liste laden (für Vorgesetzten-Ansicht): get_employees()
@@ -717,7 +718,7 @@ class Controller():
             # === SCHRITT 4: Benutzerdaten laden ===
             self.update_model_time_tracking()
             
-            # === SCHRITT 5: ALLE Arbeitszeitschutz-Prüfungen durchführen ===
+            # === SCHRITT 5: Fehlende Tage/Stempel prüfen und Gleitzeit berechnen ===
             # Fehlende Arbeitstage finden (Code 1 Benachrichtigung)
             self.model_track_time.checke_arbeitstage()
             
@@ -727,34 +728,14 @@ class Controller():
             # Gleitzeit berechnen (MUSS vor set_ampel_farbe sein!)
             self.model_track_time.berechne_gleitzeit()
             
-            # Ruhezeiten prüfen: ArbZG § 5 / JArbSchG § 13 (11h zwischen Arbeitstagen)
-            self.model_track_time.checke_ruhezeiten()  # Code 3
-            
-            # Durchschnittliche Arbeitszeit prüfen: ArbZG § 3 (Ø max. 8h/Tag über 6 Monate)
-            self.model_track_time.checke_durchschnittliche_arbeitszeit()  # Code 4
-            
-            # Maximale Tagesarbeitszeit prüfen: 10h/Tag
-            self.model_track_time.checke_max_arbeitszeit()  # Code 5
-            
-            # Sonn- und Feiertagsarbeit prüfen: ArbZG § 9
-            self.model_track_time.checke_sonn_feiertage()  # Code 6
-            
-            # Wochenstunden für Minderjährige prüfen: JArbSchG § 8 (max. 40h/Woche)
-            self.model_track_time.checke_wochenstunden_minderjaehrige()  # Code 7
-            
-            # Arbeitstage pro Woche für Minderjährige: JArbSchG § 15 (max. 5 Tage)
-            self.model_track_time.checke_arbeitstage_pro_woche_minderjaehrige()  # Code 8
-            
-            # Arbeitszeitfenster für Minderjährige: JArbSchG § 14 (6-20 Uhr)
-            self.model_track_time.checke_arbeitszeitfenster_minderjaehrige()  # Code 9
-            
-            # Pausenzeiten prüfen: ArbZG § 4 / JArbSchG § 11 (Mindestpausen)
-            self.model_track_time.checke_pausenzeiten()  # Code 12
-            
-            # === SCHRITT 6: Benachrichtigungs-Korrektur (Codes 3-9, 12) ===
+            # === SCHRITT 6: Arbeitszeitschutz-Prüfungen und Benachrichtigungs-Korrektur ===
+            # Codes 3-9, 12: Ruhezeiten (ArbZG § 5 / JArbSchG § 13), Durchschnitt (ArbZG § 3),
+            # Max. Tagesarbeitszeit, Sonn-/Feiertage (ArbZG § 9), Wochenstunden (JArbSchG § 8),
+            # Arbeitstage pro Woche (JArbSchG § 15), Arbeitszeitfenster (JArbSchG § 14) und
+            # Pausenzeiten (ArbZG § 4 / JArbSchG § 11); die Arbeitszeit je Tag wird dafür nur einmal geladen.
+            # Anschließend werden Benachrichtigungen gelöscht, deren Verstöße korrigiert wurden.
             # WICHTIG: MUSS VOR get_messages() aufgerufen werden!
-            # Löscht Benachrichtigungen, deren Verstöße korrigiert wurden (z.B. Stempel nachgetragen)
-            geloeschte = self.model_track_time.pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen()
+            geloeschte = self.model_track_time.checke_arbeitszeitschutz()
             if geloeschte > 0:
                 logger.info(f"Login: {geloeschte} korrigierte Arbeitszeitschutz-Benachrichtigungen gelöscht")
             
@@ -1795,10 +1776,10 @@ class Controller():
         """
         jahr = self.main_view.month_calendar.year
         monat = self.main_view.month_calendar.month
-        urlaubstage = self.model_track_time.get_urlaubstage_monat(jahr, monat)
-        krankheitstage = self.model_track_time.get_krankheitstage_monat(jahr, monat)
-        self.main_view.month_calendar.urlaubstage = urlaubstage
-        self.main_view.month_calendar.krankheitstage = krankheitstage
+        urlaubstage, krankheitstage = self.model_track_time.get_abwesenheiten_monat(jahr, monat)
+        # Der Kalender prüft pro Zelle "day in ...": Mengen statt Listen
+        self.main_view.month_calendar.urlaubstage = frozenset(urlaubstage)
+        self.main_view.month_calendar.krankheitstage = frozenset(krankheitstage)
         self.main_view.month_calendar.fill_grid_with_days()
     
     # === View-Wechsel-Methoden ===
@@ -1907,14 +1888,13 @@ class Controller():
             self.max_arbeitszeit_warning_event = None
         
         # === Schritt 1: Stempel-Status ermitteln ===
-        today_stamps = self.model_track_time.get_stamps_for_today()
-        is_clocked_in = len(today_stamps) % 2 != 0  # Ungerade = eingestempelt
+        anzahl_stempel, last_stamp_time = self.model_track_time.get_stempel_status_heute()
+        is_clocked_in = anzahl_stempel % 2 != 0  # Ungerade = eingestempelt
         
         if is_clocked_in:
             # === Eingestempelt: Timer STARTEN ===
             try:
-                # Schritt 2a: Letzten Stempel (Einstempel-Zeit) finden
-                last_stamp_time = today_stamps[-1].zeit  # Letzter Stempel = aktuellster Einstempel
+                # Schritt 2a: Letzter Stempel (Einstempel-Zeit) = MAX(zeit) aus get_stempel_status_heute
                 
                 # Schritt 2b: Start-Zeitpunkt als datetime-Objekt speichern
                 self.start_time_dt = datetime.combine(date.today(), last_stamp_time)
@@ -2018,8 +1998,8 @@ class Controller():
                 self.max_arbeitszeit_warning_event.cancel()
                 self.max_arbeitszeit_warning_event = None
             
-            today_stamps = self.model_track_time.get_stamps_for_today()
-            is_clocked_in = len(today_stamps) % 2 != 0
+            anzahl_stempel, _ = self.model_track_time.get_stempel_status_heute()
+            is_clocked_in = anzahl_stempel % 2 != 0
             
             # Bestehende PopUps entfernen, damit neue Zeiten gespeichert werden können
             self.model_track_time.delete_all_popup_benachrichtigungen_for_today()
@@ -139,6 +139,20 @@ class TimeTrackingApp(MDApp):
         # === Root-Widget zurückgeben ===
         return self.screen_manager
  
+    def on_stop(self):
+        """
+        Kivy on_stop()-Methode: Gibt die Datenbank-Session beim Beenden frei.
+        
+        Note:
+            Schließt die Scoped Session aus modell.py (Session.remove()).
+        """
+        try:
+            import modell
+            modell.Session.remove()
+            logger.info("Datenbank-Session geschlossen.")
+        except Exception as e:
+            logger.warning(f"Fehler beim Schließen der Datenbank-Session: {e}")
+
 
 if __name__ == "__main__":
     """
@@ -24,13 +24,20 @@ Autor: Velqor
 Version: 0.3
 """
 
-from sqlalchemy import Column, Integer, String, Date, create_engine, select, Time, Boolean, ForeignKey, UniqueConstraint, CheckConstraint, Float
+from sqlalchemy import Column, Integer, String, Date, create_engine, select, update, delete, exists, literal, func, bindparam, Time, Boolean, ForeignKey, UniqueConstraint, CheckConstraint, Float, Index, text
 import sqlalchemy.orm as saorm
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from datetime import datetime, date, timedelta, time
+from functools import lru_cache
+from itertools import groupby
+from bisect import bisect_right
+from operator import itemgetter
+from collections import Counter, defaultdict
 from pathlib import Path
 import holidays 
 import logging
+import calendar
 import sys
 import os
 import bcrypt
@@ -166,6 +173,52 @@ def initialize_database(db_path):
         logger.critical(f"Fehler beim Erstellen der Datenbank: {e}", exc_info=True)
         raise
 
+# Indizes für häufige Abfragen. Werden bei jedem Start mit IF NOT EXISTS angelegt,
+# damit auch bereits bestehende Datenbanken sie erhalten.
+INDEX_DEFINITIONEN = [
+    # Partieller Index nur über PopUp-Benachrichtigungen (klein, da PopUps nach Anzeige gelöscht werden)
+    """CREATE INDEX IF NOT EXISTS idx_ben_pop
+       ON benachrichtigungen(mitarbeiter_id, datum) WHERE ist_popup = 1""",
+    # Stempel eines Tages in Zeitreihenfolge: Range-Scan ohne zusätzliches Sortieren
+    """CREATE INDEX IF NOT EXISTS ix_ze_mid_datum_zeit
+       ON zeiteinträge(mitarbeiter_id, datum, zeit)""",
+    # Gleitzeitberechnung filtert auf validiert (= 0 bzw. = 1 je Zeitraum): Gleichheit vor dem
+    # Datumsbereich, damit die Suche nur den passenden Teil liest; deckt id/datum/zeit komplett ab
+    """CREATE INDEX IF NOT EXISTS ix_ze_mid_val_datum_zeit
+       ON zeiteinträge(mitarbeiter_id, validiert, datum, zeit)""",
+    """CREATE INDEX IF NOT EXISTS ix_abw_mid_datum
+       ON abwesenheiten(mitarbeiter_id, datum)""",
+    # Existenz- und Bereichsprüfungen je Code (z.B. Code 1 an einem Tag). Bewusst nicht UNIQUE,
+    # da bestehende Datenbanken ohne Constraint bereits Duplikate enthalten können.
+    """CREATE INDEX IF NOT EXISTS ix_ben_mid_code_datum
+       ON benachrichtigungen(mitarbeiter_id, benachrichtigungs_code, datum)""",
+]
+
+
+def initialize_indexes(db_path):
+    """
+    Legt fehlende Indizes in einer bestehenden SQLite-Datenbank an.
+    
+    Args:
+        db_path (str): Absoluter Pfad zur Datenbankdatei
+        
+    Note:
+        Fehler werden geloggt, aber nicht weitergegeben: Ohne Index
+        funktioniert die Anwendung weiterhin, nur langsamer.
+    """
+    import sqlite3
+
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            for index_sql in INDEX_DEFINITIONEN:
+                conn.execute(index_sql)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"Fehler beim Anlegen der Indizes: {e}", exc_info=True)
+
 # === Datenbank-Initialisierung ===
 # Dieser Block wird beim Import des Moduls ausgeführt
 
@@ -173,13 +226,20 @@ try:
     # Schritt 1: Datenbankpfad bestimmen und ggf. Datenbank erstellen
     DB_PATH = get_db_path()
     initialize_database(DB_PATH)
+    initialize_indexes(DB_PATH)
     
     # Schritt 2: SQLAlchemy-Engine und Session erstellen
     # echo=False: SQL-Statements werden nicht geloggt (Performance)
     engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
     Base = saorm.declarative_base()
-    Session = saorm.sessionmaker(bind=engine)
-    session = Session()
+    # Scoped Session: eine Session pro Thread, über Session.remove() beim Beenden freigegeben.
+    # expire_on_commit=False: Nach jedem Commit werden geladene Objekte nicht verworfen,
+    # der nächste Attributzugriff löst also kein erneutes SELECT aus. Das gilt auch für
+    # Abläufe mit mehreren Commits (Stempel bearbeiten/löschen und anschließende checke_*-Prüfungen),
+    # ein lokales Umschalten pro Methode ist daher nicht nötig.
+    Session = saorm.scoped_session(saorm.sessionmaker(bind=engine, expire_on_commit=False))
+    # Modulweiter Zugriff bleibt über "session" (Proxy auf die Session des aktuellen Threads)
+    session = Session
     
     logger.info("Datenbank-Engine und Session erfolgreich erstellt.")
 except SQLAlchemyError as e:
@@ -210,6 +270,7 @@ class mitarbeiter(Base):
     
     Methoden:
         is_minor_on_date(datum): Prüft Minderjährigkeit an einem Datum
+        volljaehrig_ab: 18. Geburtstag (gecacht)
     
     Note:
         - Die Ampel-Werte sind symmetrisch: ±grün für ausgeglichen, ±rot für kritisch
@@ -254,8 +315,8 @@ class mitarbeiter(Base):
             bool: True wenn unter 18 Jahren, sonst False
             
         Note:
-            Verwendet eine exakte Altersberechnung basierend auf Jahr, Monat und Tag.
-            Berücksichtigt Monat und Tag für präzise Altersberechnung.
+            Vergleicht mit dem gecachten 18. Geburtstag (volljaehrig_ab),
+            statt das Alter bei jedem Aufruf neu zu berechnen.
             Bei fehlenden Daten oder ungültigem Typ wird False zurückgegeben.
             
         Examples:
@@ -279,9 +340,43 @@ class mitarbeiter(Base):
             except ValueError:
                 return False  # Konnte nicht konvertiert werden
         
-        # Altersberechnung: Jahre minus 1 falls Geburtstag noch nicht war dieses Jahr
-        age = datum.year - self.geburtsdatum.year - ((datum.month, datum.day) < (self.geburtsdatum.month, self.geburtsdatum.day))
-        return age < 18
+        if isinstance(datum, datetime):
+            datum = datum.date()
+
+        # Minderjährig bis einschließlich des Tages vor dem 18. Geburtstag
+        return datum < self.volljaehrig_ab
+
+    @saorm.reconstructor
+    def _init_geburt_cache(self):
+        """Berechnet volljaehrig_ab direkt beim Laden aus der Datenbank."""
+        self._volljaehrig_cache = None
+        if self.geburtsdatum:
+            self.volljaehrig_ab
+
+    @property
+    def volljaehrig_ab(self):
+        """
+        Datum, ab dem der Mitarbeiter volljährig ist (18. Geburtstag).
+        
+        Der Minderjährigkeitsstatus wechselt genau einmal; statt das Alter
+        bei jeder Prüfung neu zu berechnen, reicht ein einzelner Datumsvergleich.
+        Der Wert wird am Objekt gecacht und neu berechnet, sobald sich
+        geburtsdatum ändert.
+        
+        Returns:
+            date: 18. Geburtstag (bei Geburtstag am 29.02. in Nicht-Schaltjahren der 01.03.)
+        """
+        cache = self.__dict__.get("_volljaehrig_cache")
+        if cache is None or cache[0] is not self.geburtsdatum:
+            g = self.geburtsdatum
+            try:
+                volljaehrig = date(g.year + 18, g.month, g.day)
+            except ValueError:
+                # 29.02. existiert im Zieljahr nicht: volljährig ab 01.03.
+                volljaehrig = date(g.year + 18, 3, 1)
+            cache = (g, volljaehrig)
+            self._volljaehrig_cache = cache
+        return cache[1]
 
 
 class Abwesenheit(Base):
@@ -322,6 +417,11 @@ class Abwesenheit(Base):
     typ = Column(String, CheckConstraint("typ IN ('Urlaub', 'Krankheit', 'Fortbildung', 'Sonstiges')"), nullable=False)
     genehmigt = Column(Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        # Siehe INDEX_DEFINITIONEN
+        Index("ix_abw_mid_datum", "mitarbeiter_id", "datum"),
+    )
+
 
 class Zeiteintrag(Base):
     """
@@ -366,6 +466,12 @@ class Zeiteintrag(Base):
     datum = Column(Date, nullable=False)
     validiert = Column(Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        # Siehe INDEX_DEFINITIONEN
+        Index("ix_ze_mid_datum_zeit", "mitarbeiter_id", "datum", "zeit"),
+        Index("ix_ze_mid_val_datum_zeit", "mitarbeiter_id", "validiert", "datum", "zeit"),
+    )
+
 
 class Benachrichtigungen(Base):
     """
@@ -430,27 +536,32 @@ class Benachrichtigungen(Base):
 
     # === Klassen-Konstante: Benachrichtigungstexte ===
     # Texte für Benachrichtigungen (verwendet im create_fehlermeldung())
+    # Tupel (Text vor Datum, Text nach Datum) oder String für Codes ohne Datum
     CODES = {
-        1.1: "An den Tag",
-        1.2: "wurde nicht gestempelt. Es wird für jeden Tag die Tägliche arbeitszeit der Gleitzeit abgezogen",
-        2.1: "Am",
-        2.2: "fehlt ein Stempel, bitte tragen sie diesen nach",
-        3: ["Achtung, am", "wurden die gesetzlichen Ruhezeiten nicht eingehalten"],
+        1: ("An den Tag", "wurde nicht gestempelt. Es wird für jeden Tag die Tägliche arbeitszeit der Gleitzeit abgezogen"),
+        2: ("Am", "fehlt ein Stempel, bitte tragen sie diesen nach"),
+        3: ("Achtung, am", "wurden die gesetzlichen Ruhezeiten nicht eingehalten"),
         4: "Achtung, Ihre durchschnittliche tägliche Arbeitszeit der letzten 6 Monate hat 8 Stunden überschritten.",
-        5:["Achung am", "wurde die maximale gesetzlich zulässsige Arbeitszeit überschritten."],
-        6: ["Achtung, am", "wurde an einem Sonn- oder Feiertag gearbeitet."],
-        7: ["In der Woche vom", "wurde die maximale Wochenarbeitszeit von 40 Stunden für Minderjährige überschritten."],
-        8: ["In der Woche vom", "wurde an mehr als 5 Tagen gearbeitet, was für Minderjährige nicht zulässig ist."],
-        9: ["Achtung, am", "wurde außerhalb der gesetzlich zulässigen Arbeitszeiten (6:00 - 20:00 Uhr) für Minderjährige gestempelt."],
+        5: ("Achung am", "wurde die maximale gesetzlich zulässsige Arbeitszeit überschritten."),
+        6: ("Achtung, am", "wurde an einem Sonn- oder Feiertag gearbeitet."),
+        7: ("In der Woche vom", "wurde die maximale Wochenarbeitszeit von 40 Stunden für Minderjährige überschritten."),
+        8: ("In der Woche vom", "wurde an mehr als 5 Tagen gearbeitet, was für Minderjährige nicht zulässig ist."),
+        9: ("Achtung, am", "wurde außerhalb der gesetzlich zulässigen Arbeitszeiten (6:00 - 20:00 Uhr) für Minderjährige gestempelt."),
         10: "Ihr erlaubtes Arbeitsfenster endet bald.",  # Arbeitsfenster-Warnung (PopUp)
         11: "Sie erreichen bald die maximale tägliche Arbeitszeit.",  # Max. Arbeitszeit-Warnung (PopUp)
-        12: ["Achtung, am", "wurden die gesetzlich vorgeschriebenen Pausenzeiten nicht eingehalten."]
+        12: ("Achtung, am", "wurden die gesetzlich vorgeschriebenen Pausenzeiten nicht eingehalten."),
     }
 
+    # Codes, deren Datum im deutschen Format (TT.MM.JJJJ) ausgegeben wird
+    _DATUM_DE_CODES = frozenset({7, 8, 9})
+
     # === Constraints ===
     # UNIQUE Constraint: Verhindert Duplikate für denselben Tag und Code
     __table_args__ = (
         UniqueConstraint("mitarbeiter_id", "benachrichtigungs_code", "datum", name="uq_benachrichtigung_unique"),
+        # Partieller Index für PopUp-Abfragen (siehe INDEX_DEFINITIONEN)
+        Index("idx_ben_pop", "mitarbeiter_id", "datum", sqlite_where=text("ist_popup = 1")),
+        Index("ix_ben_mid_code_datum", "mitarbeiter_id", "benachrichtigungs_code", "datum"),
     )
 
     def create_fehlermeldung(self):
@@ -458,7 +569,7 @@ class Benachrichtigungen(Base):
         Erstellt eine formatierte Benachrichtigungsnachricht mit Datum.
         
         Kombiniert den Benachrichtigungstext aus CODES mit dem Datum (falls vorhanden).
-        Behandelt verschiedene Nachrichtenformate (String, List, float-Keys).
+        CODES liefert je Code ein Tupel (vor, nach) oder einen festen Text.
         
         Returns:
             str: Formatierte Benachrichtigung mit Datum
@@ -468,48 +579,23 @@ class Benachrichtigungen(Base):
             - Code 1: "An den Tag DD.MM.YYYY wurde nicht gestempelt..."
             - Code 2: "Am DD.MM.YYYY fehlt ein Stempel..."
             - Code 4: "Achtung, Ihre durchschnittliche..." (kein Datum)
-            - Codes 3, 5-9, 12: "Achtung, am DD.MM.YYYY ..." (List-Format)
+            - Codes 3, 5-9, 12: "Achtung, am DD.MM.YYYY ..." (Tupel-Format)
         
         Examples:
             >>> b = Benachrichtigungen(benachrichtigungs_code=3, datum=date(2025, 11, 7))
             >>> b.create_fehlermeldung()
             "Achtung, am 07.11.2025 wurden die gesetzlichen Ruhezeiten nicht eingehalten"
         """
-        # Wandle Code in String um, um Suffix-Probleme (1.1 vs 1) zu vermeiden
-        code_str = str(self.benachrichtigungs_code)
-
         try:
-            if code_str == "1":
-                return f"{self.CODES[1.1]} {self.datum} {self.CODES[1.2]}"
-            elif code_str == "2":
-                return f"{self.CODES[2.1]} {self.datum} {self.CODES[2.2]}"
-            elif code_str == "3":
-                return f"{self.CODES[3][0]} {self.datum} {self.CODES[3][1]}"
-            elif code_str == "4":
-                return self.CODES[4]
-            elif code_str == "5":
-                return f"{self.CODES[5][0]} {self.datum} {self.CODES[5][1]}"
-            elif code_str == "6":
-                return f"{self.CODES[6][0]} {self.datum} {self.CODES[6][1]}"
-            elif code_str == "7":
-                datum_str = self.datum.strftime('%d.%m.%Y') if self.datum else "[Datum fehlt]"
-                return f"{self.CODES[7][0]} {datum_str} {self.CODES[7][1]}"
-            elif code_str == "8":
-                datum_str = self.datum.strftime('%d.%m.%Y') if self.datum else "[Datum fehlt]"
-                return f"{self.CODES[8][0]} {datum_str} {self.CODES[8][1]}"
-            elif code_str == "9":
-                datum_str = self.datum.strftime('%d.%m.%Y') if self.datum else "[Datum fehlt]"
-                return f"{self.CODES[9][0]} {datum_str} {self.CODES[9][1]}"
-            elif code_str == "10":
-                return self.CODES[10]
-            elif code_str == "11":
-                return self.CODES[11]
-            elif code_str == "12":
-                return f"{self.CODES[12][0]} {self.datum} {self.CODES[12][1]}"
-            else:
+            text = self.CODES.get(self.benachrichtigungs_code)
+            if text is None:
                 # Unbekannten Code abfangen
                 logger.warning(f"Unbekannter Benachrichtigungscode: {self.benachrichtigungs_code}")
                 return f"Unbekannte Benachrichtigung (Code: {self.benachrichtigungs_code}) am {self.datum}"
+            if isinstance(text, str):
+                return text
+            vor, nach = text
+            return f"{vor} {self._datum_text()} {nach}"
         except KeyError as e:
             logger.error(f"Fehlender Schlüssel im CODES-Dict für Code {e}", exc_info=True)
             return f"Fehler bei Benachrichtigungserstellung (Code: {self.benachrichtigungs_code})"
@@ -517,6 +603,12 @@ class Benachrichtigungen(Base):
             logger.error(f"Fehler beim Formatieren der Benachrichtigung {self.benachrichtigungs_code}: {e}", exc_info=True)
             return f"Fehlerhafte Benachrichtigung (Code: {self.benachrichtigungs_code})"
 
+    def _datum_text(self):
+        """Formatiert das Datum für den Benachrichtigungstext (TT.MM.JJJJ für Codes 7-9)."""
+        if self.benachrichtigungs_code in self._DATUM_DE_CODES:
+            return self.datum.strftime('%d.%m.%Y') if self.datum else "[Datum fehlt]"
+        return f"{self.datum}"
+
 
 class VertragswochenstundenHistorie(Base):
     """
@@ -563,6 +655,41 @@ class VertragswochenstundenHistorie(Base):
     )
 
 
+# === Vorbereitete Abfragen ===
+# Häufig ausgeführte Abfragen werden einmal mit Bind-Parametern aufgebaut,
+# statt bei jedem Aufruf neu konstruiert zu werden. Der Cache-Key ist damit
+# stabil und SQLAlchemy nutzt den kompilierten SQL-Cache der Engine.
+
+# Gültige Wochenstunden am Stichtag (neuester Eintrag mit gueltig_ab <= :datum)
+_STMT_WOCHENSTUNDEN_AM_DATUM = (
+    select(VertragswochenstundenHistorie.wochenstunden)
+    .where(
+        (VertragswochenstundenHistorie.mitarbeiter_id == bindparam("mitarbeiter_id")) &
+        (VertragswochenstundenHistorie.gueltig_ab <= bindparam("datum"))
+    )
+    .order_by(VertragswochenstundenHistorie.gueltig_ab.desc())
+    .limit(1)
+)
+
+# Zeitlich erster Historie-Eintrag (gilt rückwirkend)
+_STMT_WOCHENSTUNDEN_ERSTER = (
+    select(VertragswochenstundenHistorie.wochenstunden)
+    .where(VertragswochenstundenHistorie.mitarbeiter_id == bindparam("mitarbeiter_id"))
+    .order_by(VertragswochenstundenHistorie.gueltig_ab.asc())
+    .limit(1)
+)
+
+# Alle Stempel eines Mitarbeiters an einem Tag, nach Uhrzeit sortiert
+_STMT_ZEITEINTRAEGE_TAG = (
+    select(Zeiteintrag)
+    .where(
+        (Zeiteintrag.mitarbeiter_id == bindparam("mitarbeiter_id")) &
+        (Zeiteintrag.datum == bindparam("datum"))
+    )
+    .order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
+)
+
+
 # === Hilfsfunktionen ===
 # Standalone-Funktionen für Datums-/Zeit-Konvertierung, Passwort-Hashing
 # und Arbeitszeitberechnungen
@@ -588,6 +715,10 @@ def _normalize_to_date(value):
         return value.date()
 
     if isinstance(value, str):
+        # Schneller Pfad für die üblichen Formate mit fester Breite
+        parsed = _fast_parse_datum(value)
+        if parsed is not None:
+            return parsed
         for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
             try:
                 return datetime.strptime(value, fmt).date()
@@ -596,6 +727,39 @@ def _normalize_to_date(value):
     return None
 
 
+def _fast_parse_datum(s, trenner="./-"):
+    """
+    Zerlegt Datums-Strings fester Breite direkt in Ziffern statt über strptime.
+    
+    Unterstützt "TT.MM.JJJJ", "TT/MM/JJJJ" und "JJJJ-MM-TT". Alle anderen
+    Schreibweisen (z.B. ohne führende Nullen) liefern None, damit der Aufrufer
+    auf datetime.strptime zurückfallen kann.
+    
+    Args:
+        s (str): Datums-String
+        trenner (str): Zulässige Trennzeichen ("." und "/" für TT?MM?JJJJ,
+            "-" für JJJJ-MM-TT)
+        
+    Returns:
+        date: Geparstes Datum oder None, wenn das Format nicht passt
+        oder das Datum ungültig ist
+    """
+    if len(s) != 10:
+        return None
+    try:
+        if s[2] == s[5] and s[2] in "./" and s[2] in trenner:
+            tag, monat, jahr = s[0:2], s[3:5], s[6:10]
+        elif s[4] == s[7] == "-" and "-" in trenner:
+            jahr, monat, tag = s[0:4], s[5:7], s[8:10]
+        else:
+            return None
+        if not (tag.isdigit() and monat.isdigit() and jahr.isdigit()):
+            return None
+        return date(int(jahr), int(monat), int(tag))
+    except ValueError:
+        return None
+
+
 # === Passwort-Verschlüsselungs-Hilfsfunktionen ===
 
 def hash_password(password: str) -> str:
@@ -635,6 +799,12 @@ def hash_password(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+# Gültiger bcrypt-Hash (gleicher Kostenfaktor wie gensalt()) zu keinem echten Passwort.
+# Beim Login mit unbekanntem Namen wird trotzdem einmal geprüft, damit die Antwortzeit
+# nicht verrät, ob der Nutzername existiert.
+_DUMMY_PASSWORT_HASH = "$2b$12$S/yWtpWCYv2XFC1qFuP7U.dvLYWeR1bTaGU3eVaTt3SdI3aMgKLRO"
+
+
 def verify_password(password: str, hashed_password: str) -> bool:
     """
     Verifiziert ein Passwort gegen einen bcrypt-Hash.
@@ -728,16 +898,9 @@ def hole_wochenstunden_am_datum(mitarbeiter_id, datum, fallback_wochenstunden):
 
     try:
         # 1. Versuch: Finde Eintrag mit gueltig_ab <= datum (normaler Fall)
-        stmt = (
-            select(VertragswochenstundenHistorie.wochenstunden)
-            .where(
-                (VertragswochenstundenHistorie.mitarbeiter_id == mitarbeiter_id) &
-                (VertragswochenstundenHistorie.gueltig_ab <= datum)
-            )
-            .order_by(VertragswochenstundenHistorie.gueltig_ab.desc())
-            .limit(1)
-        )
-        result = session.execute(stmt).scalar_one_or_none()
+        result = session.execute(
+            _STMT_WOCHENSTUNDEN_AM_DATUM, {"mitarbeiter_id": mitarbeiter_id, "datum": datum}
+        ).scalar_one_or_none()
         
         if result is not None:
             return int(result)
@@ -746,13 +909,9 @@ def hole_wochenstunden_am_datum(mitarbeiter_id, datum, fallback_wochenstunden):
         # → Hole den zeitlich ERSTEN Eintrag (ältester gueltig_ab) für rückwirkende Gültigkeit
         logger.debug(f"hole_wochenstunden_am_datum: Kein Eintrag für {datum} gefunden, suche ersten Historie-Eintrag")
         
-        stmt_erster = (
-            select(VertragswochenstundenHistorie.wochenstunden)
-            .where(VertragswochenstundenHistorie.mitarbeiter_id == mitarbeiter_id)
-            .order_by(VertragswochenstundenHistorie.gueltig_ab.asc())  # Aufsteigend = ältester zuerst
-            .limit(1)
-        )
-        result_erster = session.execute(stmt_erster).scalar_one_or_none()
+        result_erster = session.execute(
+            _STMT_WOCHENSTUNDEN_ERSTER, {"mitarbeiter_id": mitarbeiter_id}
+        ).scalar_one_or_none()
         
         if result_erster is not None:
             logger.debug(f"hole_wochenstunden_am_datum: Verwende ersten Historie-Eintrag rückwirkend: {result_erster}h")
@@ -766,6 +925,70 @@ def hole_wochenstunden_am_datum(mitarbeiter_id, datum, fallback_wochenstunden):
     return fallback_wochenstunden
 
 
+def lade_wochenstunden_historie(mitarbeiter_id):
+    """
+    Lädt die komplette Wochenstunden-Historie eines Mitarbeiters in einer Abfrage.
+    
+    Gegenstück zu hole_wochenstunden_am_datum für Ansichten, die viele Tage
+    auswerten: Die Historie wird einmal geladen und anschließend mit
+    wochenstunden_aus_historie im Speicher ausgewertet.
+    
+    Args:
+        mitarbeiter_id (int): ID des Mitarbeiters
+        
+    Returns:
+        list[tuple[date, int]]: (gueltig_ab, wochenstunden) aufsteigend nach
+        gueltig_ab sortiert; leere Liste bei Fehler oder ohne Historie
+        
+    Note:
+        Es werden bewusst alle Einträge geladen (nicht nur bis zum Ende des
+        Zeitraums), da der zeitlich erste Eintrag auch rückwirkend gilt.
+    """
+    if not mitarbeiter_id or not session:
+        return []
+
+    try:
+        stmt = (
+            select(VertragswochenstundenHistorie.gueltig_ab, VertragswochenstundenHistorie.wochenstunden)
+            .where(VertragswochenstundenHistorie.mitarbeiter_id == mitarbeiter_id)
+            .order_by(VertragswochenstundenHistorie.gueltig_ab.asc())
+        )
+        return [(gueltig_ab, int(stunden)) for gueltig_ab, stunden in session.execute(stmt).all()]
+    except SQLAlchemyError as e:
+        logger.error(f"lade_wochenstunden_historie: Fehler beim Lesen der Historie: {e}", exc_info=True)
+        return []
+
+
+def wochenstunden_aus_historie(historie, datum, fallback_wochenstunden):
+    """
+    Ermittelt die Wochenstunden an einem Datum aus einer vorgeladenen Historie.
+    
+    Gleiche Logik wie hole_wochenstunden_am_datum, jedoch ohne DB-Zugriff.
+    
+    Args:
+        historie (list[tuple[date, int]]): Ergebnis von lade_wochenstunden_historie
+        datum (date): Stichtag
+        fallback_wochenstunden (int): Rückgabewert ohne Historie
+        
+    Returns:
+        int: Gültige Wochenstunden am Datum oder Fallback-Wert
+        
+    Note:
+        Die Historie ist nach gueltig_ab sortiert, daher reicht eine binäre
+        Suche statt eines Durchlaufs pro Stichtag.
+    """
+    if not historie:
+        return fallback_wochenstunden
+
+    idx = bisect_right(historie, datum, key=itemgetter(0)) - 1
+    if idx >= 0:
+        return historie[idx][1]
+
+    # Kein Eintrag vor/am Datum: ältester Eintrag gilt rückwirkend
+    return historie[0][1]
+
+
+@lru_cache(maxsize=64)
 def berechne_taegliche_sollzeit(wochenstunden, fallback_stunden=None):
     """
     Berechnet die tägliche Sollarbeitszeit basierend auf Wochenstunden.
@@ -783,6 +1006,10 @@ def berechne_taegliche_sollzeit(wochenstunden, fallback_stunden=None):
     Note:
         Bei ungültigen oder negativen Werten wird der Fallback verwendet
         oder ein leeres timedelta zurückgegeben.
+        
+        Ergebnisse werden per lru_cache gemerkt (wenige unterschiedliche
+        Vertragswerte, timedelta ist unveränderlich). Argumente müssen
+        daher hashbar sein.
     """
     try:
         wochenstunden_float = float(wochenstunden) if wochenstunden is not None else None
@@ -797,6 +1024,216 @@ def berechne_taegliche_sollzeit(wochenstunden, fallback_stunden=None):
     return timedelta(hours=(wochenstunden_float / 5))
 
 
+# Grenzen für die Ganzzahl-Arbeitszeitberechnung (Mikrosekunden seit Mitternacht)
+_US_MINUTE = 60 * 1_000_000
+_US_STUNDE = 60 * _US_MINUTE
+_US_MORGENRUHE_ENDE = 6 * _US_STUNDE
+_US_NACHTRUHE_MINDERJAEHRIG = 20 * _US_STUNDE
+_US_NACHTRUHE_VOLLJAEHRIG = 22 * _US_STUNDE
+_US_TAGESENDE = 23 * _US_STUNDE + 59 * _US_MINUTE + 59 * 1_000_000
+_US_TAG = 24 * _US_STUNDE
+_EINE_MIKROSEKUNDE = timedelta(microseconds=1)  # timedelta // _EINE_MIKROSEKUNDE ergibt int
+# Pausenstufen als (Schwelle, zusätzliche Pause): Die Stufen addieren sich, z.B. ab 9h
+# 30 + 15 = 45 Minuten. So ergibt sich die Pause ohne Verzweigung (siehe _gesetzliche_pause_us).
+_US_PAUSENSTUFEN_MINDERJAEHRIG = ((4 * _US_STUNDE + 30 * _US_MINUTE, 30 * _US_MINUTE), (6 * _US_STUNDE, 30 * _US_MINUTE))
+_US_PAUSENSTUFEN_VOLLJAEHRIG = ((6 * _US_STUNDE, 30 * _US_MINUTE), (9 * _US_STUNDE, 15 * _US_MINUTE))
+
+# Tägliche Höchstarbeitszeit nach JArbSchG (§ 8) bzw. ArbZG (§ 3)
+_MAX_ARBEITSZEIT_MINDERJAEHRIG = timedelta(hours=8)
+_MAX_ARBEITSZEIT_VOLLJAEHRIG = timedelta(hours=10)
+# Eingestempelte Zeit (ohne Pausen), ab der die Stempeluhr das Arbeitsende erzwingt
+_MAX_STEMPELZEIT_MINDERJAEHRIG = timedelta(hours=9)
+_MAX_STEMPELZEIT_VOLLJAEHRIG = timedelta(hours=10, minutes=45)
+_VORWARNZEIT = timedelta(minutes=30)
+# Wöchentliche Höchstarbeitszeit Minderjähriger (§ 8 JArbSchG)
+_MAX_WOCHENARBEITSZEIT_MINDERJAEHRIG = timedelta(hours=40)
+# Höchstens erlaubter Tagesdurchschnitt über sechs Monate (§ 3 ArbZG)
+_MAX_DURCHSCHNITT_ARBEITSZEIT = timedelta(hours=8)
+# Mindestruhezeit zwischen zwei Arbeitstagen (§ 13 JArbSchG bzw. § 5 ArbZG)
+_RUHEZEIT_MINDERJAEHRIG = timedelta(hours=12)
+_RUHEZEIT_VOLLJAEHRIG = timedelta(hours=11)
+# Blocklänge, ab der bereits automatisch eine Pause abgezogen wird
+_AUTOPAUSE_SCHWELLE_MINDERJAEHRIG = timedelta(hours=4, minutes=30)
+_AUTOPAUSE_SCHWELLE_VOLLJAEHRIG = timedelta(hours=6)
+_KEINE_ZEIT = timedelta()
+
+
+def _zeit_in_mikrosekunden(zeit):
+    """Rechnet eine Uhrzeit in Mikrosekunden seit Mitternacht um."""
+    return ((zeit.hour * 60 + zeit.minute) * 60 + zeit.second) * 1_000_000 + zeit.microsecond
+
+
+def _gesetzliche_pause_us(gearbeitet, is_minor):
+    """
+    Ermittelt die gesetzliche Pause für eine Arbeitsdauer.
+    
+    Gemeinsame Regel für _berechne_paar_arbeitszeit und
+    CalculateTime.gesetzliche_pausen_hinzufügen.
+    
+    Args:
+        gearbeitet (int): Arbeitsdauer in Mikrosekunden
+        is_minor (bool): True, wenn der Mitarbeiter minderjährig ist
+        
+    Returns:
+        int: Abzuziehende Pause in Mikrosekunden (0, 30, 45 oder 60 Minuten)
+    """
+    (schwelle1, pause1), (schwelle2, pause2) = (
+        _US_PAUSENSTUFEN_MINDERJAEHRIG if is_minor else _US_PAUSENSTUFEN_VOLLJAEHRIG
+    )
+    return (gearbeitet >= schwelle1) * pause1 + (gearbeitet >= schwelle2) * pause2
+
+
+def _berechne_paar_arbeitszeit(start, ende, is_minor, pausen=True, arbeitsfenster=True):
+    """
+    Berechnet die Arbeitszeit eines Stempelpaares rein auf Ganzzahlen.
+    
+    Rechenkern von _berechne_tagesarbeitszeit; entspricht CalculateTime
+    mit gesetzliche_pausen_hinzufügen und arbeitsfenster_beachten.
+    
+    Args:
+        start (int): Einstempelzeit in Mikrosekunden seit Mitternacht
+        ende (int): Ausstempelzeit in Mikrosekunden seit Mitternacht (>= start)
+        is_minor (bool): True, wenn der Mitarbeiter minderjährig ist
+        pausen (bool): Gesetzliche Pausen abziehen
+        arbeitsfenster (bool): Zeit außerhalb des Arbeitsfensters abziehen
+        
+    Returns:
+        int: Arbeitszeit in Mikrosekunden (kann durch Abzüge negativ werden)
+    """
+    gearbeitet = ende - start
+    if pausen:
+        gearbeitet -= _gesetzliche_pause_us(gearbeitet, is_minor)
+
+    if arbeitsfenster:
+        # Überschneidung mit Morgenruhe (00:00 - 06:00) und Nachtruhe abziehen
+        nachtruhe_start = _US_NACHTRUHE_MINDERJAEHRIG if is_minor else _US_NACHTRUHE_VOLLJAEHRIG
+        gearbeitet -= max(0, min(ende, _US_MORGENRUHE_ENDE) - start)
+        gearbeitet -= max(0, min(ende, _US_TAGESENDE) - max(start, nachtruhe_start))
+    return gearbeitet
+
+
+def _berechne_tagesarbeitszeit(zeiten, is_minor):
+    """
+    Berechnet die Netto-Arbeitszeit eines Tages aus sortierten Stempelzeiten.
+    
+    Schneller Pfad für get_zeiteinträge: Statt pro Stempelpaar ein
+    CalculateTime-Objekt (mit mehreren datetime.combine-Aufrufen) zu erzeugen,
+    wird mit ganzzahligen Mikrosekunden seit Mitternacht gerechnet. Pausenabzug
+    und Arbeitsfenster entsprechen exakt CalculateTime.gesetzliche_pausen_hinzufügen
+    und CalculateTime.arbeitsfenster_beachten.
+    
+    Args:
+        zeiten (list[time]): Nach Uhrzeit sortierte Stempelzeiten eines Tages
+        is_minor (bool): True, wenn der Mitarbeiter an diesem Tag minderjährig ist
+        
+    Returns:
+        timedelta: Summierte Arbeitszeit aller vollständigen Paare oder
+        None, wenn ein Paar unregelmäßig ist (Ende vor Start) und der
+        langsame Pfad über CalculateTime genommen werden muss.
+    """
+    summe = 0
+    for i in range(0, len(zeiten) - 1, 2):
+        start = _zeit_in_mikrosekunden(zeiten[i])
+        ende = _zeit_in_mikrosekunden(zeiten[i + 1])
+        if ende < start:
+            return None
+        summe += _berechne_paar_arbeitszeit(start, ende, is_minor)
+
+    return timedelta(microseconds=summe)
+
+
+def _stempelpaare_select(bedingung):
+    """
+    Baut eine Abfrage, die vollständige Stempelpaare direkt in SQLite bildet.
+    
+    Per Fensterfunktion werden die Stempel je Tag nach Uhrzeit nummeriert;
+    jede zweite Zeile trägt über LAG() ihren Vorgänger als Startzeit. So
+    liefert die Datenbank nur noch (Start, Ende)-Paare, ein übrig
+    bleibender Stempel eines Tages fällt weg.
+    
+    Args:
+        bedingung: WHERE-Bedingung auf Zeiteintrag (z.B. Mitarbeiter und Zeitraum)
+        
+    Returns:
+        Select: Zeilen (datum, start, ende, start_id, ende_id), sortiert nach
+        Datum und Uhrzeit
+    """
+    fenster = {"partition_by": Zeiteintrag.datum, "order_by": (Zeiteintrag.zeit, Zeiteintrag.id)}
+    nummeriert = (
+        select(
+            Zeiteintrag.datum,
+            # lag() übernimmt den Spaltentyp nicht, ohne type_ käme die Uhrzeit als Text zurück
+            func.lag(Zeiteintrag.zeit, type_=Time).over(**fenster).label("start"),
+            Zeiteintrag.zeit.label("ende"),
+            func.lag(Zeiteintrag.id, type_=Integer).over(**fenster).label("start_id"),
+            Zeiteintrag.id.label("ende_id"),
+            func.row_number().over(**fenster).label("nr"),
+        )
+        .where(bedingung)
+        .subquery()
+    )
+    return (
+        select(nummeriert.c.datum, nummeriert.c.start, nummeriert.c.ende, nummeriert.c.start_id, nummeriert.c.ende_id)
+        .where(nummeriert.c.nr % 2 == 0)
+        .order_by(nummeriert.c.datum, nummeriert.c.nr)
+    )
+
+
+# Vorbereitete Paar-Abfrage für einen Mitarbeiter und Zeitraum (siehe "Vorbereitete Abfragen");
+# kann erst nach _stempelpaare_select aufgebaut werden
+_STMT_STEMPELPAARE_ZEITRAUM = _stempelpaare_select(
+    (Zeiteintrag.mitarbeiter_id == bindparam("mitarbeiter_id")) &
+    (Zeiteintrag.datum.between(bindparam("start_datum"), bindparam("end_datum")))
+)
+
+
+@lru_cache(maxsize=32)
+def _feiertags_ordinale(jahr):
+    """
+    Liefert die deutschen Feiertage eines Jahres als frozenset von Ordinalzahlen.
+    
+    holidays.Germany prüft Mitgliedschaft über Python-Logik mit verzögerter
+    Jahreserweiterung; ein frozenset aus date.toordinal()-Werten erlaubt
+    die Prüfung per C-Hash-Lookup. Pro Jahr wird nur einmal berechnet.
+    
+    Args:
+        jahr (int): Kalenderjahr
+        
+    Returns:
+        frozenset[int]: Ordinalzahlen (date.toordinal()) aller Feiertage
+        
+    Raises:
+        Exception: Fehler der holidays-Bibliothek werden an den Aufrufer weitergegeben
+    """
+    return frozenset(d.toordinal() for d in holidays.Germany(years=jahr))
+
+
+def _werktage_im_zeitraum(start_datum, end_datum):
+    """
+    Liefert alle Werktage (Montag–Freitag) zwischen zwei Daten.
+    
+    Statt jeden Kalendertag per timedelta zu erzeugen und Wochenenden über
+    weekday() wieder zu verwerfen, wird wochenweise über Ordinalzahlen
+    gesprungen und nur Montag bis Freitag erzeugt.
+    
+    Args:
+        start_datum (date): Erster Tag (inklusive)
+        end_datum (date): Letzter Tag (inklusive)
+        
+    Returns:
+        list[date]: Aufsteigend sortierte Werktage; leer, wenn end_datum vor start_datum liegt
+    """
+    erster = start_datum.toordinal()
+    letzter = end_datum.toordinal()
+    # Ordinalzahl des Montags der Startwoche, von dort in 7er-Schritten
+    montag = erster - start_datum.weekday()
+    return [
+        date.fromordinal(tag)
+        for wochenstart in range(montag, letzter + 1, 7)
+        for tag in range(max(wochenstart, erster), min(wochenstart + 5, letzter + 1))
+    ]
+
+
 class CalculateTime():
     """
     Hilfsklasse zur Berechnung der Arbeitszeit zwischen zwei Stempeln.
@@ -821,13 +1258,20 @@ class CalculateTime():
         None: Wenn Einträge von unterschiedlichen Tagen stammen
         CalculateTime: Objekt zur Zeitberechnung
     """
-    def __new__(cls, eintrag1, eintrag2, nutzer):
+    # Konstanten für das Arbeitsfenster (einmalig statt pro Aufruf erzeugt)
+    _T_00 = time(0, 0)
+    _T_06 = time(6, 0)
+    _T_20 = time(20, 0)
+    _T_22 = time(22, 0)
+    _T_2359 = time(23, 59, 59)
+
+    def __new__(cls, eintrag1, eintrag2, nutzer, is_minor=None):
         # Nur erstellen, wenn beide Einträge vom selben Tag sind
         if eintrag1.datum != eintrag2.datum:
             return None
         return super().__new__(cls)
 
-    def __init__(self, eintrag1, eintrag2, nutzer):
+    def __init__(self, eintrag1, eintrag2, nutzer, is_minor=None):
         """
         Initialisiert das CalculateTime-Objekt für zwei Stempel desselben Tages.
         
@@ -835,6 +1279,8 @@ class CalculateTime():
             eintrag1 (Zeiteintrag): Erster Stempel (Einstempelung)
             eintrag2 (Zeiteintrag): Zweiter Stempel (Ausstempelung)
             nutzer (mitarbeiter): Mitarbeiter-Objekt für Pausenregelungen
+            is_minor (bool, optional): Bereits ermittelte Minderjährigkeit am
+                Stempeltag; wird sonst einmalig über nutzer.is_minor_on_date bestimmt
             
         Attributes:
             nutzer (mitarbeiter): Referenz zum Mitarbeiter
@@ -844,6 +1290,7 @@ class CalculateTime():
             start_dt (datetime): Kombiniertes Start-Datum-Zeit-Objekt
             end_dt (datetime): Kombiniertes End-Datum-Zeit-Objekt
             gearbeitete_zeit (timedelta): Berechnete Arbeitsze it (Endzeit - Startzeit)
+            is_minor (bool): Minderjährigkeit am Stempeltag (None ohne Nutzer)
             
         Note:
             Wenn Endzeit vor Startzeit liegt (Fehleingabe), werden die Zeiten
@@ -854,6 +1301,10 @@ class CalculateTime():
         self.datum = eintrag1.datum
         self.startzeit = eintrag1.zeit
         self.endzeit = eintrag2.zeit
+        # Minderjährigkeit nur einmal pro Objekt bestimmen (Pausen + Arbeitsfenster)
+        if is_minor is None and nutzer:
+            is_minor = nutzer.is_minor_on_date(self.datum)
+        self.is_minor = is_minor
 
         try:
             # Datum und Uhrzeit kombinieren für datetime-Berechnungen
@@ -896,17 +1347,9 @@ class CalculateTime():
             logger.error("gesetzliche_pausen_hinzufügen ohne 'nutzer' aufgerufen.")
             return
         
-        # Unterschiedliche Regelungen für Minderjährige und Volljährige
-        if self.nutzer.is_minor_on_date(self.datum):
-            if self.gearbeitete_zeit >= timedelta(hours=6):
-                self.gearbeitete_zeit -= timedelta(minutes=60)
-            elif self.gearbeitete_zeit >= timedelta(hours=4.5):
-                self.gearbeitete_zeit -= timedelta(minutes=30)
-        else:
-            if self.gearbeitete_zeit >= timedelta(hours=9):
-                self.gearbeitete_zeit -= timedelta(minutes=45)
-            elif self.gearbeitete_zeit >= timedelta(hours=6):
-                self.gearbeitete_zeit -= timedelta(minutes=30)
+        # Unterschiedliche Regelungen für Minderjährige und Volljährige (siehe _gesetzliche_pause_us)
+        pause_us = _gesetzliche_pause_us(self.gearbeitete_zeit // _EINE_MIKROSEKUNDE, self.is_minor)
+        self.gearbeitete_zeit -= timedelta(microseconds=pause_us)
 
     def arbeitsfenster_beachten(self):
         """
@@ -932,18 +1375,17 @@ class CalculateTime():
             return
 
         # Altersabhängige Nachtruhe-Grenze festlegen
-        is_minor = self.nutzer.is_minor_on_date(self.datum)
-        nachtruhe_zeit = time(20, 0) if is_minor else time(22, 0)  # 20 Uhr (Minderjährige) oder 22 Uhr (Erwachsene)
+        nachtruhe_zeit = self._T_20 if self.is_minor else self._T_22  # 20 Uhr (Minderjährige) oder 22 Uhr (Erwachsene)
         
         # Zeitgrenzen als datetime-Objekte
-        morgenruhe_ende = datetime.combine(self.datum, time(6, 0))  # 06:00 Uhr
+        morgenruhe_ende = datetime.combine(self.datum, self._T_06)  # 06:00 Uhr
         nachtruhe_start = datetime.combine(self.datum, nachtruhe_zeit)  # 20:00 oder 22:00 Uhr
 
         abzuziehende_zeit = timedelta()  # Initialisierung: Keine Zeit abziehen
 
         # === 1. Überschneidung mit Morgenruhe (00:00 - 06:00) berechnen ===
         # Überschneidungsstart: Später von (Arbeitsbeginn, 00:00)
-        overlap_start_morgen = max(self.start_dt, datetime.combine(self.datum, time(0, 0)))
+        overlap_start_morgen = max(self.start_dt, datetime.combine(self.datum, self._T_00))
         # Überschneidungsende: Früher von (Arbeitsende, 06:00)
         overlap_end_morgen = min(self.end_dt, morgenruhe_ende)
 
@@ -955,7 +1397,7 @@ class CalculateTime():
         # Überschneidungsstart: Später von (Arbeitsbeginn, Nachtruhe-Beginn)
         overlap_start_nacht = max(self.start_dt, nachtruhe_start)
         # Überschneidungsende: Früher von (Arbeitsende, 23:59:59)
-        overlap_end_nacht = min(self.end_dt, datetime.combine(self.datum, time(23, 59, 59)))
+        overlap_end_nacht = min(self.end_dt, datetime.combine(self.datum, self._T_2359))
 
         # Wenn Überschneidung existiert: Zeit abziehen
         if overlap_end_nacht > overlap_start_nacht:
@@ -967,6 +1409,23 @@ class CalculateTime():
 
 # === Hauptgeschäftslogik-Klassen ===
 
+def _schwelle_als_float(wert, standard):
+    """
+    Wandelt eine Ampelschwelle in float um.
+    
+    Args:
+        wert: Schwellwert (int, float, str oder None)
+        standard (int): Ersatzwert für None/0
+        
+    Returns:
+        float: Schwellwert oder None, wenn der Wert nicht umwandelbar ist
+    """
+    try:
+        return float(wert or standard)
+    except (ValueError, TypeError):
+        return None
+
+
 class ModellTrackTime():
     """
     Hauptgeschäftslogik-Klasse für die Zeiterfassung.
@@ -992,6 +1451,9 @@ class ModellTrackTime():
         aktueller_nutzer_ampel_rot (int): Roter Schwellwert
         aktueller_nutzer_ampel_grün (int): Grüner Schwellwert
         _cached_aktueller_nutzer (mitarbeiter): Gecachtes Mitarbeiter-Objekt
+        _wochenstunden_historie_cache (dict): Vorgeladene Wochenstunden-Historie je Mitarbeiter-ID
+        _popup_cache (tuple): Zuletzt geladene ausstehende PopUps des Tages
+        _arbeitszeit_vorrat (tuple): Während checke_arbeitszeitschutz einmal geladene Arbeitszeit je Tag
         
         nachtragen_datum (str): Datum für manuelles Nachtragen
         manueller_stempel_uhrzeit (str): Uhrzeit für manuelles Nachtragen
@@ -1027,6 +1489,11 @@ class ModellTrackTime():
         self.aktueller_nutzer_ampel_rot = None
         self.aktueller_nutzer_ampel_grün = None
         self._cached_aktueller_nutzer = None
+        self._wochenstunden_historie_cache = {}
+        # Letztes Ergebnis von get_pending_popups_for_today: ((nutzer_id, datum), pending)
+        self._popup_cache = None
+        # Nur während checke_arbeitszeitschutz: ((nutzer_id, start, ende), {datum: arbeitszeit})
+        self._arbeitszeit_vorrat = None
 
         self.nachtragen_datum = None
         self.manueller_stempel_uhrzeit = None
@@ -1064,6 +1531,51 @@ class ModellTrackTime():
         self.feedback_stempel = ""
         self.feedback_neues_passwort = ""
 
+    # Ampelschwellen werden bei der Zuweisung einmal nach float gewandelt,
+    # damit set_ampel_farbe (bei jedem UI-Refresh) nur noch vergleicht.
+    @property
+    def aktueller_nutzer_ampel_grün(self):
+        return self._ampel_gruen
+
+    @aktueller_nutzer_ampel_grün.setter
+    def aktueller_nutzer_ampel_grün(self, wert):
+        self._ampel_gruen = wert
+        self._ampel_gruen_f = _schwelle_als_float(wert, 5)
+
+    @property
+    def aktueller_nutzer_ampel_rot(self):
+        return self._ampel_rot
+
+    @aktueller_nutzer_ampel_rot.setter
+    def aktueller_nutzer_ampel_rot(self, wert):
+        self._ampel_rot = wert
+        self._ampel_rot_f = _schwelle_als_float(wert, 10)
+
+    # checke_stempel merkt sich nur die Tage; der Text wird erst beim Lesen erzeugt.
+    @property
+    def feedback_stempel(self):
+        tage = self._feedback_stempel_tage
+        if tage:
+            tage_text = ", ".join(tag.strftime("%d.%m.%Y") for tag in tage)
+            return f"An den Tagen {tage_text} fehlt ein Stempel, bitte tragen sie diesen nach"
+        return self._feedback_stempel_text
+
+    @feedback_stempel.setter
+    def feedback_stempel(self, wert):
+        self._feedback_stempel_tage = None
+        self._feedback_stempel_text = wert
+
+    def _setze_feedback_stempel_tage(self, tage):
+        """
+        Merkt sich die Tage mit fehlendem Stempel für feedback_stempel.
+        
+        Args:
+            tage (list[date]): Tage mit ungerader Stempelanzahl; bei leerer
+                Liste ist feedback_stempel ein leerer Text
+        """
+        self._feedback_stempel_text = ""
+        self._feedback_stempel_tage = tage
+
     def ist_sonn_oder_feiertag(self, datum):
         """
         Prüft, ob ein bestimmtes Datum ein Sonntag oder Feiertag ist.
@@ -1077,7 +1589,7 @@ class ModellTrackTime():
         # Datum konvertieren falls String
         if isinstance(datum, str):
             try:
-                datum = datetime.strptime(datum, "%d/%m/%Y").date()
+                datum = _fast_parse_datum(datum, "/") or datetime.strptime(datum, "%d/%m/%Y").date()
             except ValueError:
                 logger.warning(f"ist_sonn_oder_feiertag: Ungültiges Datumsformat '{datum}'")
                 return False
@@ -1088,14 +1600,44 @@ class ModellTrackTime():
         
         # Feiertage für das Jahr holen
         try:
-            de_holidays = holidays.Germany(years=datum.year)
-            return datum in de_holidays
+            return datum.toordinal() in _feiertags_ordinale(datum.year)
         except Exception as e:
             logger.error(f"Fehler beim Prüfen der Feiertage: {e}", exc_info=True)
             return False
 
 
     # === Hilfsfunktion für sichere DB-Operationen ===
+    def _safe_db_batch(self, operation_funcs, name=None):
+        """
+        Führt mehrere DB-Operationen in einer Transaktion mit einem Commit aus.
+        
+        Jeder Commit ist bei SQLite die teuerste Einzeloperation (fsync).
+        Zusammengehörige Schreibvorgänge werden daher gesammelt und erst
+        am Ende gemeinsam committed. Schlägt eine Operation fehl, wird die
+        gesamte Transaktion zurückgerollt.
+        
+        Args:
+            operation_funcs (list[callable]): Funktionen ohne Argumente mit DB-Operationen
+            name (str, optional): Bezeichnung für das Logging
+            
+        Returns:
+            list: Rückgabewerte der Operationen in Reihenfolge,
+            Fehler-Dict bei Fehlern oder None ohne Session
+        """
+        if not session:
+            logger.critical("Keine DB-Session vorhanden. Operation abgebrochen.")
+            return None # Oder False, je nach Kontext
+
+        name = name or ", ".join(getattr(f, "__name__", repr(f)) for f in operation_funcs)
+        try:
+            # Alle Operationen ausführen, erst danach einmal committen
+            results = [operation_func() for operation_func in operation_funcs]
+            session.commit()
+            logger.debug(f"DB-Operation '{name}' erfolgreich committed.")
+            return results
+        except Exception as e:
+            return self._db_fehler_behandeln(name, e)
+
     def _safe_db_operation(self, operation_func, *args, **kwargs):
         """
         Wrapper für sichere Datenbank-Operationen mit Fehlerbehandlung.
@@ -1113,34 +1655,49 @@ class ModellTrackTime():
             
         Note:
             Führt automatisch session.commit() bei Erfolg und
-            session.rollback() bei Fehlern aus.
+            session.rollback() bei Fehlern aus. Nur für Schreibzugriffe
+            gedacht; reine Lesezugriffe verwenden direkt try/except.
         """
         if not session:
             logger.critical("Keine DB-Session vorhanden. Operation abgebrochen.")
             return None # Oder False, je nach Kontext
-            
+
         try:
-            # Führe die eigentliche Operation aus
+            # Direkter Aufruf ohne Umweg über _safe_db_batch (keine Lambda-/Listen-Allokation)
             result = operation_func(*args, **kwargs)
-            # Änderungen committen, falls die Operation erfolgreich war
             session.commit()
             logger.debug(f"DB-Operation '{operation_func.__name__}' erfolgreich committed.")
             return result
-        except IntegrityError as e:
-            logger.warning(f"Integritätsfehler bei DB-Operation '{operation_func.__name__}': {e}")
+        except Exception as e:
+            return self._db_fehler_behandeln(operation_func.__name__, e)
+
+    def _db_fehler_behandeln(self, name, e):
+        """
+        Rollt die Transaktion nach einem Fehler zurück und erzeugt das Fehler-Dict.
+        
+        Gemeinsame Fehlerbehandlung für _safe_db_operation und _safe_db_batch.
+        
+        Args:
+            name (str): Bezeichnung der Operation für das Logging
+            e (Exception): Aufgetretener Fehler
+            
+        Returns:
+            dict: {"error": <Fehlerart>, "details": <Meldung>}
+        """
+        if isinstance(e, IntegrityError):
+            logger.warning(f"Integritätsfehler bei DB-Operation '{name}': {e}")
             session.rollback()
             # Diese Fehler sind oft "normal" (z.B. doppelter Eintrag)
             return {"error": "IntegrityError", "details": str(e)}
-        except SQLAlchemyError as e:
+        if isinstance(e, SQLAlchemyError):
             # Alle anderen DB-Fehler
-            logger.error(f"SQLAlchemy-Fehler bei DB-Operation '{operation_func.__name__}': {e}", exc_info=True)
+            logger.error(f"SQLAlchemy-Fehler bei DB-Operation '{name}': {e}", exc_info=True)
             session.rollback()
             return {"error": "SQLAlchemyError", "details": str(e)}
-        except Exception as e:
-            # Alle anderen unerwarteten Fehler (z.B. Logikfehler)
-            logger.critical(f"Unerwarteter Fehler bei DB-Operation '{operation_func.__name__}': {e}", exc_info=True)
-            session.rollback()
-            return {"error": "Exception", "details": str(e)}
+        # Alle anderen unerwarteten Fehler (z.B. Logikfehler)
+        logger.critical(f"Unerwarteter Fehler bei DB-Operation '{name}': {e}", exc_info=True)
+        session.rollback()
+        return {"error": "Exception", "details": str(e)}
     
     # ================================================
 
@@ -1162,7 +1719,8 @@ class ModellTrackTime():
 
         try:
             stmt = select(mitarbeiter.name).where(mitarbeiter.vorgesetzter_id == self.aktueller_nutzer_id)
-            names = session.scalars(stmt).all()
+            # Nur Namen benötigt: direkt über die Core-Verbindung lesen (ohne ORM-Ergebnisverarbeitung)
+            names = list(session.connection().execute(stmt).scalars())
             names.append(self.aktueller_nutzer_name)
             self.mitarbeiter = names
         except SQLAlchemyError as e:
@@ -1226,49 +1784,44 @@ class ModellTrackTime():
                 logger.error(f"get_zeiteinträge: Nutzer {ausgewählte_mitarbeiter_id} nicht gefunden.")
                 return
 
-            # Datum-Parsing validieren
+            # Datum-Parsing validieren (schneller Pfad, strptime nur für abweichende Schreibweisen)
             try:
-                date_obj = datetime.strptime(self.bestimmtes_datum, "%d.%m.%Y").date()
+                date_obj = _fast_parse_datum(self.bestimmtes_datum, ".") or \
+                    datetime.strptime(self.bestimmtes_datum, "%d.%m.%Y").date()
             except ValueError as e:
                 logger.error(f"Ungültiges Datumsformat in get_zeiteinträge: {self.bestimmtes_datum} - {e}")
                 self.zeiteinträge_bestimmtes_datum = []
                 return
 
-            stmt = select(Zeiteintrag).where(
-                    (Zeiteintrag.mitarbeiter_id == self.aktuelle_kalendereinträge_für_id) &
-                    (Zeiteintrag.datum == date_obj)
-                ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-            
-            einträge = session.scalars(stmt).all()
+            einträge = session.scalars(
+                _STMT_ZEITEINTRAEGE_TAG,
+                {"mitarbeiter_id": self.aktuelle_kalendereinträge_für_id, "datum": date_obj},
+            ).all()
 
-            einträge_mit_validierung = []
-            for eintrag in einträge:
-                is_unvalid = False
-                stempelzeit = eintrag.zeit
-                
-                if nutzer.is_minor_on_date(date_obj):
-                    if stempelzeit < time(6, 0) or stempelzeit > time(20, 0):
-                        is_unvalid = True
-                else:
-                    # Original-Logik: is_unvalid = False. Das scheint ein Bug zu sein.
-                    # Sollte es nicht 'is_unvalid = True' sein, wenn außerhalb 6-22 Uhr?
-                    # Ich korrigiere das defensiv.
-                    if stempelzeit < time(6, 0) or stempelzeit > time(22, 0):
-                        is_unvalid = True # Korrigierte Logik
-                
-                einträge_mit_validierung.append([eintrag, is_unvalid])
+            is_minor = nutzer.is_minor_on_date(date_obj)
+            # Stempel außerhalb des Arbeitsfensters markieren
+            # (Minderjährige: 6-20 Uhr, Volljährige: 6-22 Uhr)
+            fenster_start = CalculateTime._T_06
+            fenster_ende = CalculateTime._T_20 if is_minor else CalculateTime._T_22
+            einträge_mit_validierung = [
+                [eintrag, not (fenster_start <= eintrag.zeit <= fenster_ende)] for eintrag in einträge
+            ]
 
             # Arbeitszeit und Gleitzeit für den Tag berechnen
-            arbeitszeit_summe = timedelta()
-            i = 0
-            while i < len(einträge) - 1:
-                try:
-                    calc = CalculateTime(einträge[i], einträge[i + 1], nutzer)
-                except Exception as e:
-                    logger.error(f"Fehler bei der Arbeitszeitberechnung für {date_obj}: {e}", exc_info=True)
-                    calc = None
+            # Schneller Pfad: Ganzzahl-Arithmetik über alle Paare; CalculateTime
+            # nur noch bei unregelmäßigen Daten (Ausstempeln vor Einstempeln)
+            arbeitszeit_summe = _berechne_tagesarbeitszeit([e.zeit for e in einträge], is_minor)
+            if arbeitszeit_summe is None:
+                arbeitszeit_summe = timedelta()
+                # Alle Einträge stammen aus der Tagesabfrage (gleiches Datum),
+                # daher feste Paare (0,1), (2,3), ...
+                for eintrag_start, eintrag_ende in zip(einträge[0::2], einträge[1::2]):
+                    try:
+                        calc = CalculateTime(eintrag_start, eintrag_ende, nutzer, is_minor)
+                    except Exception as e:
+                        logger.error(f"Fehler bei der Arbeitszeitberechnung für {date_obj}: {e}", exc_info=True)
+                        continue
 
-                if calc:
                     try:
                         calc.gesetzliche_pausen_hinzufügen()
                         calc.arbeitsfenster_beachten()
@@ -1276,15 +1829,13 @@ class ModellTrackTime():
                         logger.error(f"Fehler bei Pausen-/Fensterberechnung für {date_obj}: {e}", exc_info=True)
 
                     arbeitszeit_summe += calc.gearbeitete_zeit
-                    i += 2
-                else:
-                    i += 1
 
             # === Wochenstunden und tägliche Sollzeit für das angezeigte Datum ermitteln ===
             # WICHTIG: Verwende die historischen Wochenstunden des ausgewählten Mitarbeiters,
             # nicht die des eingeloggten Nutzers
-            wochenstunden = hole_wochenstunden_am_datum(
-                ausgewählte_mitarbeiter_id,  # Verwende den im Kalender ausgewählten Mitarbeiter
+            # Historie wird pro Mitarbeiter einmal geladen und für weitere Kalendertage wiederverwendet
+            wochenstunden = wochenstunden_aus_historie(
+                self._get_wochenstunden_historie(ausgewählte_mitarbeiter_id),  # Im Kalender ausgewählter Mitarbeiter
                 date_obj,
                 nutzer.vertragliche_wochenstunden,  # Fallback auf aktuelle Wochenstunden
             )
@@ -1305,13 +1856,13 @@ class ModellTrackTime():
             
             # Fall 2: Fehlstempel-Benachrichtigung existiert (Code 1)
             # Tag wurde als fehlend markiert, Sollzeit wurde bereits abgezogen
-            elif hat_fehlstempel_benachrichtigung := session.execute(
-                select(Benachrichtigungen).where(
+            elif session.execute(
+                select(exists().where(
                     (Benachrichtigungen.mitarbeiter_id == ausgewählte_mitarbeiter_id) &
                     (Benachrichtigungen.datum == date_obj) &
                     (Benachrichtigungen.benachrichtigungs_code == 1)
-                )
-            ).scalar_one_or_none():
+                ))
+            ).scalar():
                 # Zeige negative tägliche Sollzeit an
                 taegliche_sollzeit_stunden = tägliche_arbeitszeit.total_seconds() / 3600
                 self.gleitzeit_bestimmtes_datum_stunden = -round(taegliche_sollzeit_stunden, 2)
@@ -1349,6 +1900,25 @@ class ModellTrackTime():
             self.zeiteinträge_bestimmtes_datum = []
             self.gleitzeit_bestimmtes_datum_stunden = 0.0
 
+    def _get_wochenstunden_historie(self, mitarbeiter_id):
+        """
+        Liefert die Wochenstunden-Historie eines Mitarbeiters aus dem Cache.
+        
+        Lädt die Historie beim ersten Zugriff per lade_wochenstunden_historie.
+        Der Cache wird in aktualisiere_vertragliche_wochenstunden invalidiert.
+        
+        Args:
+            mitarbeiter_id (int): ID des Mitarbeiters
+            
+        Returns:
+            list[tuple[date, int]]: Vorgeladene Historie
+        """
+        historie = self._wochenstunden_historie_cache.get(mitarbeiter_id)
+        if historie is None:
+            historie = lade_wochenstunden_historie(mitarbeiter_id)
+            self._wochenstunden_historie_cache[mitarbeiter_id] = historie
+        return historie
+
     def get_user_info(self):
         """
         Lädt alle Informationen des aktuell eingeloggten Benutzers.
@@ -1446,10 +2016,33 @@ class ModellTrackTime():
             self._cached_aktueller_nutzer = None
             return None
 
+    def _get_nutzer(self, mitarbeiter_id):
+        """
+        Lädt ein Mitarbeiter-Objekt; für den eingeloggten Nutzer aus dem Cache.
+        
+        Args:
+            mitarbeiter_id (int): ID des Mitarbeiters
+            
+        Returns:
+            mitarbeiter: Mitarbeiter-Objekt oder None, wenn nicht gefunden
+            
+        Note:
+            Für den eingeloggten Nutzer wird get_aktueller_nutzer verwendet,
+            andere Mitarbeiter (z.B. durch Vorgesetzte bearbeitet) werden
+            per session.get geladen.
+        """
+        if mitarbeiter_id == self.aktueller_nutzer_id:
+            return self.get_aktueller_nutzer()
+        return session.get(mitarbeiter, mitarbeiter_id)
+
     def update_letzter_login(self):
         """
         Aktualisiert den letzter_login des aktuellen Nutzers auf heute.
         Wird nach allen Check-Funktionen beim Login aufgerufen.
+        
+        Returns:
+            bool: True bei Erfolg, False wenn der Nutzer fehlt,
+            oder Fehler-Dict (siehe _safe_db_operation)
         """
         if self.aktueller_nutzer_id is None:
             logger.warning("update_letzter_login: Kein Nutzer angemeldet")
@@ -1458,17 +2051,20 @@ class ModellTrackTime():
             logger.error("update_letzter_login: Keine DB-Session verfügbar")
             return
         
-        try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
-            if nutzer:
-                nutzer.letzter_login = date.today()
-                session.commit()
-                logger.info(f"letzter_login für Nutzer {self.aktueller_nutzer_id} auf {date.today()} aktualisiert")
-            else:
+        heute = date.today()
+
+        def _letzter_login_setzen():
+            nutzer = self.get_aktueller_nutzer()
+            if not nutzer:
                 logger.error(f"update_letzter_login: Nutzer {self.aktueller_nutzer_id} nicht gefunden")
-        except SQLAlchemyError as e:
-            logger.error(f"DB-Fehler beim Aktualisieren von letzter_login: {e}", exc_info=True)
-            session.rollback()
+                return False
+            nutzer.letzter_login = heute
+            return True
+
+        result = self._safe_db_operation(_letzter_login_setzen)
+        if result is True:
+            logger.info(f"letzter_login für Nutzer {self.aktueller_nutzer_id} auf {heute} aktualisiert")
+        return result
 
     def aktualisiere_vertragliche_wochenstunden(self, neue_wochenstunden, gueltig_ab=None, mitarbeiter_id=None):
         """Aktualisiert die vertraglichen Wochenstunden und pflegt die Historie."""
@@ -1501,29 +2097,24 @@ class ModellTrackTime():
             gueltig_ab_datum = date.today()
 
         def _db_op():
-            nutzer = session.get(mitarbeiter, ziel_id)
+            nutzer = self._get_nutzer(ziel_id)
             if not nutzer:
                 return {"error": "Nutzer nicht gefunden"}
 
             alte_wochenstunden = nutzer.vertragliche_wochenstunden
             nutzer.vertragliche_wochenstunden = neue_wochenstunden_int
 
-            historie_stmt = select(VertragswochenstundenHistorie).where(
-                (VertragswochenstundenHistorie.mitarbeiter_id == ziel_id) &
-                (VertragswochenstundenHistorie.gueltig_ab == gueltig_ab_datum)
+            # Upsert in einer Anweisung statt SELECT + INSERT/UPDATE
+            # (nutzt UNIQUE (mitarbeiter_id, gueltig_ab))
+            historie_stmt = sqlite_insert(VertragswochenstundenHistorie).values(
+                mitarbeiter_id=ziel_id,
+                gueltig_ab=gueltig_ab_datum,
+                wochenstunden=neue_wochenstunden_int,
+            ).on_conflict_do_update(
+                index_elements=["mitarbeiter_id", "gueltig_ab"],
+                set_={"wochenstunden": neue_wochenstunden_int},
             )
-            historie_eintrag = session.execute(historie_stmt).scalar_one_or_none()
-
-            if historie_eintrag:
-                historie_eintrag.wochenstunden = neue_wochenstunden_int
-            else:
-                session.add(
-                    VertragswochenstundenHistorie(
-                        mitarbeiter_id=ziel_id,
-                        gueltig_ab=gueltig_ab_datum,
-                        wochenstunden=neue_wochenstunden_int,
-                    )
-                )
+            session.execute(historie_stmt)
 
             logger.info(
                 "aktualisiere_vertragliche_wochenstunden: Nutzer %s von %s auf %s Stunden (gültig ab %s)",
@@ -1544,6 +2135,9 @@ class ModellTrackTime():
         if isinstance(result, dict) and result.get("error"):
             return result
 
+        # Vorgeladene Historie ist nach der Änderung veraltet
+        self._wochenstunden_historie_cache.pop(ziel_id, None)
+
         if ziel_id == self.aktueller_nutzer_id:
             self.aktueller_nutzer_vertragliche_wochenstunden = neue_wochenstunden_int
 
@@ -1601,7 +2195,7 @@ class ModellTrackTime():
             return {"error": "Ampelwerte müssen positiv sein"}
 
         def _db_op():
-            nutzer = session.get(mitarbeiter, ziel_id)
+            nutzer = self._get_nutzer(ziel_id)
             if not nutzer:
                 return {"error": "Nutzer nicht gefunden"}
 
@@ -1656,8 +2250,11 @@ class ModellTrackTime():
         try:
             # Sicherstellen, dass Werte nicht None sind
             gleitzeit = float(self.aktueller_nutzer_gleitzeit or 0)
-            gruen_schwelle = float(self.aktueller_nutzer_ampel_grün or 5)
-            rot_schwelle = float(self.aktueller_nutzer_ampel_rot or 10)
+            # Schwellen liegen bereits als float vor (siehe Property-Setter)
+            gruen_schwelle = self._ampel_gruen_f
+            rot_schwelle = self._ampel_rot_f
+            if gruen_schwelle is None or rot_schwelle is None:
+                raise ValueError("Ungültige Ampelschwelle")
             
             # Neue symmetrische Logik:
             # Grün: zwischen -gruen_schwelle und +gruen_schwelle
@@ -1706,43 +2303,74 @@ class ModellTrackTime():
             logger.error(f"DB-Fehler in get_messages: {e}", exc_info=True)
             self.benachrichtigungen = []
 
-    def get_urlaubstage_monat(self, jahr, monat):
+    def get_abwesenheiten_monat(self, jahr, monat):
         """
-        Holt alle Urlaubstage für einen bestimmten Monat und Mitarbeiter.
+        Holt Urlaubs- und Krankheitstage eines Monats mit einer Abfrage.
+        
+        Die Kalenderansicht benötigt beide Listen für denselben Monat; statt
+        zweier getrennter Abfragen werden (datum, typ)-Paare einmal geladen
+        und in Python aufgeteilt.
         
         Args:
             jahr (int): Jahr
             monat (int): Monat (1-12)
         
         Returns:
-            list: Liste von date-Objekten mit Urlaubstagen
+            tuple: (urlaubstage, krankheitstage) als Listen von date-Objekten
+            
+        Note:
+            Setzt self.urlaubstage_aktueller_monat und
+            self.krankheitstage_aktueller_monat.
         """
         if self.aktuelle_kalendereinträge_für_id is None:
-            return []
+            return [], []
         if not session:
-            return []
+            return [], []
 
         try:
             # Ersten und letzten Tag des Monats berechnen
-            import calendar as cal
             erster_tag = date(jahr, monat, 1)
-            letzter_tag = date(jahr, monat, cal.monthrange(jahr, monat)[1])
+            letzter_tag = date(jahr, monat, calendar.monthrange(jahr, monat)[1])
 
-            # Urlaubstage aus der DB holen
-            stmt = select(Abwesenheit.datum).where(
+            # Urlaubs- und Krankheitstage gemeinsam aus der DB holen
+            stmt = select(Abwesenheit.datum, Abwesenheit.typ).where(
                 (Abwesenheit.mitarbeiter_id == self.aktuelle_kalendereinträge_für_id) &
                 (Abwesenheit.datum >= erster_tag) &
                 (Abwesenheit.datum <= letzter_tag) &
-                (Abwesenheit.typ == "Urlaub")
+                (Abwesenheit.typ.in_(("Urlaub", "Krankheit")))
             )
-            urlaubstage = session.scalars(stmt).all()
-            self.urlaubstage_aktueller_monat = list(urlaubstage)
-            return list(urlaubstage)
+            urlaubstage = []
+            krankheitstage = []
+            for datum, typ in session.execute(stmt):
+                (urlaubstage if typ == "Urlaub" else krankheitstage).append(datum)
+
+            # Listen einmal aufbauen; Attribut und Rückgabe teilen sich dieselbe Referenz
+            self.urlaubstage_aktueller_monat = urlaubstage
+            self.krankheitstage_aktueller_monat = krankheitstage
+            return urlaubstage, krankheitstage
         
         except SQLAlchemyError as e:
-            logger.error(f"DB-Fehler in get_urlaubstage_monat: {e}", exc_info=True)
+            logger.error(f"DB-Fehler in get_abwesenheiten_monat: {e}", exc_info=True)
             self.urlaubstage_aktueller_monat = []
-            return []
+            self.krankheitstage_aktueller_monat = []
+            return [], []
+
+    def get_urlaubstage_monat(self, jahr, monat):
+        """
+        Holt alle Urlaubstage für einen bestimmten Monat und Mitarbeiter.
+        
+        Args:
+            jahr (int): Jahr
+            monat (int): Monat (1-12)
+        
+        Returns:
+            list: Liste von date-Objekten mit Urlaubstagen
+            
+        Note:
+            Wrapper um get_abwesenheiten_monat; werden beide Listen benötigt,
+            diese Methode direkt verwenden.
+        """
+        return self.get_abwesenheiten_monat(jahr, monat)[0]
 
     def hat_urlaub_am_datum(self, datum_pruefen: date) -> bool:
         """
@@ -1760,12 +2388,13 @@ class ModellTrackTime():
         if self.aktueller_nutzer_id is None or not session:
             return False
         try:
-            stmt = select(Abwesenheit).where(
+            # Existenzprüfung: SELECT 1 ... LIMIT 1 statt ganze Zeile zu laden
+            stmt = select(literal(1)).where(
                 (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Abwesenheit.datum == datum_pruefen) &
                 (Abwesenheit.typ == "Urlaub")
-            )
-            return session.execute(stmt).scalar_one_or_none() is not None
+            ).limit(1)
+            return session.execute(stmt).first() is not None
         except SQLAlchemyError as e:
             logger.error(f"DB-Fehler in hat_urlaub_am_datum: {e}", exc_info=True)
             return False
@@ -1787,16 +2416,14 @@ class ModellTrackTime():
             return 0
 
         def _db_op():
-            stmt = select(Abwesenheit).where(
+            # Ein einzelnes DELETE statt SELECT + Löschen pro Zeile. Abwesenheiten werden
+            # nie per session.get geladen, die Identity-Map muss daher nicht abgeglichen werden.
+            stmt = delete(Abwesenheit).where(
                 (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Abwesenheit.datum == datum_loeschen) &
                 (Abwesenheit.typ == "Urlaub")
-            )
-            eintraege = session.execute(stmt).scalars().all()
-            count = 0
-            for e in eintraege:
-                session.delete(e)
-                count += 1
+            ).execution_options(synchronize_session=False)
+            count = session.execute(stmt).rowcount
             if count:
                 logger.info(f"{count} Urlaubseintrag/Einträge am {datum_loeschen} gelöscht")
             return count
@@ -1824,15 +2451,14 @@ class ModellTrackTime():
             wochenanfang = datum_pruefen - timedelta(days=wochentag)
             wochenende = wochenanfang + timedelta(days=6)
             
-            # Alle unterschiedlichen Tage mit Stempeln in dieser Woche zählen
-            stmt = select(Zeiteintrag.datum).distinct().where(
+            # Alle unterschiedlichen Tage mit Stempeln in dieser Woche in der DB zählen
+            stmt = select(func.count(func.distinct(Zeiteintrag.datum))).where(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Zeiteintrag.datum >= wochenanfang) &
                 (Zeiteintrag.datum <= wochenende)
             )
             
-            tage_mit_stempeln = session.execute(stmt).scalars().all()
-            anzahl_arbeitstage = len(tage_mit_stempeln)
+            anzahl_arbeitstage = session.execute(stmt).scalar_one()
             
             logger.debug(f"Woche {wochenanfang} bis {wochenende}: {anzahl_arbeitstage} Tage mit Stempeln gefunden")
             
@@ -1919,33 +2545,12 @@ class ModellTrackTime():
         
         Returns:
             list: Liste von date-Objekten mit Krankheitstagen
+            
+        Note:
+            Wrapper um get_abwesenheiten_monat; werden beide Listen benötigt,
+            diese Methode direkt verwenden.
         """
-        if self.aktuelle_kalendereinträge_für_id is None:
-            return []
-        if not session:
-            return []
-
-        try:
-            # Ersten und letzten Tag des Monats berechnen
-            import calendar as cal
-            erster_tag = date(jahr, monat, 1)
-            letzter_tag = date(jahr, monat, cal.monthrange(jahr, monat)[1])
-
-            # Krankheitstage aus der DB holen
-            stmt = select(Abwesenheit.datum).where(
-                (Abwesenheit.mitarbeiter_id == self.aktuelle_kalendereinträge_für_id) &
-                (Abwesenheit.datum >= erster_tag) &
-                (Abwesenheit.datum <= letzter_tag) &
-                (Abwesenheit.typ == "Krankheit")
-            )
-            krankheitstage = session.scalars(stmt).all()
-            self.krankheitstage_aktueller_monat = list(krankheitstage)
-            return list(krankheitstage)
-        
-        except SQLAlchemyError as e:
-            logger.error(f"DB-Fehler in get_krankheitstage_monat: {e}", exc_info=True)
-            self.krankheitstage_aktueller_monat = []
-            return []
+        return self.get_abwesenheiten_monat(jahr, monat)[1]
 
     def update_passwort(self):
         """
@@ -2008,10 +2613,12 @@ class ModellTrackTime():
         """
         # Gekapselte DB-Operation
         def _db_op():
+            # Einmal abfragen, damit Datum und Uhrzeit auch um Mitternacht zusammenpassen
+            zeitpunkt = datetime.now()
             stempel = Zeiteintrag(
                 mitarbeiter_id = self.aktueller_nutzer_id,
-                zeit = datetime.now().time(),
-                datum = date.today()
+                zeit = zeitpunkt.time(),
+                datum = zeitpunkt.date()
             )
             session.add(stempel)
             return True # Erfolg
@@ -2029,12 +2636,15 @@ class ModellTrackTime():
             return
         
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 return
             
-            is_minor = nutzer.is_minor_on_date(date.today())
-            heute = date.today()
+            # Aktueller Zeitpunkt einmal für die gesamte Berechnung
+            zeitpunkt = datetime.now()
+            heute = zeitpunkt.date()
+            jetzt = zeitpunkt.time()
+            is_minor = nutzer.is_minor_on_date(heute)
             
             # 1. Arbeitsfenster-Warnung (Code 9) - 30 Min vor Ende
             if is_minor:
@@ -2042,20 +2652,22 @@ class ModellTrackTime():
             else:
                 warnung_uhrzeit = time(21, 30)  # 30 Min vor 21:00
             
+            # PopUps werden gesammelt und am Ende mit einem Commit angelegt
+            popup_ops = []
+
             # Nur erstellen wenn Warnung noch nicht vorbei ist
-            jetzt = datetime.now().time()
             if warnung_uhrzeit > jetzt:
-                self._add_benachrichtigung_safe(
+                popup_ops.append(self._benachrichtigung_op(
                     code=9, 
                     datum=heute, 
                     ist_popup=True, 
                     popup_uhrzeit=warnung_uhrzeit
-                )
+                ))
                 logger.info(f"Arbeitsfenster-PopUp geplant für {warnung_uhrzeit}")
             
             # 2. Max. Arbeitszeit-Warnung (Code 10)
             # Berechne bereits gearbeitete Zeit heute
-            today_stamps = self.get_stamps_for_today()
+            today_stamps = self.get_stamps_for_date(heute)
             gearbeitete_zeit = timedelta()
             
             # Paarweise Berechnung (alle außer dem letzten Stempel, da dieser der aktuelle Einstempel ist)
@@ -2079,11 +2691,11 @@ class ModellTrackTime():
             
             # Maximale Arbeitszeit (30 Min vorher warnen)
             if is_minor:
-                max_arbeitszeit = timedelta(hours=9) #ohne Pausen, nur eingestempelte Zeit
+                max_arbeitszeit = _MAX_STEMPELZEIT_MINDERJAEHRIG #ohne Pausen, nur eingestempelte Zeit
             else:
-                max_arbeitszeit = timedelta(hours=10, minutes=45) #ohne Pausen, nur eingestempelte Zeit
+                max_arbeitszeit = _MAX_STEMPELZEIT_VOLLJAEHRIG #ohne Pausen, nur eingestempelte Zeit
             
-            warnung_arbeitszeit = max_arbeitszeit - timedelta(minutes=30)
+            warnung_arbeitszeit = max_arbeitszeit - _VORWARNZEIT
             verbleibende_arbeitszeit = warnung_arbeitszeit - gearbeitete_zeit
             
             logger.debug(f"erstelle_popup_warnungen: Max. Arbeitszeit: {max_arbeitszeit}, Warnung bei: {warnung_arbeitszeit}, Verbleibend: {verbleibende_arbeitszeit}")
@@ -2098,17 +2710,22 @@ class ModellTrackTime():
                 
                 # Nur wenn Warnung heute ist und noch nicht vorbei
                 if warnung_dt.date() == heute and warnung_dt.time() > jetzt:
-                    self._add_benachrichtigung_safe(
+                    popup_ops.append(self._benachrichtigung_op(
                         code=10,
                         datum=heute,
                         ist_popup=True,
                         popup_uhrzeit=warnung_dt.time()
-                    )
+                    ))
                     logger.info(f"Max. Arbeitszeit-PopUp geplant für {warnung_dt.time()}")
                 else:
                     logger.debug(f"erstelle_popup_warnungen: Warnung nicht geplant - Datum heute: {warnung_dt.date() == heute}, Zeit in Zukunft: {warnung_dt.time() > jetzt}")
             else:
                 logger.debug(f"erstelle_popup_warnungen: Keine Warnung nötig - verbleibende Zeit nicht positiv")
+
+            if popup_ops:
+                result = self._safe_db_batch(popup_ops, name="erstelle_popup_warnungen_beim_einstempeln")
+                if isinstance(result, dict) and "error" in result:
+                    logger.error(f"Konnte PopUp-Warnungen nicht speichern: {result.get('details')}")
             
         except Exception as e:
             logger.error(f"Fehler beim Erstellen der PopUp-Warnungen: {e}", exc_info=True)
@@ -2116,7 +2733,11 @@ class ModellTrackTime():
     def get_pending_popups_for_today(self):
         """
         Holt alle noch ausstehenden PopUp-Benachrichtigungen für heute.
-        Gibt Liste von (code, uhrzeit) Tupeln zurück.
+        Gibt Liste von (code, uhrzeit, id) Tupeln zurück.
+        
+        PopUps entstehen und verschwinden nur über dieses Modell. Solange
+        keine PopUp-Benachrichtigung angelegt oder gelöscht wurde, wird das
+        letzte Ergebnis wiederverwendet und nur nach der Uhrzeit gefiltert.
         """
         if not self.aktueller_nutzer_id:
             return []
@@ -2124,21 +2745,30 @@ class ModellTrackTime():
             return []
         
         try:
-            heute = date.today()
-            jetzt = datetime.now().time()
-            
-            stmt = select(Benachrichtigungen).where(
+            zeitpunkt = datetime.now()
+            heute = zeitpunkt.date()
+            jetzt = zeitpunkt.time()
+
+            # Ausstehende PopUps können mit fortschreitender Zeit nur weniger werden
+            cache_schluessel = (self.aktueller_nutzer_id, heute)
+            if self._popup_cache is not None and self._popup_cache[0] == cache_schluessel:
+                return [p for p in self._popup_cache[1] if p[1] > jetzt]
+            
+            # Nur zukünftige PopUps, bereits in SQL gefiltert (NULL-Uhrzeiten fallen durch den Vergleich heraus)
+            stmt = select(
+                Benachrichtigungen.benachrichtigungs_code,
+                Benachrichtigungen.popup_uhrzeit,
+                Benachrichtigungen.id,
+            ).where(
                 (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Benachrichtigungen.datum == heute) &
                 (Benachrichtigungen.ist_popup == True) &
-                (Benachrichtigungen.popup_uhrzeit != None)
-            )
-            popups = session.scalars(stmt).all()
-            
-            # Nur zukünftige PopUps zurückgeben
-            pending = [(p.benachrichtigungs_code, p.popup_uhrzeit, p.id) for p in popups if p.popup_uhrzeit > jetzt]
+                (Benachrichtigungen.popup_uhrzeit > jetzt)
+            ).order_by(Benachrichtigungen.popup_uhrzeit)
+            pending = [tuple(row) for row in session.execute(stmt)]
             logger.debug(f"Gefundene ausstehende PopUps: {len(pending)}")
-            return pending
+            self._popup_cache = (cache_schluessel, pending)
+            return list(pending)
             
         except SQLAlchemyError as e:
             logger.error(f"Fehler beim Laden der PopUps: {e}", exc_info=True)
@@ -2161,6 +2791,7 @@ class ModellTrackTime():
             benachrichtigung = session.get(Benachrichtigungen, benachrichtigung_id)
             if benachrichtigung and benachrichtigung.ist_popup:
                 session.delete(benachrichtigung)
+                self._popup_cache = None
                 return True
             return False
         
@@ -2178,16 +2809,17 @@ class ModellTrackTime():
         """
         def _db_op():
             heute = date.today()
-            stmt = select(Benachrichtigungen).where(
+            # Ein einzelnes DELETE statt SELECT + Löschen pro Zeile.
+            # "fetch": gelöschte IDs kommen per RETURNING aus derselben Anweisung zurück,
+            # sodass beim Einstempeln angelegte PopUp-Objekte aus der Session entfernt
+            # werden (delete_popup_benachrichtigung lädt per session.get)
+            stmt = delete(Benachrichtigungen).where(
                 (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Benachrichtigungen.datum == heute) &
                 (Benachrichtigungen.ist_popup == True)
-            )
-            popups = session.scalars(stmt).all()
-            count = len(popups)
-            
-            for popup in popups:
-                session.delete(popup)
+            ).execution_options(synchronize_session="fetch")
+            count = session.execute(stmt).rowcount
+            self._popup_cache = None
             
             logger.info(f"{count} PopUp-Benachrichtigungen für heute gelöscht")
             return count
@@ -2220,6 +2852,31 @@ class ModellTrackTime():
             logger.error(f"DB-Fehler in get_stamps_for_today: {e}", exc_info=True)
             return []
 
+    def get_stempel_status_heute(self):
+        """
+        Liefert Anzahl und Uhrzeit des letzten heutigen Stempels des aktuellen Nutzers.
+        
+        Für die Frage "eingestempelt?" (ungerade Anzahl) und die Einstempelzeit
+        reichen COUNT und MAX; die Stempel selbst müssen nicht geladen werden.
+        
+        Returns:
+            tuple: (anzahl, letzte_zeit) - letzte_zeit ist None ohne Stempel.
+            (0, None) bei Fehler oder wenn kein Nutzer eingeloggt ist.
+        """
+        if not self.aktueller_nutzer_id: return 0, None
+        if not session: return 0, None
+
+        try:
+            stmt = select(func.count(), func.max(Zeiteintrag.zeit)).where(
+                (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
+                (Zeiteintrag.datum == date.today())
+            )
+            anzahl, letzte_zeit = session.execute(stmt).one()
+            return anzahl, letzte_zeit
+        except SQLAlchemyError as e:
+            logger.error(f"DB-Fehler in get_stempel_status_heute: {e}", exc_info=True)
+            return 0, None
+
     def get_stamps_for_date(self, target_date):
         """
         Holt alle Zeitstempel für ein bestimmtes Datum des aktuellen Nutzers.
@@ -2296,7 +2953,8 @@ class ModellTrackTime():
         try:
             # Input-Validierung (Zeit und Datum)
             stempel_zeit = datetime.strptime(self.manueller_stempel_uhrzeit, "%H:%M").time()
-            stempel_datum = datetime.strptime(self.nachtragen_datum, "%d/%m/%Y").date()
+            stempel_datum = _fast_parse_datum(self.nachtragen_datum, "/") or \
+                datetime.strptime(self.nachtragen_datum, "%d/%m/%Y").date()
         except (ValueError, TypeError) as e:
             logger.warning(f"Ungültiges Format für manuellen Stempel: {self.manueller_stempel_uhrzeit} / {self.nachtragen_datum} - {e}")
             self.feedback_manueller_stempel = "Ungültiges Datums- oder Zeitformat."
@@ -2308,40 +2966,37 @@ class ModellTrackTime():
             self.feedback_manueller_stempel = "Stempel in der Zukunft ist nicht erlaubt."
             return
 
-        # Prüfen: Abwesenheit (Urlaub/Krankheit) an diesem Datum?
+        # Prüfen: Abwesenheit (Urlaub/Krankheit) an diesem Datum oder identischer Stempel?
+        # Beide Bedingungen als EXISTS-Spalten in einer Abfrage (ein Roundtrip)
         try:
-            urlaubs_stmt = select(Abwesenheit).where(
-                (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
-                (Abwesenheit.datum == stempel_datum)
+            pruef_stmt = select(
+                exists().where(
+                    (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
+                    (Abwesenheit.datum == stempel_datum)
+                ),
+                exists().where(
+                    (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
+                    (Zeiteintrag.datum == stempel_datum) &
+                    (Zeiteintrag.zeit == stempel_zeit)
+                ),
             )
-            exist_urlaub = session.execute(urlaubs_stmt).scalar_one_or_none()
-            if exist_urlaub:
-                self.feedback_manueller_stempel = "An diesem Tag ist bereits eine Abwesenheit eingetragen."
-                return
+            exist_urlaub, exists_dup = session.execute(pruef_stmt).one()
         except SQLAlchemyError as e:
-            logger.error(f"DB-Fehler beim Prüfen von Abwesenheiten: {e}", exc_info=True)
-            self.feedback_manueller_stempel = "Fehler beim Prüfen von Abwesenheiten."
+            logger.error(f"DB-Fehler beim Prüfen von Abwesenheiten und Duplikaten: {e}", exc_info=True)
+            self.feedback_manueller_stempel = "Fehler beim Prüfen von Abwesenheiten und vorhandenen Stempeln."
             return
 
-        # Prüfen: Identischer Stempel existiert bereits?
-        try:
-            dup_stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                (Zeiteintrag.datum == stempel_datum) &
-                (Zeiteintrag.zeit == stempel_zeit)
-            )
-            exists_dup = session.execute(dup_stmt).scalar_one_or_none()
-            if exists_dup:
-                self.feedback_manueller_stempel = "Ein identischer Stempel existiert bereits."
-                return
-        except SQLAlchemyError as e:
-            logger.error(f"DB-Fehler beim Prüfen auf Duplikate: {e}", exc_info=True)
-            self.feedback_manueller_stempel = "Fehler beim Prüfen vorhandener Stempel."
+        if exist_urlaub:
+            self.feedback_manueller_stempel = "An diesem Tag ist bereits eine Abwesenheit eingetragen."
+            return
+        if exists_dup:
+            self.feedback_manueller_stempel = "Ein identischer Stempel existiert bereits."
             return
 
         # Einträge für den Tag zurücksetzen (unvalidieren und Gleitzeit rückgängig machen)
 
-        self.set_entries_unvalidated_and_revert_gleitzeit(self.nachtragen_datum)
+        # Ohne eigenen Commit: Rücksetzung und neuer Stempel werden gemeinsam gespeichert
+        self.set_entries_unvalidated_and_revert_gleitzeit(stempel_datum, commit=False)
         logger.info(f"Einträge für {self.nachtragen_datum} wurden zurückgesetzt vor manuellem Stempel.")
 
 
@@ -2358,6 +3013,7 @@ class ModellTrackTime():
         result = self._safe_db_operation(_db_op)
 
         if isinstance(result, dict) and "error" in result:
+            self._gleitzeit_nach_rollback_synchronisieren()
             self.feedback_manueller_stempel = "Fehler beim Speichern des Stempels."
         else:
             self.feedback_manueller_stempel = f"Stempel am {self.nachtragen_datum} um {self.manueller_stempel_uhrzeit} erfolgreich hinzugefügt"
@@ -2377,19 +3033,10 @@ class ModellTrackTime():
             # (Berücksichtigt die unvalidierten Einträge und prüft auf Code-1-Benachrichtigungen)
             self.berechne_gleitzeit()
             
-            # Schritt 4: Arbeitszeitschutzgesetz-Prüfungen (Codes 3-9, 12)
+            # Schritt 4: Arbeitszeitschutzgesetz-Prüfungen (Codes 3-9, 12) mit anschließender
+            # Korrektur bestehender Benachrichtigungen, Arbeitszeit je Tag nur einmal geladen
             logger.debug("manueller_stempel_hinzufügen: Führe Arbeitszeitschutzgesetz-Prüfungen durch")
-            self.checke_ruhezeiten()                          # Code 3: Ruhezeit-Verstöße
-            self.checke_durchschnittliche_arbeitszeit()       # Code 4: Durchschnitt > 8h/Tag
-            self.checke_max_arbeitszeit()                     # Code 5: Max. Arbeitszeit überschritten
-            self.checke_sonn_feiertage()                      # Code 6: Sonn-/Feiertag
-            self.checke_wochenstunden_minderjaehrige()        # Code 7: Wochenstunden > 40h (Minderjährige)
-            self.checke_arbeitstage_pro_woche_minderjaehrige() # Code 8: >5 Arbeitstage/Woche (Minderjährige)
-            self.checke_arbeitszeitfenster_minderjaehrige()   # Code 9: Arbeitszeitfenster 6-20 Uhr (Minderjährige)
-            self.checke_pausenzeiten()                        # Code 12: Pausenzeiten
-            
-            # Schritt 5: Prüfe und korrigiere bestehende Benachrichtigungen
-            geloeschte = self.pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen()
+            geloeschte = self.checke_arbeitszeitschutz()
             if geloeschte > 0:
                 logger.info(f"manueller_stempel_hinzufügen: {geloeschte} korrigierte Benachrichtigungen gelöscht")
             
@@ -2397,18 +3044,35 @@ class ModellTrackTime():
             
             # Wenn der nachgetragene Stempel für heute ist und der Nutzer eingestempelt ist, PopUps erstellen
             if stempel_datum == date.today():
-                today_stamps = self.get_stamps_for_today()
-                is_clocked_in = len(today_stamps) % 2 != 0
+                anzahl_stempel, _ = self.get_stempel_status_heute()
+                is_clocked_in = anzahl_stempel % 2 != 0
                 
                 if is_clocked_in:
                     logger.info("Nachgetragener Stempel für heute - erstelle PopUp-Warnungen")
                     self.erstelle_popup_warnungen_beim_einstempeln()
 
 
-    def set_entries_unvalidated_and_revert_gleitzeit(self, datum_str):
+    def _gleitzeit_nach_rollback_synchronisieren(self):
+        """
+        Übernimmt nach einem Rollback die gespeicherte Gleitzeit in das Modell.
+
+        set_entries_unvalidated_and_revert_gleitzeit(commit=False) ändert
+        aktueller_nutzer_gleitzeit bereits vor dem Commit des Aufrufers; schlägt
+        dieser fehl, wird der Wert wieder aus der Datenbank gelesen.
+        """
+        try:
+            nutzer = self.get_aktueller_nutzer()
+            if nutzer is not None:
+                self.aktueller_nutzer_gleitzeit = nutzer.gleitzeit
+        except SQLAlchemyError as e:
+            logger.error(f"Gleitzeit konnte nach Rollback nicht neu geladen werden: {e}", exc_info=True)
+
+    def set_entries_unvalidated_and_revert_gleitzeit(self, datum, commit=True):
         """
         Setzt alle Zeiteinträge für ein bestimmtes Datum auf unvalidiert und macht die Gleitzeitberechnung für diesen Tag rückgängig.
-        datum_str: Datum als String im Format '%d/%m/%Y'
+        datum: Datum als date-Objekt (interne Aufrufer); Strings im Format '%d/%m/%Y' werden weiterhin geparst
+        commit: Bei False bleiben die Änderungen offen und werden mit dem Commit des Aufrufers
+            gespeichert (z.B. zusammen mit dem bearbeiteten, gelöschten oder nachgetragenen Stempel)
         """
         if self.aktueller_nutzer_id is None:
             return
@@ -2416,41 +3080,46 @@ class ModellTrackTime():
             logger.error("set_entries_unvalidated_and_revert_gleitzeit: Keine DB-Session verfügbar")
             return
             
-        logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: starte für Nutzer {self.aktueller_nutzer_id} und Datum-String '{datum_str}'")
-        try:
-            datum = datetime.strptime(datum_str, "%d/%m/%Y").date()
-        except ValueError:
-            logger.warning(f"set_entries_unvalidated_and_revert_gleitzeit: Ungültiges Datumsformat '{datum_str}', erwartet '%d/%m/%Y'")
-            return
+        logger.debug("set_entries_unvalidated_and_revert_gleitzeit: starte für Nutzer %s und Datum '%s'", self.aktueller_nutzer_id, datum)
+        if not isinstance(datum, date):
+            try:
+                datum = _fast_parse_datum(datum, "/") or datetime.strptime(datum, "%d/%m/%Y").date()
+            except (ValueError, TypeError):
+                logger.warning("set_entries_unvalidated_and_revert_gleitzeit: Ungültiges Datumsformat '%s', erwartet '%%d/%%m/%%Y'", datum)
+                return
 
         # Zeiteinträge für das Datum holen (zeitlich sortiert)
-        stmt = select(Zeiteintrag).where(
+        # Nur die benötigten Spalten als Tupel, ohne ORM-Objekte in der Identity-Map
+        stmt = select(Zeiteintrag.zeit, Zeiteintrag.validiert).where(
             (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
             (Zeiteintrag.datum == datum)
         ).order_by(Zeiteintrag.zeit)
-        eintraege = session.scalars(stmt).all()
-        logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: {len(eintraege)} Zeiteinträge für {datum} gefunden")
+        eintraege = session.execute(stmt).all()
+        logger.debug("set_entries_unvalidated_and_revert_gleitzeit: %s Zeiteinträge für %s gefunden", len(eintraege), datum)
 
         # Nur dann Gleitzeit rückgängig machen, wenn dieser Tag bereits in die Gleitzeit eingerechnet wurde
-        validated_before = [e for e in eintraege if getattr(e, 'validiert', False)]
-        logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: {len(validated_before)} zuvor validierte Einträge für {datum}")
+        validated_before = [zeit for zeit, validiert in eintraege if validiert]
+        logger.debug("set_entries_unvalidated_and_revert_gleitzeit: %s zuvor validierte Einträge für %s", len(validated_before), datum)
 
         # Prüfen ob für diesen Tag eine Benachrichtigung (Code 1 - fehlender Stempel) existiert
         # Wenn ja, wurde bereits Gleitzeit abgezogen und darf nicht nochmal abgezogen werden
-        benachrichtigung_stmt = select(Benachrichtigungen).where(
+        fehlstempel_bedingung = (
             (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
             (Benachrichtigungen.datum == datum) &
             (Benachrichtigungen.benachrichtigungs_code == 1)
         )
-        hat_fehlstempel_benachrichtigung = session.execute(benachrichtigung_stmt).scalar_one_or_none()
+        # EXISTS liefert direkt einen Wahrheitswert, ohne die Zeile zu laden
+        hat_fehlstempel_benachrichtigung = session.execute(
+            select(exists().where(fehlstempel_bedingung))
+        ).scalar()
         
         if hat_fehlstempel_benachrichtigung:
-            logger.info(f"set_entries_unvalidated_and_revert_gleitzeit: Fehlstempel-Benachrichtigung für {datum} gefunden.")
+            logger.info("set_entries_unvalidated_and_revert_gleitzeit: Fehlstempel-Benachrichtigung für %s gefunden.", datum)
         
         # Gleitzeit für diesen Tag berechnen und abziehen
-        nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+        nutzer = self.get_aktueller_nutzer()
         if not nutzer:
-            logger.error(f"set_entries_unvalidated_and_revert_gleitzeit: Nutzer {self.aktueller_nutzer_id} nicht gefunden")
+            logger.error("set_entries_unvalidated_and_revert_gleitzeit: Nutzer %s nicht gefunden", self.aktueller_nutzer_id)
             return
 
         # Letzter Login auf das zu bearbeitende Datum setzen, ABER NUR wenn es vor dem aktuellen letzter_login liegt
@@ -2458,34 +3127,21 @@ class ModellTrackTime():
         if datum < nutzer.letzter_login:
             alter_login = nutzer.letzter_login
             nutzer.letzter_login = datum
-            logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: letzter_login von {alter_login} auf {datum} gesetzt (Datum liegt vor aktuellem Login)")
+            logger.debug("set_entries_unvalidated_and_revert_gleitzeit: letzter_login von %s auf %s gesetzt (Datum liegt vor aktuellem Login)", alter_login, datum)
         else:
-            logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: letzter_login ({nutzer.letzter_login}) bleibt unverändert (Datum {datum} liegt nicht davor)")
+            logger.debug("set_entries_unvalidated_and_revert_gleitzeit: letzter_login (%s) bleibt unverändert (Datum %s liegt nicht davor)", nutzer.letzter_login, datum)
 
         # Arbeitszeit für diesen Tag berechnen (nur aus zuvor validierten Paaren)
+        # Minderjährigkeit einmal bestimmen und Paare per Ganzzahl-Arithmetik auswerten
+        # statt pro Paar ein CalculateTime-Objekt zu erzeugen. Die Einträge sind per SQL
+        # nach Uhrzeit sortiert, daher gibt es kein Paar mit Ende vor Start (kein None).
         arbeitstag = timedelta()
         if validated_before:
-            i = 0
-            while i < len(validated_before) - 1:
-                calc = CalculateTime(validated_before[i], validated_before[i+1], nutzer)
-                if calc:
-                    # Debug: Arbeitszeit vor Pausen
-                    zeit_vor_pausen = calc.gearbeitete_zeit
-                    logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Paar {i//2+1}: {validated_before[i].zeit} - {validated_before[i+1].zeit}, Brutto: {zeit_vor_pausen}")
-                    
-                    calc.gesetzliche_pausen_hinzufügen()
-                    zeit_nach_pausen = calc.gearbeitete_zeit
-                    logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Nach Pausen: {zeit_nach_pausen}, Pausenabzug: {zeit_vor_pausen - zeit_nach_pausen}")
-                    
-                    calc.arbeitsfenster_beachten()
-                    zeit_nach_fenster = calc.gearbeitete_zeit
-                    logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Nach Arbeitsfenster: {zeit_nach_fenster}, Fensterabzug: {zeit_nach_pausen - zeit_nach_fenster}")
-                    
-                    arbeitstag += calc.gearbeitete_zeit
-                    i += 2
-                else:
-                    i += 1
-        logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: gearbeitete (zuvor angerechnete) Zeit am {datum}: {arbeitstag}")
+            arbeitstag = _berechne_tagesarbeitszeit(
+                validated_before,
+                nutzer.is_minor_on_date(datum),
+            )
+        logger.debug("set_entries_unvalidated_and_revert_gleitzeit: gearbeitete (zuvor angerechnete) Zeit am %s: %s", datum, arbeitstag)
 
         wochenstunden = hole_wochenstunden_am_datum(
             self.aktueller_nutzer_id,
@@ -2506,17 +3162,17 @@ class ModellTrackTime():
             if war_sechster_tag:
                 gleitzeit_diff = arbeitstag  # Nur Arbeitszeit, KEINE Sollzeit-Verrechnung
                 gleitzeit_stunden = float(gleitzeit_diff.total_seconds() / 3600)
-                logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: 6.+ Tag erkannt - keine Sollzeit-Verrechnung, nur Arbeitszeit: {arbeitstag} ({gleitzeit_stunden:.2f}h)")
+                logger.debug("set_entries_unvalidated_and_revert_gleitzeit: 6.+ Tag erkannt - keine Sollzeit-Verrechnung, nur Arbeitszeit: %s (%.2fh)", arbeitstag, gleitzeit_stunden)
             else:
                 # Regulärer Tag: Differenz aus (Arbeitszeit - Sollzeit) zurückrechnen
                 gleitzeit_diff = arbeitstag - taegliche_arbeitszeit
                 gleitzeit_stunden = float(gleitzeit_diff.total_seconds() / 3600)
-                logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Regulärer Tag - tägliche Sollzeit: {taegliche_arbeitszeit}, Differenz: {gleitzeit_diff} ({gleitzeit_stunden:.2f}h)")
+                logger.debug("set_entries_unvalidated_and_revert_gleitzeit: Regulärer Tag - tägliche Sollzeit: %s, Differenz: %s (%.2fh)", taegliche_arbeitszeit, gleitzeit_diff, gleitzeit_stunden)
 
             alte_gleitzeit = float(self.aktueller_nutzer_gleitzeit or 0)
             self.aktueller_nutzer_gleitzeit = alte_gleitzeit - gleitzeit_stunden
             nutzer.gleitzeit = self.aktueller_nutzer_gleitzeit
-            logger.info(f"set_entries_unvalidated_and_revert_gleitzeit: Gleitzeit aus validierten Einträgen zurückgesetzt von {alte_gleitzeit:.2f}h auf {self.aktueller_nutzer_gleitzeit:.2f}h für {datum}")
+            logger.info("set_entries_unvalidated_and_revert_gleitzeit: Gleitzeit aus validierten Einträgen zurückgesetzt von %.2fh auf %.2fh für %s", alte_gleitzeit, self.aktueller_nutzer_gleitzeit, datum)
         
         # Fall 2: Fehlstempel-Benachrichtigung existiert (egal ob validierte Einträge vorhanden)
         # -> Die tägliche Sollzeit wurde bereits abgezogen, jetzt wieder hinzufügen
@@ -2525,26 +3181,26 @@ class ModellTrackTime():
             # Prüfen ob es ein 6.+ Arbeitstag war (sollte bei Code 1 nicht passieren, aber sicherheitshalber prüfen)
             if war_sechster_tag:
                 # An einem 6.+ Tag wurde nie eine Sollzeit abgezogen, also auch nichts zurückrechnen
-                logger.info(f"set_entries_unvalidated_and_revert_gleitzeit: 6.+ Tag mit Fehlstempel-Benachrichtigung - keine Sollzeit-Anpassung nötig für {datum}")
+                logger.info("set_entries_unvalidated_and_revert_gleitzeit: 6.+ Tag mit Fehlstempel-Benachrichtigung - keine Sollzeit-Anpassung nötig für %s", datum)
             else:
                 # Regulärer Tag: Die Sollzeit wurde abgezogen, jetzt wieder hinzufügen
                 gleitzeit_stunden = float(taegliche_arbeitszeit.total_seconds() / 3600)
                 alte_gleitzeit = float(self.aktueller_nutzer_gleitzeit or 0)
                 self.aktueller_nutzer_gleitzeit = alte_gleitzeit + gleitzeit_stunden  # HINZUFÜGEN!
                 nutzer.gleitzeit = self.aktueller_nutzer_gleitzeit
-                logger.info(f"set_entries_unvalidated_and_revert_gleitzeit: Fehlstempel-Abzug rückgängig gemacht: {alte_gleitzeit:.2f}h + {gleitzeit_stunden:.2f}h = {self.aktueller_nutzer_gleitzeit:.2f}h für {datum}")
+                logger.info("set_entries_unvalidated_and_revert_gleitzeit: Fehlstempel-Abzug rückgängig gemacht: %.2fh + %.2fh = %.2fh für %s", alte_gleitzeit, gleitzeit_stunden, self.aktueller_nutzer_gleitzeit, datum)
             
             # Benachrichtigung löschen, da jetzt Stempel vorhanden (unabhängig von 6.+ Tag Status)
             try:
-                session.delete(hat_fehlstempel_benachrichtigung)
-                logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Fehlstempel-Benachrichtigung (Code 1) für {datum} gelöscht")
+                session.execute(delete(Benachrichtigungen).where(fehlstempel_bedingung))
+                logger.debug("set_entries_unvalidated_and_revert_gleitzeit: Fehlstempel-Benachrichtigung (Code 1) für %s gelöscht", datum)
             except SQLAlchemyError as e:
-                logger.error(f"Fehler beim Löschen der Benachrichtigung: {e}")
+                logger.error("Fehler beim Löschen der Benachrichtigung: %s", e)
         
         # Fall 3: Keine validierten Einträge und keine Benachrichtigung
         # -> Nichts zu tun
         else:
-            logger.info(f"set_entries_unvalidated_and_revert_gleitzeit: Keine Gleitzeit-Anpassung nötig für {datum}")
+            logger.info("set_entries_unvalidated_and_revert_gleitzeit: Keine Gleitzeit-Anpassung nötig für %s", datum)
 
         # Benachrichtigung für ungerade Stempel (Code 2) löschen, falls vorhanden
         # Dies wird beim Nachtragen/Berichtigen relevant, da die Anzahl sich ändern kann
@@ -2557,15 +3213,21 @@ class ModellTrackTime():
             ungerade_stempel_benachrichtigung = session.execute(ungerade_stempel_stmt).scalar_one_or_none()
             if ungerade_stempel_benachrichtigung:
                 session.delete(ungerade_stempel_benachrichtigung)
-                logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Ungerade-Stempel-Benachrichtigung (Code 2) für {datum} gelöscht")
+                logger.debug("set_entries_unvalidated_and_revert_gleitzeit: Ungerade-Stempel-Benachrichtigung (Code 2) für %s gelöscht", datum)
         except SQLAlchemyError as e:
-            logger.error(f"Fehler beim Löschen der Ungerade-Stempel-Benachrichtigung: {e}")
+            logger.error("Fehler beim Löschen der Ungerade-Stempel-Benachrichtigung: %s", e)
 
         # Alle Einträge (auch unvalidierte) auf unvalidiert setzen und speichern
-        for e in eintraege:
-            e.validiert = False
-        session.commit()
-        logger.debug(f"set_entries_unvalidated_and_revert_gleitzeit: Alle Einträge für {datum} auf unvalidiert gesetzt und gespeichert")
+        # Ein UPDATE für den ganzen Tag statt Attributzuweisung pro Zeile
+        session.execute(
+            update(Zeiteintrag).where(
+                (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
+                (Zeiteintrag.datum == datum)
+            ).values(validiert=False)
+        )
+        if commit:
+            session.commit()
+        logger.debug("set_entries_unvalidated_and_revert_gleitzeit: Alle Einträge für %s auf unvalidiert gesetzt (Commit: %s)", datum, commit)
 
 
     def urlaub_eintragen(self):
@@ -2587,7 +3249,8 @@ class ModellTrackTime():
             return
             
         try:
-            abwesenheit_datum = datetime.strptime(self.nachtragen_datum, "%d/%m/%Y").date()
+            abwesenheit_datum = _fast_parse_datum(self.nachtragen_datum, "/") or \
+                datetime.strptime(self.nachtragen_datum, "%d/%m/%Y").date()
         except (ValueError, TypeError) as e:
             logger.warning(f"Ungültiges Format für Abwesenheit: {self.nachtragen_datum} - {e}")
             # Feedback sollte im Controller gesetzt werden
@@ -2595,37 +3258,38 @@ class ModellTrackTime():
 
         # Gekapselte DB-Operation
         def _db_op():
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 return {"error": "Aktueller Nutzer konnte nicht geladen werden."}
 
             # Prüfen, ob an dem Tag schon Stempel existieren
-            stamp_stmt = select(Zeiteintrag).where(
+            stamp_stmt = select(exists().where(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Zeiteintrag.datum == abwesenheit_datum)
-            )
+            ))
             # Prüfen, ob überhaupt ein Stempel vorhanden ist (mehrere pro Tag möglich)
-            if session.execute(stamp_stmt).scalars().first():
+            if session.execute(stamp_stmt).scalar():
                 return {"error": "An diesem Tag ist bereits ein Zeitstempel vorhanden. Bitte löschen Sie diesen zuerst."}
 
             # Prüfen, ob bereits eine Abwesenheit existiert
-            abwesend_stmt = select(Abwesenheit).where(
+            # Nur der Typ wird für die Meldung benötigt
+            abwesend_stmt = select(Abwesenheit.typ).where(
                 (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Abwesenheit.datum == abwesenheit_datum)
-            )
-            exist_abw = session.execute(abwesend_stmt).scalar_one_or_none()
-            if exist_abw:
-                return {"error": f"An diesem Tag ist bereits '{exist_abw.typ}' eingetragen."}
+            ).limit(1)
+            vorhandener_typ = session.execute(abwesend_stmt).scalar()
+            if vorhandener_typ is not None:
+                return {"error": f"An diesem Tag ist bereits '{vorhandener_typ}' eingetragen."}
 
             # Prüfen, ob für den Tag ein Fehlstempel-Abzug (Benachrichtigung Code 1) existiert
-            fehlstempel_stmt = select(Benachrichtigungen).where(
+            fehlstempel_stmt = select(Benachrichtigungen.id).where(
                 (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Benachrichtigungen.datum == abwesenheit_datum) &
                 (Benachrichtigungen.benachrichtigungs_code == 1)
-            )
-            fehlstempel_benachrichtigung = session.execute(fehlstempel_stmt).scalar_one_or_none()
+            ).limit(1)
+            fehlstempel_id = session.execute(fehlstempel_stmt).scalar()
 
-            if fehlstempel_benachrichtigung:
+            if fehlstempel_id is not None:
                 fallback_sollstunden = None
                 if not self.aktueller_nutzer_vertragliche_wochenstunden or self.aktueller_nutzer_vertragliche_wochenstunden <= 0:
                     fallback_sollstunden = 8
@@ -2654,7 +3318,7 @@ class ModellTrackTime():
                         neue_gleitzeit,
                     )
 
-                session.delete(fehlstempel_benachrichtigung)
+                session.execute(delete(Benachrichtigungen).where(Benachrichtigungen.id == fehlstempel_id))
                 logger.debug(
                     "urlaub_eintragen: Fehlstempel-Benachrichtigung für %s gelöscht",
                     abwesenheit_datum,
@@ -2713,35 +3377,26 @@ class ModellTrackTime():
             
             # Datum des Stempels für die Rücksetzung merken
             datum_des_stempels = eintrag.datum
-            datum_str = datum_des_stempels.strftime("%d/%m/%Y")
             
-            logger.info(f"stempel_bearbeiten_nach_id: Bearbeite Stempel {stempel_id} vom {datum_str}: {eintrag.zeit} -> {neue_uhrzeit}")
+            logger.info(f"stempel_bearbeiten_nach_id: Bearbeite Stempel {stempel_id} vom {datum_des_stempels}: {eintrag.zeit} -> {neue_uhrzeit}")
             
             # Schritt 1: Tag zurücksetzen (Gleitzeit rückgängig machen, alle Einträge unvalidiert setzen)
             # WICHTIG: Dies muss VOR der Änderung erfolgen, damit die ALTE Zeit für die Rückrechnung verwendet wird
-            self.set_entries_unvalidated_and_revert_gleitzeit(datum_str)
+            # Ohne eigenen Commit: Rücksetzung und neue Uhrzeit werden gemeinsam gespeichert
+            self.set_entries_unvalidated_and_revert_gleitzeit(datum_des_stempels, commit=False)
             
             # Schritt 2: Neue Uhrzeit setzen
             eintrag.zeit = neue_uhrzeit
             session.commit()
-            logger.debug(f"stempel_bearbeiten_nach_id: Neue Uhrzeit {neue_uhrzeit} für Stempel {stempel_id} gespeichert")
+            logger.debug("stempel_bearbeiten_nach_id: Neue Uhrzeit %s für Stempel %s gespeichert", neue_uhrzeit, stempel_id)
             
             # Schritt 3: Gleitzeit neu berechnen (verwendet bestehende berechne_gleitzeit Methode)
             self.berechne_gleitzeit()
             
-            # Schritt 4: Arbeitszeitschutzgesetz-Prüfungen (Codes 3-9, 12)
-            logger.debug(f"stempel_bearbeiten_nach_id: Führe Arbeitszeitschutzgesetz-Prüfungen durch für Datum {datum_str}")
-            self.checke_ruhezeiten()                          # Code 3: Ruhezeit-Verstöße
-            self.checke_durchschnittliche_arbeitszeit()       # Code 4: Durchschnitt > 8h/Tag
-            self.checke_max_arbeitszeit()                     # Code 5: Max. Arbeitszeit überschritten
-            self.checke_sonn_feiertage()                      # Code 6: Sonn-/Feiertag
-            self.checke_wochenstunden_minderjaehrige()        # Code 7: Wochenstunden > 40h (Minderjährige)
-            self.checke_arbeitstage_pro_woche_minderjaehrige() # Code 8: >5 Arbeitstage/Woche (Minderjährige)
-            self.checke_arbeitszeitfenster_minderjaehrige()   # Code 9: Arbeitszeitfenster 6-20 Uhr (Minderjährige)
-            self.checke_pausenzeiten()                        # Code 12: Pausenzeiten
-            
-            # Schritt 5: Prüfe und korrigiere bestehende Benachrichtigungen
-            geloeschte = self.pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen()
+            # Schritt 4: Arbeitszeitschutzgesetz-Prüfungen (Codes 3-9, 12) mit anschließender
+            # Korrektur bestehender Benachrichtigungen, Arbeitszeit je Tag nur einmal geladen
+            logger.debug("stempel_bearbeiten_nach_id: Führe Arbeitszeitschutzgesetz-Prüfungen durch für Datum %s", datum_des_stempels)
+            geloeschte = self.checke_arbeitszeitschutz()
             if geloeschte > 0:
                 logger.info(f"stempel_bearbeiten_nach_id: {geloeschte} korrigierte Benachrichtigungen gelöscht")
             
@@ -2751,10 +3406,12 @@ class ModellTrackTime():
         except SQLAlchemyError as e:
             logger.error(f"stempel_bearbeiten_nach_id: Datenbankfehler: {e}", exc_info=True)
             session.rollback()
+            self._gleitzeit_nach_rollback_synchronisieren()
             return False
         except Exception as e:
             logger.error(f"stempel_bearbeiten_nach_id: Unerwarteter Fehler: {e}", exc_info=True)
             session.rollback()
+            self._gleitzeit_nach_rollback_synchronisieren()
             return False
 
 
@@ -2790,14 +3447,14 @@ class ModellTrackTime():
             
             # Datum des Stempels für die Rücksetzung merken
             datum_des_stempels = eintrag.datum
-            datum_str = datum_des_stempels.strftime("%d/%m/%Y")
             
-            logger.info(f"stempel_löschen_nach_id: Lösche Stempel {stempel_id} vom {datum_str}, Uhrzeit: {eintrag.zeit}")
-            self.set_entries_unvalidated_and_revert_gleitzeit(datum_str)
+            logger.info(f"stempel_löschen_nach_id: Lösche Stempel {stempel_id} vom {datum_des_stempels}, Uhrzeit: {eintrag.zeit}")
+            # Ohne eigenen Commit: Rücksetzung und Löschen werden gemeinsam gespeichert
+            self.set_entries_unvalidated_and_revert_gleitzeit(datum_des_stempels, commit=False)
             # Schritt 1: Stempel löschen
             session.delete(eintrag)
             session.commit()
-            logger.debug(f"stempel_löschen_nach_id: Stempel {stempel_id} aus Datenbank gelöscht")
+            logger.debug("stempel_löschen_nach_id: Stempel %s aus Datenbank gelöscht", stempel_id)
             
             # Schritt 2: checke_arbeitstage ausführen (prüft ob Tag jetzt ohne Stempel ist und erstellt ggf. Code-1-Benachrichtigung)
             # WICHTIG: Dies muss VOR checke_stempel() und berechne_gleitzeit() aufgerufen werden
@@ -2811,19 +3468,10 @@ class ModellTrackTime():
             # Dies wird alle unvalidierten Einträge verarbeiten und prüft auf Benachrichtigungen (Code 1)
             self.berechne_gleitzeit()
             
-            # Schritt 5: Arbeitszeitschutzgesetz-Prüfungen (Codes 3-9, 12)
-            logger.debug(f"stempel_löschen_nach_id: Führe Arbeitszeitschutzgesetz-Prüfungen durch für Datum {datum_str}")
-            self.checke_ruhezeiten()                          # Code 3: Ruhezeit-Verstöße
-            self.checke_durchschnittliche_arbeitszeit()       # Code 4: Durchschnitt > 8h/Tag
-            self.checke_max_arbeitszeit()                     # Code 5: Max. Arbeitszeit überschritten
-            self.checke_sonn_feiertage()                      # Code 6: Sonn-/Feiertag
-            self.checke_wochenstunden_minderjaehrige()        # Code 7: Wochenstunden > 40h (Minderjährige)
-            self.checke_arbeitstage_pro_woche_minderjaehrige() # Code 8: >5 Arbeitstage/Woche (Minderjährige)
-            self.checke_arbeitszeitfenster_minderjaehrige()   # Code 9: Arbeitszeitfenster 6-20 Uhr (Minderjährige)
-            self.checke_pausenzeiten()                        # Code 12: Pausenzeiten
-            
-            # Schritt 6: Prüfe und korrigiere bestehende Benachrichtigungen
-            geloeschte = self.pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen()
+            # Schritt 5: Arbeitszeitschutzgesetz-Prüfungen (Codes 3-9, 12) mit anschließender
+            # Korrektur bestehender Benachrichtigungen, Arbeitszeit je Tag nur einmal geladen
+            logger.debug("stempel_löschen_nach_id: Führe Arbeitszeitschutzgesetz-Prüfungen durch für Datum %s", datum_des_stempels)
+            geloeschte = self.checke_arbeitszeitschutz()
             if geloeschte > 0:
                 logger.info(f"stempel_löschen_nach_id: {geloeschte} korrigierte Benachrichtigungen gelöscht")
             
@@ -2833,10 +3481,12 @@ class ModellTrackTime():
         except SQLAlchemyError as e:
             logger.error(f"stempel_löschen_nach_id: Datenbankfehler: {e}", exc_info=True)
             session.rollback()
+            self._gleitzeit_nach_rollback_synchronisieren()
             return False
         except Exception as e:
             logger.error(f"stempel_löschen_nach_id: Unerwarteter Fehler: {e}", exc_info=True)
             session.rollback()
+            self._gleitzeit_nach_rollback_synchronisieren()
             return False
 
 
@@ -2857,19 +3507,45 @@ class ModellTrackTime():
             Verwendet _safe_db_operation für sichere Transaktion.
             Doppelte Benachrichtigungen werden vermieden (Unique Constraint).
         """
+        result = self._safe_db_operation(
+            self._benachrichtigung_op(code, datum, ist_popup, popup_uhrzeit)
+        )
+        if isinstance(result, dict) and "error" in result:
+            logger.error(f"Konnte Benachrichtigung (Code {code}) nicht hinzufügen: {result.get('details')}")
+
+    def _benachrichtigung_op(self, code, datum, ist_popup=False, popup_uhrzeit=None):
+        """
+        Erzeugt die DB-Operation zum Anlegen einer Benachrichtigung (ohne Commit).
+        
+        Wird von _add_benachrichtigung_safe verwendet und kann mit weiteren
+        Operationen über _safe_db_batch in einem Commit ausgeführt werden.
+        
+        Args:
+            code: Benachrichtigungscode (1-12)
+            datum: Betroffenes Datum
+            ist_popup: Ob es sich um eine zeitgesteuerte PopUp-Benachrichtigung handelt
+            popup_uhrzeit: Uhrzeit für PopUp (nur bei ist_popup=True)
+            
+        Returns:
+            callable: Operation ohne Argumente; liefert True, wenn eine neue
+            Benachrichtigung angelegt wurde, sonst False
+        """
         def _db_op():
-            # Prüfen, ob Benachrichtigung bereits existiert
-            exists_stmt = select(Benachrichtigungen).where(
+            # Prüfen, ob Benachrichtigung bereits existiert (EXISTS bricht beim ersten Treffer ab)
+            exists_stmt = select(exists().where(
                 (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Benachrichtigungen.benachrichtigungs_code == code) &
                 (Benachrichtigungen.datum == datum)
-            )
-            exists = session.execute(exists_stmt).scalar_one_or_none()
+            ))
+            bereits_vorhanden = session.execute(exists_stmt).scalar()
             
-            if exists:
+            if bereits_vorhanden:
                 logger.debug(f"Benachrichtigung (Code {code}, Datum {datum}) existiert bereits. Übersprungen.")
                 return False  # Keine neue Benachrichtigung erstellt
             
+            if ist_popup:
+                self._popup_cache = None
+
             # Benachrichtigung erstellen
             benachrichtigung = Benachrichtigungen(
                 mitarbeiter_id=self.aktueller_nutzer_id,
@@ -2880,10 +3556,51 @@ class ModellTrackTime():
             )
             session.add(benachrichtigung)
             return True
-        
+
+        return _db_op
+
+    def _add_benachrichtigungen_bulk(self, code, daten):
+        """
+        Fügt Benachrichtigungen eines Codes für mehrere Tage in einem Commit hinzu.
+
+        Bereits vorhandene Benachrichtigungen werden mit einer einzigen Abfrage
+        über den Datumsbereich ermittelt und übersprungen; die fehlenden werden
+        per add_all angelegt.
+
+        Args:
+            code: Benachrichtigungscode (1-12)
+            daten: Iterable betroffener Tage (Duplikate werden ignoriert)
+
+        Returns:
+            int: Anzahl neu angelegter Benachrichtigungen
+        """
+        daten = list(dict.fromkeys(daten))
+        if not daten:
+            return 0
+
+        def _db_op():
+            stmt = select(Benachrichtigungen.datum).where(
+                (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
+                (Benachrichtigungen.benachrichtigungs_code == code) &
+                (Benachrichtigungen.datum.between(min(daten), max(daten)))
+            )
+            vorhanden = set(session.scalars(stmt).all())
+            neue = [
+                Benachrichtigungen(
+                    mitarbeiter_id=self.aktueller_nutzer_id,
+                    benachrichtigungs_code=code,
+                    datum=tag
+                )
+                for tag in daten if tag not in vorhanden
+            ]
+            session.add_all(neue)
+            return len(neue)
+
         result = self._safe_db_operation(_db_op)
         if isinstance(result, dict) and "error" in result:
-            logger.error(f"Konnte Benachrichtigung (Code {code}) nicht hinzufügen: {result.get('details')}")
+            logger.error(f"Konnte Benachrichtigungen (Code {code}) nicht hinzufügen: {result.get('details')}")
+            return 0
+        return result or 0
 
     def checke_wochenstunden_minderjaehrige(self):
         """
@@ -2903,45 +3620,31 @@ class ModellTrackTime():
         if not session: return
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer or not nutzer.is_minor_on_date(datum=nutzer.letzter_login):
                 return
 
             start_datum = nutzer.letzter_login
             end_datum = date.today() - timedelta(days=1)
-            
-            current_date = start_datum
-            while current_date <= end_datum:
-                start_of_week = current_date - timedelta(days=current_date.weekday())
-                end_of_week = start_of_week + timedelta(days=6)
-
-                if end_of_week > end_datum: break
 
-                stmt = select(Zeiteintrag).where(
-                    (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
-                    (Zeiteintrag.datum.between(start_of_week, end_of_week))
-                ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-                einträge_woche = session.scalars(stmt).all()
+            # Nur vollständige Wochen: Montag der Login-Woche bis zum letzten Sonntag <= gestern
+            erster_montag = start_datum - timedelta(days=start_datum.weekday())
+            letzter_sonntag = end_datum - timedelta(days=(end_datum.weekday() + 1) % 7)
+            if letzter_sonntag < erster_montag:
+                return
 
-                if not einträge_woche:
-                    current_date = end_of_week + timedelta(days=1)
-                    continue
+            # Arbeitszeit je Tag für den ganzen Bereich (ein übrig bleibender Stempel eines
+            # Tages entfällt), anschließend nach Wochenstart aufsummiert
+            wochenstunden = defaultdict(timedelta)  # Summe der Arbeitszeit je Wochenstart
+            for tag, arbeitszeit in self._arbeitszeit_je_tag(nutzer, erster_montag, letzter_sonntag).items():
+                wochenstunden[tag - timedelta(days=tag.weekday())] += arbeitszeit
 
-                wochenstunden = timedelta()
-                i = 0
-                while i < len(einträge_woche) - 1:
-                    calc = CalculateTime(einträge_woche[i], einträge_woche[i+1], nutzer)
-                    if calc:
-                        calc.gesetzliche_pausen_hinzufügen()
-                        wochenstunden += calc.gearbeitete_zeit
-                        i += 2
-                    else:
-                        i += 1
-                
-                if (wochenstunden > timedelta(hours=40) and nutzer.is_minor_on_date(datum=start_of_week)):
-                    self._add_benachrichtigung_safe(code=7, datum=start_of_week)
+            verstoss_wochen = [
+                start_of_week for start_of_week, summe in wochenstunden.items()
+                if summe > _MAX_WOCHENARBEITSZEIT_MINDERJAEHRIG and nutzer.is_minor_on_date(datum=start_of_week)
+            ]
 
-                current_date = end_of_week + timedelta(days=1)
+            self._add_benachrichtigungen_bulk(7, verstoss_wochen)
         
         except SQLAlchemyError as e:
             logger.error(f"DB-Fehler in checke_wochenstunden_minderjaehrige: {e}", exc_info=True)
@@ -2967,34 +3670,34 @@ class ModellTrackTime():
         if not session: return
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer or not nutzer.is_minor_on_date(nutzer.letzter_login):
                 return
 
             start_datum = nutzer.letzter_login
             end_datum = date.today() - timedelta(days=1)
 
-            current_date = start_datum
-            while current_date <= end_datum:
-                start_of_week = current_date - timedelta(days=current_date.weekday())
-                end_of_week = start_of_week + timedelta(days=6)
-
-                if not nutzer.is_minor_on_date(datum=start_of_week):
-                    current_date = end_of_week + timedelta(days=1)
-                    continue
-                if end_of_week > end_datum:
-                    break
+            # Nur vollständige Wochen: Montag der Login-Woche bis zum letzten Sonntag <= gestern
+            erster_montag = start_datum - timedelta(days=start_datum.weekday())
+            letzter_sonntag = end_datum - timedelta(days=(end_datum.weekday() + 1) % 7)
+            if letzter_sonntag < erster_montag:
+                return
 
-                stmt = select(Zeiteintrag.datum).distinct().where(
-                    (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
-                    (Zeiteintrag.datum.between(start_of_week, end_of_week))
-                )
-                arbeitstage_count = len(session.scalars(stmt).all())
+            # Eine DISTINCT-Abfrage über den ganzen Zeitraum, Zählung je Wochenstart in Python
+            stmt = select(Zeiteintrag.datum).distinct().where(
+                (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
+                (Zeiteintrag.datum.between(erster_montag, letzter_sonntag))
+            )
+            arbeitstage_pro_woche = Counter(
+                tag - timedelta(days=tag.weekday()) for tag in session.scalars(stmt).all()
+            )
 
-                if arbeitstage_count > 5:
-                    self._add_benachrichtigung_safe(code=8, datum=start_of_week)
+            verstoss_wochen = sorted(
+                start_of_week for start_of_week, arbeitstage_count in arbeitstage_pro_woche.items()
+                if arbeitstage_count > 5 and nutzer.is_minor_on_date(datum=start_of_week)
+            )
 
-                current_date = end_of_week + timedelta(days=1)
+            self._add_benachrichtigungen_bulk(8, verstoss_wochen)
 
         except SQLAlchemyError as e:
             logger.error(f"DB-Fehler in checke_arbeitstage_pro_woche_minderjaehrige: {e}", exc_info=True)
@@ -3015,21 +3718,25 @@ class ModellTrackTime():
             return
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 return
 
             start_datum = nutzer.letzter_login if nutzer.letzter_login else date.today() - timedelta(days=30)
             end_datum = date.today() - timedelta(days=1)
+
+            # Volljährig am Startdatum -> auch an allen späteren Tagen, keine Abfrage nötig
+            if not nutzer.is_minor_on_date(start_datum):
+                return
             
             # Hole alle Zeiteinträge im Zeitraum
-            stmt = select(Zeiteintrag).where(
+            stmt = select(Zeiteintrag.datum, Zeiteintrag.zeit).where(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Zeiteintrag.datum >= start_datum) &
                 (Zeiteintrag.datum <= end_datum)
             ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
             
-            einträge = session.execute(stmt).scalars().all()
+            einträge = session.execute(stmt).all()
             
             if not einträge:
                 return
@@ -3039,10 +3746,14 @@ class ModellTrackTime():
             erlaubte_end_zeit = time(20, 0)   # 20:00 Uhr
             
             verstöße = []
+            minderjaehrig_am = {}  # Ergebnis je Datum, mehrere Stempel pro Tag
             
             for eintrag in einträge:
                 # Prüfe ob Nutzer am Datum des Stempels minderjährig war
-                if not nutzer.is_minor_on_date(eintrag.datum):
+                ist_minderjaehrig = minderjaehrig_am.get(eintrag.datum)
+                if ist_minderjaehrig is None:
+                    ist_minderjaehrig = minderjaehrig_am[eintrag.datum] = nutzer.is_minor_on_date(eintrag.datum)
+                if not ist_minderjaehrig:
                     continue
                 
                 # Prüfe ob Stempel außerhalb des erlaubten Zeitfensters liegt
@@ -3052,10 +3763,10 @@ class ModellTrackTime():
                         f"Arbeitszeitfenster-Verstoß (Minderjährige): Stempel am {eintrag.datum} um {eintrag.zeit} "
                         f"liegt außerhalb von {erlaubte_start_zeit} - {erlaubte_end_zeit}"
                     )
-                    # Erstelle Benachrichtigung für diesen Tag
-                    self._add_benachrichtigung_safe(code=9, datum=eintrag.datum)
             
             if verstöße:
+                # Eine Benachrichtigung je Tag, gemeinsam gespeichert
+                self._add_benachrichtigungen_bulk(9, (tag for tag, _ in verstöße))
                 logger.info(f"checke_arbeitszeitfenster_minderjaehrige: {len(verstöße)} Verstöße gefunden")
             else:
                 logger.debug("checke_arbeitszeitfenster_minderjaehrige: Keine Verstöße gefunden")
@@ -3091,28 +3802,27 @@ class ModellTrackTime():
         logger.info(f"checke_arbeitstage: Starte für Nutzer {self.aktueller_nutzer_id}")
         
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 logger.error(f"checke_arbeitstage: Nutzer {self.aktueller_nutzer_id} nicht gefunden.")
                 return
 
             letzter_login = nutzer.letzter_login
             gestern = date.today() - timedelta(days=1)
-            logger.debug(f"checke_arbeitstage: Prüfe Zeitraum von {letzter_login} bis {gestern}")
+            logger.debug("checke_arbeitstage: Prüfe Zeitraum von %s bis %s", letzter_login, gestern)
 
-            fehlende_tage = []
-            tag = letzter_login
-            while tag <= gestern:
-                if tag.weekday() < 5:  # Montag–Freitag
-                    stmt = select(Zeiteintrag).where(
-                        (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                        (Zeiteintrag.datum == tag)
-                    )
-                    eintrag = session.execute(stmt).scalars().first()
-                    if not eintrag:
-                        fehlende_tage.append(tag)
-                        logger.debug(f"checke_arbeitstage: Kein Eintrag für {tag}")
-                tag += timedelta(days=1)
+            # Alle Tage mit Stempeln im Zeitraum in einer Abfrage statt einer Abfrage pro Tag
+            gestempelte_tage = set(session.scalars(
+                select(Zeiteintrag.datum).distinct().where(
+                    (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
+                    (Zeiteintrag.datum.between(letzter_login, gestern))
+                )
+            ))
+
+            # Werktage (Montag–Freitag) des Zeitraums einmal als Liste aufbauen
+            werktage = _werktage_im_zeitraum(letzter_login, gestern)
+            # Die fehlenden Tage stehen gesammelt im folgenden Info-Log
+            fehlende_tage = [tag for tag in werktage if tag not in gestempelte_tage]
 
             logger.info(f"checke_arbeitstage: {len(fehlende_tage)} fehlende Arbeitstage gefunden: {fehlende_tage}")
 
@@ -3123,17 +3833,37 @@ class ModellTrackTime():
                 )
                 fallback_sollstunden = 8
 
+            # Historie einmal laden statt pro fehlendem Tag abzufragen
+            historie = lade_wochenstunden_historie(self.aktueller_nutzer_id)
+
+            # Abwesenheiten (Urlaub/Krankheit/...) und bestehende Code-1-Benachrichtigungen
+            # der fehlenden Tage vorab laden; die Schleife prüft dann nur noch im Speicher
+            abwesenheiten = {}
+            bereits_benachrichtigt = set()
+            if fehlende_tage:
+                abwesenheiten = dict(session.execute(
+                    select(Abwesenheit.datum, Abwesenheit.typ).where(
+                        (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
+                        (Abwesenheit.datum.between(fehlende_tage[0], fehlende_tage[-1]))
+                    )
+                ).all())
+                bereits_benachrichtigt = set(session.scalars(
+                    select(Benachrichtigungen.datum).where(
+                        (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
+                        (Benachrichtigungen.benachrichtigungs_code == 1) &
+                        (Benachrichtigungen.datum.between(fehlende_tage[0], fehlende_tage[-1]))
+                    )
+                ))
+
             abgezogene_tage = []
+            neue_benachrichtigungen = []
+            gleitzeit_abzug_stunden = 0.0
             for tag in fehlende_tage:
                 # Prüfen auf Urlaub/Krankheit
-                urlaubs_stmt = select(Abwesenheit).where(
-                    (Abwesenheit.mitarbeiter_id == self.aktueller_nutzer_id) &
-                    (Abwesenheit.datum == tag) 
-                )
-                exist_urlaub = session.execute(urlaubs_stmt).scalar_one_or_none()
+                abwesenheit_typ = abwesenheiten.get(tag)
 
-                if not exist_urlaub:
-                    logger.debug(f"checke_arbeitstage: Keine Abwesenheit für {tag}, prüfe ob Gleitzeit abgezogen werden muss")
+                if abwesenheit_typ is None:
+                    logger.debug("checke_arbeitstage: Keine Abwesenheit für %s, prüfe ob Gleitzeit abgezogen werden muss", tag)
                     
                     # === WICHTIG: Prüfen ob der Tag ein 6.+ Arbeitstag in der Woche ist ===
                     # An einem 6.+ Tag wird KEINE Sollzeit abgezogen!
@@ -3142,10 +3872,14 @@ class ModellTrackTime():
                     if ist_sechster_tag:
                         logger.info(f"checke_arbeitstage: {tag} ist 6.+ Arbeitstag - KEINE Sollzeit-Abzug, keine Benachrichtigung")
                         continue  # Nächsten Tag prüfen
+
+                    if tag in bereits_benachrichtigt:
+                        logger.debug("checke_arbeitstage: Benachrichtigung für %s existiert bereits", tag)
+                        continue
                     
                     # Regulärer Tag (1.-5. Arbeitstag): Sollzeit abziehen
-                    wochenstunden_tag = hole_wochenstunden_am_datum(
-                        self.aktueller_nutzer_id,
+                    wochenstunden_tag = wochenstunden_aus_historie(
+                        historie,
                         tag,
                         self.aktueller_nutzer_vertragliche_wochenstunden,
                     )
@@ -3154,43 +3888,35 @@ class ModellTrackTime():
                         fallback_stunden=fallback_sollstunden,
                     )
                     logger.debug(
-                        f"checke_arbeitstage: Tägliche Arbeitszeit für {tag}: {tägliche_arbeitszeit} (Wochenstunden: {wochenstunden_tag})"
+                        "checke_arbeitstage: Tägliche Arbeitszeit für %s: %s (Wochenstunden: %s)",
+                        tag, tägliche_arbeitszeit, wochenstunden_tag,
                     )
-                    # Gekapselte Operation für Gleitzeit-Update UND Benachrichtigung
-                    def _db_op():
-                        # Prüfen, ob Benachrichtigung schon existiert (Atomarität)
-                        exists_stmt = select(Benachrichtigungen).where(
-                            (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
-                            (Benachrichtigungen.datum == tag) &
-                            (Benachrichtigungen.benachrichtigungs_code == 1)
-                        )
-                        exists = session.execute(exists_stmt).scalar_one_or_none()
-                        
-                        if not exists:
-                            # Gleitzeit abziehen
-                            alte_gleitzeit = float(self.aktueller_nutzer_gleitzeit)
-                            neue_gleitzeit = alte_gleitzeit - (tägliche_arbeitszeit.total_seconds() / 3600)
-                            nutzer.gleitzeit = neue_gleitzeit # Aktualisiert das Objekt in der Session
-                            self.aktueller_nutzer_gleitzeit = neue_gleitzeit # Aktualisiert den lokalen Cache
-                            
-                            logger.debug(f"checke_arbeitstage: Gleitzeit für {tag} angepasst: {alte_gleitzeit} -> {neue_gleitzeit}")
-
-                            # Benachrichtigung erstellen
-                            benachrichtigung = Benachrichtigungen(
-                                mitarbeiter_id=self.aktueller_nutzer_id,
-                                benachrichtigungs_code=1,
-                                datum=tag
-                            )
-                            session.add(benachrichtigung)
-                            abgezogene_tage.append(tag)
-                            logger.debug(f"checke_arbeitstage: Benachrichtigung für {tag} erstellt")
-                        else:
-                            logger.debug(f"checke_arbeitstage: Benachrichtigung für {tag} existiert bereits")
-                        return True
-
-                    self._safe_db_operation(_db_op)
+                    gleitzeit_abzug_stunden += tägliche_arbeitszeit.total_seconds() / 3600
+                    neue_benachrichtigungen.append(Benachrichtigungen(
+                        mitarbeiter_id=self.aktueller_nutzer_id,
+                        benachrichtigungs_code=1,
+                        datum=tag
+                    ))
+                    abgezogene_tage.append(tag)
                 else:
-                    logger.debug(f"checke_arbeitstage: Abwesenheit ({exist_urlaub.typ}) für {tag} gefunden, keine Gleitzeit-Anpassung")
+                    logger.debug("checke_arbeitstage: Abwesenheit (%s) für %s gefunden, keine Gleitzeit-Anpassung", abwesenheit_typ, tag)
+
+            if neue_benachrichtigungen:
+                # Gleitzeit-Update und alle Benachrichtigungen in einer Transaktion
+                def _db_op():
+                    alte_gleitzeit = float(self.aktueller_nutzer_gleitzeit)
+                    neue_gleitzeit = alte_gleitzeit - gleitzeit_abzug_stunden
+                    nutzer.gleitzeit = neue_gleitzeit # Aktualisiert das Objekt in der Session
+                    session.add_all(neue_benachrichtigungen)
+                    logger.debug("checke_arbeitstage: Gleitzeit angepasst: %s -> %s", alte_gleitzeit, neue_gleitzeit)
+                    return neue_gleitzeit
+
+                result = self._safe_db_operation(_db_op)
+                if isinstance(result, dict) and "error" in result:
+                    logger.error(f"checke_arbeitstage: Gleitzeit-Abzug nicht gespeichert: {result.get('details')}")
+                    abgezogene_tage = []
+                else:
+                    self.aktueller_nutzer_gleitzeit = result # Aktualisiert den lokalen Cache
             
             logger.info(f"checke_arbeitstage: Abgeschlossen. {len(abgezogene_tage)} Tage mit Gleitzeit-Abzug: {abgezogene_tage}")
             return fehlende_tage
@@ -3213,7 +3939,8 @@ class ModellTrackTime():
         Note:
             Prüft ALLE Tage mit Stempeln, nicht nur Werktage.
             Auch nachträglich eingetragene Stempel werden erfasst.
-            Setzt self.feedback_stempel mit Feedback-Text.
+            Setzt self.feedback_stempel; der Text wird erst beim Lesen aus den
+            gemerkten Tagen erzeugt (leer, wenn alle Tage vollständig sind).
         """
         if self.aktueller_nutzer_id is None: 
             logger.debug("checke_stempel: aktueller_nutzer_id ist None")
@@ -3225,60 +3952,36 @@ class ModellTrackTime():
         logger.info(f"checke_stempel: Starte für Nutzer {self.aktueller_nutzer_id}")
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer: 
                 logger.error(f"checke_stempel: Nutzer {self.aktueller_nutzer_id} nicht gefunden")
                 return
 
-            letzter_login = nutzer.letzter_login
             gestern = date.today() - timedelta(days=1)
             
             # Prüfe alle Tage, die Stempel haben (nicht nur ab letzter_login)
-            # um auch nachgetragene Stempel zu erfassen
-            stmt_dates = select(Zeiteintrag.datum).distinct().where(
+            # um auch nachgetragene Stempel zu erfassen - auch Wochenend-Stempel.
+            # Stempelanzahl je Tag in einer GROUP-BY-Abfrage; Tage ohne Stempel
+            # (Anzahl 0) können nicht ungerade sein und müssen nicht geprüft werden.
+            stmt_anzahl = select(Zeiteintrag.datum, func.count(Zeiteintrag.id)).where(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Zeiteintrag.datum <= gestern)
-            )
-            tage_mit_stempeln = set(session.execute(stmt_dates).scalars().all())
+            ).group_by(Zeiteintrag.datum).order_by(Zeiteintrag.datum)
+            stempel_anzahl_pro_tag = session.execute(stmt_anzahl).all()
             
-            # Kombiniere mit dem erwarteten Zeitraum (letzter_login bis gestern)
-            tag = letzter_login
-            alle_zu_pruefenden_tage = set()
-            while tag <= gestern:
-                if tag.weekday() < 5:
-                    alle_zu_pruefenden_tage.add(tag)
-                tag += timedelta(days=1)
-            
-            # Füge auch alle Tage mit Stempeln hinzu (für nachgetragene Stempel)
-            # Wichtig: Auch Wochenend-Stempel sollen geprüft werden!
-            alle_zu_pruefenden_tage.update(tage_mit_stempeln)
-            
-            logger.debug(f"checke_stempel: Prüfe {len(alle_zu_pruefenden_tage)} Tage")
+            logger.debug("checke_stempel: Prüfe %s Tage", len(stempel_anzahl_pro_tag))
 
             ungerade_tage = []
-            for tag in sorted(alle_zu_pruefenden_tage):
-                # Prüfe ALLE Tage, nicht nur Werktage
-                # (auch Wochenend-Stempel sollen auf Vollständigkeit geprüft werden)
-                stmt = select(Zeiteintrag).where(
-                    (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                    (Zeiteintrag.datum == tag)
-                )
-                stempel = session.execute(stmt).scalars().all()
-                stempel_anzahl = len(stempel)
-                
+            for tag, stempel_anzahl in stempel_anzahl_pro_tag:
                 if stempel_anzahl % 2 != 0:
                     ungerade_tage.append(tag)
-                    logger.debug(f"checke_stempel: Ungerade Stempelanzahl ({stempel_anzahl}) für {tag}")
-                else:
-                    logger.debug(f"checke_stempel: Gerade Stempelanzahl ({stempel_anzahl}) für {tag}")
+                    logger.debug("checke_stempel: Ungerade Stempelanzahl (%s) für %s", stempel_anzahl, tag)
             
             logger.info(f"checke_stempel: {len(ungerade_tage)} Tage mit ungerader Stempelanzahl gefunden: {ungerade_tage}")
 
-            self.feedback_stempel = f"An den Tagen {ungerade_tage} fehlt ein Stempel, bitte tragen sie diesen nach"
+            self._setze_feedback_stempel_tage(ungerade_tage)
 
-            for tag in ungerade_tage:
-                logger.debug(f"checke_stempel: Erstelle Benachrichtigung für {tag}")
-                self._add_benachrichtigung_safe(code=2, datum=tag)
+            self._add_benachrichtigungen_bulk(2, ungerade_tage)
 
             logger.info(f"checke_stempel: Abgeschlossen. Benachrichtigungen für {len(ungerade_tage)} Tage erstellt")
             return ungerade_tage
@@ -3307,7 +4010,7 @@ class ModellTrackTime():
         if not session: return
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer or not nutzer.letzter_login:
                 return
 
@@ -3323,10 +4026,10 @@ class ModellTrackTime():
             
             # holidays-Bibliothek könnte fehlschlagen (z.B. unbekanntes Land)
             try:
-                de_holidays = holidays.Germany(years=list(jahre))
+                feiertage = frozenset().union(*(_feiertags_ordinale(jahr) for jahr in jahre))
             except Exception as he:
                 logger.error(f"Fehler beim Laden der Feiertage: {he}", exc_info=True)
-                de_holidays = {} # Leeres Dict als Fallback
+                feiertage = frozenset() # Leere Menge als Fallback
 
             stmt = select(Zeiteintrag.datum).distinct().where(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
@@ -3334,9 +4037,10 @@ class ModellTrackTime():
             )
             gestempelte_tage = session.scalars(stmt).all()
 
-            for tag in gestempelte_tage:
-                if tag.weekday() == 6 or tag in de_holidays:
-                    self._add_benachrichtigung_safe(code=6, datum=tag)
+            self._add_benachrichtigungen_bulk(
+                6,
+                [tag for tag in gestempelte_tage if tag.weekday() == 6 or tag.toordinal() in feiertage]
+            )
 
         except SQLAlchemyError as e:
             logger.error(f"DB-Fehler in checke_sonn_feiertage: {e}", exc_info=True)
@@ -3381,7 +4085,7 @@ class ModellTrackTime():
         logger.info(f"checke_pausenzeiten: Starte für Nutzer {self.aktueller_nutzer_id}")
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer or not nutzer.letzter_login: 
                 logger.error(f"checke_pausenzeiten: Nutzer {self.aktueller_nutzer_id} nicht gefunden oder kein letzter_login")
                 return
@@ -3389,7 +4093,7 @@ class ModellTrackTime():
             letzter_login = nutzer.letzter_login
             gestern = date.today() - timedelta(days=1)
             
-            logger.debug(f"checke_pausenzeiten: Prüfe Zeitraum {letzter_login} bis {gestern}")
+            logger.debug("checke_pausenzeiten: Prüfe Zeitraum %s bis %s", letzter_login, gestern)
 
             tage_mit_unzureichenden_pausen = []
             tag = letzter_login
@@ -3407,6 +4111,9 @@ class ModellTrackTime():
                 if len(stempel) >= 2 and len(stempel) % 2 == 0:
                     # Prüfe ob Nutzer an diesem Tag minderjährig war
                     ist_minderjaehrig = nutzer.is_minor_on_date(tag)
+                    autopause_schwelle = (
+                        _AUTOPAUSE_SCHWELLE_MINDERJAEHRIG if ist_minderjaehrig else _AUTOPAUSE_SCHWELLE_VOLLJAEHRIG
+                    )
                     
                     # Berechne Arbeitszeit und Pausen
                     gesamt_arbeitszeit = timedelta()
@@ -3425,12 +4132,8 @@ class ModellTrackTime():
                         
                         # Prüfe ob dieser Block automatische Pause auslösen würde
                         # Minderjährige: >= 4.5h, Erwachsene: >= 6h
-                        if ist_minderjaehrig:
-                            if arbeitszeit_block >= timedelta(hours=4.5):
-                                hatte_automatische_pause = True
-                        else:
-                            if arbeitszeit_block >= timedelta(hours=6):
-                                hatte_automatische_pause = True
+                        if arbeitszeit_block >= autopause_schwelle:
+                            hatte_automatische_pause = True
                         
                         gesamt_arbeitszeit += arbeitszeit_block
                         
@@ -3443,37 +4146,27 @@ class ModellTrackTime():
                             gesamt_pausen += pause_dauer
                     
                     # Bestimme erforderliche Pausenzeit basierend auf Gesamtarbeitszeit
-                    erforderliche_pause = timedelta()
-                    
-                    if ist_minderjaehrig:
-                        if gesamt_arbeitszeit >= timedelta(hours=6):
-                            erforderliche_pause = timedelta(minutes=60)
-                        elif gesamt_arbeitszeit >= timedelta(hours=4.5):
-                            erforderliche_pause = timedelta(minutes=30)
-                    else:
-                        if gesamt_arbeitszeit >= timedelta(hours=9):
-                            erforderliche_pause = timedelta(minutes=45)
-                        elif gesamt_arbeitszeit >= timedelta(hours=6):
-                            erforderliche_pause = timedelta(minutes=30)
+                    erforderliche_pause = timedelta(microseconds=_gesetzliche_pause_us(
+                        gesamt_arbeitszeit // _EINE_MIKROSEKUNDE, ist_minderjaehrig
+                    ))
                     
                     # Wenn automatische Pause abgezogen wurde, ist die Pausenregelung erfüllt
                     # Ansonsten prüfe ob manuelle Pausen ausreichend sind
-                    if erforderliche_pause > timedelta() and not hatte_automatische_pause:
+                    if erforderliche_pause > _KEINE_ZEIT and not hatte_automatische_pause:
                         if gesamt_pausen < erforderliche_pause:
                             tage_mit_unzureichenden_pausen.append(tag)
                             logger.debug(
-                                f"checke_pausenzeiten: Unzureichende Pause am {tag}: "
-                                f"Arbeitszeit={gesamt_arbeitszeit}, Pause={gesamt_pausen}, "
-                                f"Erforderlich={erforderliche_pause}, Minderjährig={ist_minderjaehrig}"
+                                "checke_pausenzeiten: Unzureichende Pause am %s: "
+                                "Arbeitszeit=%s, Pause=%s, "
+                                "Erforderlich=%s, Minderjährig=%s",
+                                tag, gesamt_arbeitszeit, gesamt_pausen, erforderliche_pause, ist_minderjaehrig,
                             )
                 
                 tag += timedelta(days=1)
             
             logger.info(f"checke_pausenzeiten: {len(tage_mit_unzureichenden_pausen)} Tage mit unzureichenden Pausen gefunden")
 
-            for tag in tage_mit_unzureichenden_pausen:
-                logger.debug(f"checke_pausenzeiten: Erstelle Benachrichtigung für {tag}")
-                self._add_benachrichtigung_safe(code=12, datum=tag)
+            self._add_benachrichtigungen_bulk(12, tage_mit_unzureichenden_pausen)
 
             logger.info(f"checke_pausenzeiten: Abgeschlossen. Benachrichtigungen für {len(tage_mit_unzureichenden_pausen)} Tage erstellt")
             return tage_mit_unzureichenden_pausen
@@ -3508,7 +4201,7 @@ class ModellTrackTime():
             return {'verletzt': False}
         
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 return {'verletzt': False}
             
@@ -3536,7 +4229,7 @@ class ModellTrackTime():
                     'stempel_zeit': stempel_zeit,
                 }
             else:
-                logger.debug(f"pruefe_arbeitszeit_fenster: Stempel um {stempel_zeit} liegt innerhalb der erlaubten Zeiten")
+                logger.debug("pruefe_arbeitszeit_fenster: Stempel um %s liegt innerhalb der erlaubten Zeiten", stempel_zeit)
                 return {'verletzt': False}
                 
         except SQLAlchemyError as e:
@@ -3565,7 +4258,7 @@ class ModellTrackTime():
             return {'verletzt': False}
         
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 return {'verletzt': False}
             
@@ -3596,7 +4289,7 @@ class ModellTrackTime():
             
             if heutige_stempel:
                 # Es gibt bereits Stempel heute -> nicht der erste Stempel
-                logger.debug(f"pruefe_ruhezeit_vor_stempel: Bereits {len(heutige_stempel)} Stempel am {stempel_datum}, keine Ruhezeitenprüfung")
+                logger.debug("pruefe_ruhezeit_vor_stempel: Bereits %s Stempel am %s, keine Ruhezeitenprüfung", len(heutige_stempel), stempel_datum)
                 return {'verletzt': False}
             
             # Berechne die Ruhezeit
@@ -3607,7 +4300,7 @@ class ModellTrackTime():
             # Erforderliche Ruhezeit basierend auf dem Tag des NEUEN Stempels
             is_minor = nutzer.is_minor_on_date(stempel_datum)
             erforderliche_ruhezeit_stunden = 12 if is_minor else 11
-            erforderliche_ruhezeit = timedelta(hours=erforderliche_ruhezeit_stunden)
+            erforderliche_ruhezeit = _RUHEZEIT_MINDERJAEHRIG if is_minor else _RUHEZEIT_VOLLJAEHRIG
             
             tatsaechliche_ruhezeit_stunden = tatsaechliche_ruhezeit.total_seconds() / 3600
             
@@ -3625,7 +4318,7 @@ class ModellTrackTime():
                     'letzter_stempel_zeit': letzter_stempel_zeit,
                 }
             else:
-                logger.debug(f"pruefe_ruhezeit_vor_stempel: Ruhezeit eingehalten ({tatsaechliche_ruhezeit_stunden:.2f}h >= {erforderliche_ruhezeit_stunden}h)")
+                logger.debug("pruefe_ruhezeit_vor_stempel: Ruhezeit eingehalten (%.2fh >= %sh)", tatsaechliche_ruhezeit_stunden, erforderliche_ruhezeit_stunden)
                 return {'verletzt': False}
                 
         except SQLAlchemyError as e:
@@ -3689,7 +4382,7 @@ class ModellTrackTime():
         logger.info(f"pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen: Starte für Nutzer {self.aktueller_nutzer_id}")
         
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 logger.error(f"pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen: Nutzer {self.aktueller_nutzer_id} nicht gefunden")
                 return 0
@@ -3706,7 +4399,7 @@ class ModellTrackTime():
                 logger.debug("pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen: Keine Benachrichtigungen der Codes 3-9, 12 gefunden")
                 return 0
             
-            logger.debug(f"pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen: {len(benachrichtigungen)} Benachrichtigungen gefunden")
+            logger.debug("pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen: %s Benachrichtigungen gefunden", len(benachrichtigungen))
             
             geloeschte_count = 0
             
@@ -3799,7 +4492,7 @@ class ModellTrackTime():
             differenz = beginn_dt - ende_dt
             
             # Erforderliche Ruhezeit
-            erforderlich = timedelta(hours=12) if nutzer.is_minor_on_date(vortag) else timedelta(hours=11)
+            erforderlich = _RUHEZEIT_MINDERJAEHRIG if nutzer.is_minor_on_date(vortag) else _RUHEZEIT_VOLLJAEHRIG
             
             # Wenn jetzt genug Ruhezeit, ist korrigiert
             return differenz >= erforderlich
@@ -3809,33 +4502,141 @@ class ModellTrackTime():
             return False
     
     
+    def _hat_stempel_im_zeitraum(self, mitarbeiter_id, start_datum, end_datum, nur_unvalidiert=False):
+        """
+        Prüft per EXISTS, ob im Zeitraum überhaupt Stempel vorliegen.
+        
+        Die Abfrage endet beim ersten Treffer im Index (mitarbeiter_id, datum),
+        ohne Zeilen zu laden. Aufwendige Auswertungen können so für leere
+        Zeiträume (z.B. neue Nutzer) ganz entfallen.
+        
+        Args:
+            mitarbeiter_id (int): Mitarbeiter
+            start_datum (date): Erster Tag (inklusive)
+            end_datum (date): Letzter Tag (inklusive)
+            nur_unvalidiert (bool): Nur noch nicht validierte Stempel berücksichtigen
+            
+        Returns:
+            bool: True, wenn mindestens ein passender Stempel existiert
+        """
+        bedingung = (
+            (Zeiteintrag.mitarbeiter_id == mitarbeiter_id) &
+            (Zeiteintrag.datum.between(start_datum, end_datum))
+        )
+        if nur_unvalidiert:
+            bedingung &= (Zeiteintrag.validiert == 0)
+        return bool(session.execute(select(exists().where(bedingung))).scalar())
+
+
+    def _arbeitszeit_je_tag(self, nutzer, start_datum, end_datum):
+        """
+        Summiert die Netto-Arbeitszeit (mit gesetzlichen Pausen) je Tag im Zeitraum.
+        
+        Die Paare bildet SQLite per Fensterfunktion (vorbereitete Abfrage
+        _STMT_STEMPELPAARE_ZEITRAUM), gerechnet wird auf ganzzahligen
+        Mikrosekunden statt über CalculateTime-Objekte.
+        
+        Args:
+            nutzer (mitarbeiter): Mitarbeiter (für die Pausenregelung)
+            start_datum (date): Erster Tag (inklusive)
+            end_datum (date): Letzter Tag (inklusive)
+            
+        Returns:
+            dict[date, timedelta]: Arbeitszeit je Tag mit mindestens einem
+            vollständigen Stempelpaar, aufsteigend nach Datum; ein überzähliger
+            Stempel wird ignoriert
+            
+        Note:
+            Liegt der Zeitraum innerhalb des von checke_arbeitszeitschutz
+            vorgeladenen Bereichs, wird ohne Abfrage daraus geantwortet.
+        """
+        vorrat = self._arbeitszeit_vorrat
+        if vorrat is not None:
+            (vorrat_id, vorrat_start, vorrat_ende), vorrat_tage = vorrat
+            if vorrat_id == nutzer.mitarbeiter_id and vorrat_start <= start_datum and end_datum <= vorrat_ende:
+                return {tag: zeit for tag, zeit in vorrat_tage.items() if start_datum <= tag <= end_datum}
+
+        # 18. Geburtstag einmal bestimmen (ohne Geburtsdatum: volljährig wie in is_minor_on_date)
+        volljaehrig_ab = nutzer.volljaehrig_ab if nutzer.geburtsdatum else date.min
+        zeilen = session.execute(
+            _STMT_STEMPELPAARE_ZEITRAUM,
+            {"mitarbeiter_id": nutzer.mitarbeiter_id, "start_datum": start_datum, "end_datum": end_datum},
+        )
+
+        arbeitstage = {}
+        for datum, paare in groupby(zeilen, key=itemgetter(0)):
+            is_minor = datum < volljaehrig_ab
+            arbeitstage[datum] = timedelta(microseconds=sum(
+                _berechne_paar_arbeitszeit(
+                    _zeit_in_mikrosekunden(paar.start), _zeit_in_mikrosekunden(paar.ende),
+                    is_minor, arbeitsfenster=False,
+                )
+                for paar in paare
+            ))
+
+        return arbeitstage
+
+
+    def checke_arbeitszeitschutz(self):
+        """
+        Führt alle Arbeitszeitschutz-Prüfungen (Codes 3-9, 12) nacheinander aus
+        und korrigiert anschließend bestehende Benachrichtigungen.
+        
+        Die Arbeitszeit je Tag wird dafür einmal für den größten benötigten
+        Zeitraum (24 Wochen bzw. ab der Woche des letzten Logins bis gestern)
+        geladen. checke_durchschnittliche_arbeitszeit, checke_max_arbeitszeit,
+        checke_wochenstunden_minderjaehrige und die Korrektur-Prüfungen
+        bedienen sich über _arbeitszeit_je_tag daraus, statt die Stempel
+        jeweils erneut abzufragen und zu Paaren zu bilden.
+        
+        Returns:
+            int: Anzahl gelöschter (korrigierter) Benachrichtigungen
+            
+        Note:
+            Die Prüfungen ändern keine Stempel, der Vorrat bleibt daher für
+            den gesamten Durchlauf gültig und wird danach verworfen.
+        """
+        nutzer = self.get_aktueller_nutzer() if session else None
+        if nutzer:
+            gestern = date.today() - timedelta(days=1)
+            login_start = nutzer.letzter_login if nutzer.letzter_login else date.today() - timedelta(days=30)
+            start = min(
+                gestern - timedelta(weeks=24),                              # checke_durchschnittliche_arbeitszeit
+                login_start - timedelta(days=login_start.weekday()),        # checke_max_arbeitszeit / Wochenprüfung
+            )
+            try:
+                self._arbeitszeit_vorrat = (
+                    (nutzer.mitarbeiter_id, start, gestern),
+                    self._arbeitszeit_je_tag(nutzer, start, gestern),
+                )
+            except SQLAlchemyError as e:
+                # Ohne Vorrat fragen die einzelnen Prüfungen wie bisher selbst ab
+                logger.error(f"DB-Fehler beim Vorladen der Arbeitszeit in checke_arbeitszeitschutz: {e}", exc_info=True)
+                session.rollback()
+
+        try:
+            self.checke_ruhezeiten()                          # Code 3: Ruhezeit-Verstöße
+            self.checke_durchschnittliche_arbeitszeit()       # Code 4: Durchschnitt > 8h/Tag
+            self.checke_max_arbeitszeit()                     # Code 5: Max. Arbeitszeit überschritten
+            self.checke_sonn_feiertage()                      # Code 6: Sonn-/Feiertag
+            self.checke_wochenstunden_minderjaehrige()        # Code 7: Wochenstunden > 40h (Minderjährige)
+            self.checke_arbeitstage_pro_woche_minderjaehrige() # Code 8: >5 Arbeitstage/Woche (Minderjährige)
+            self.checke_arbeitszeitfenster_minderjaehrige()   # Code 9: Arbeitszeitfenster 6-20 Uhr (Minderjährige)
+            self.checke_pausenzeiten()                        # Code 12: Pausenzeiten
+
+            # Prüfe und korrigiere bestehende Benachrichtigungen
+            return self.pruefe_und_korrigiere_arbeitszeitschutz_benachrichtigungen()
+        finally:
+            self._arbeitszeit_vorrat = None
+
+
     def _pruefe_durchschnitt_arbeitszeit_korrigiert(self, nutzer, datum):
         """Prüft, ob durchschnittliche Arbeitszeit korrigiert wurde."""
         try:
             end_datum = date.today() - timedelta(days=1)
             start_datum = end_datum - timedelta(weeks=24)
             
-            stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
-                (Zeiteintrag.datum.between(start_datum, end_datum))
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-            
-            einträge = session.scalars(stmt).all()
-            if not einträge:
-                return True
-            
-            arbeitstage = {}
-            i = 0
-            while i < len(einträge) - 1:
-                calc = CalculateTime(einträge[i], einträge[i + 1], nutzer)
-                if calc:
-                    calc.gesetzliche_pausen_hinzufügen()
-                    arbeitstage.setdefault(calc.datum, timedelta())
-                    arbeitstage[calc.datum] += calc.gearbeitete_zeit
-                    i += 2
-                else:
-                    i += 1
-            
+            arbeitstage = self._arbeitszeit_je_tag(nutzer, start_datum, end_datum)
             if not arbeitstage:
                 return True
             
@@ -3848,7 +4649,7 @@ class ModellTrackTime():
             durchschnittliche_arbeitszeit = gesamte_arbeitszeit / anzahl_arbeitstage
             
             # Wenn jetzt <= 8h, ist korrigiert
-            return durchschnittliche_arbeitszeit <= timedelta(hours=8)
+            return durchschnittliche_arbeitszeit <= _MAX_DURCHSCHNITT_ARBEITSZEIT
             
         except Exception as e:
             logger.error(f"Fehler in _pruefe_durchschnitt_arbeitszeit_korrigiert: {e}", exc_info=True)
@@ -3858,31 +4659,11 @@ class ModellTrackTime():
     def _pruefe_max_arbeitszeit_korrigiert(self, nutzer, datum):
         """Prüft, ob maximale Arbeitszeit am gegebenen Datum korrigiert wurde."""
         try:
-            stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
-                (Zeiteintrag.datum == datum)
-            ).order_by(Zeiteintrag.zeit)
-            
-            einträge = session.scalars(stmt).all()
-            
-            # Wenn keine Stempel mehr, ist korrigiert
-            if not einträge:
-                return True
-            
-            # Berechne Arbeitszeit für den Tag
-            arbeitszeit = timedelta()
-            i = 0
-            while i < len(einträge) - 1:
-                calc = CalculateTime(einträge[i], einträge[i + 1], nutzer)
-                if calc:
-                    calc.gesetzliche_pausen_hinzufügen()
-                    arbeitszeit += calc.gearbeitete_zeit
-                    i += 2
-                else:
-                    i += 1
+            # Berechne Arbeitszeit für den Tag (ohne vollständiges Paar: 0, also korrigiert)
+            arbeitszeit = self._arbeitszeit_je_tag(nutzer, datum, datum).get(datum, timedelta())
             
             # Maximale Stunden
-            max_stunden = timedelta(hours=8) if nutzer.is_minor_on_date(datum) else timedelta(hours=10)
+            max_stunden = _MAX_ARBEITSZEIT_MINDERJAEHRIG if nutzer.is_minor_on_date(datum) else _MAX_ARBEITSZEIT_VOLLJAEHRIG
             
             # Wenn jetzt <= max, ist korrigiert
             return arbeitszeit <= max_stunden
@@ -3895,15 +4676,14 @@ class ModellTrackTime():
     def _pruefe_sonn_feiertag_korrigiert(self, nutzer, datum):
         """Prüft, ob Sonn-/Feiertagsarbeit korrigiert wurde (Stempel gelöscht)."""
         try:
-            # Prüfe ob noch Stempel an diesem Tag existieren
-            stmt = select(Zeiteintrag).where(
+            # Prüfe ob noch Stempel an diesem Tag existieren (mehrere pro Tag möglich)
+            stmt = select(exists().where(
                 (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
                 (Zeiteintrag.datum == datum)
-            )
-            eintrag = session.execute(stmt).scalar_one_or_none()
+            ))
             
             # Wenn keine Stempel mehr, ist korrigiert
-            return eintrag is None
+            return not session.execute(stmt).scalar()
             
         except Exception as e:
             logger.error(f"Fehler in _pruefe_sonn_feiertag_korrigiert: {e}", exc_info=True)
@@ -3917,32 +4697,14 @@ class ModellTrackTime():
             start_of_week = datum
             end_of_week = start_of_week + timedelta(days=6)
             
-            stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
-                (Zeiteintrag.datum.between(start_of_week, end_of_week))
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-            
-            einträge_woche = session.scalars(stmt).all()
-            
-            # Wenn keine Stempel mehr, ist korrigiert
-            if not einträge_woche:
-                return True
-            
-            # Berechne Wochenstunden
-            wochenstunden = timedelta()
-            i = 0
-            while i < len(einträge_woche) - 1:
-                calc = CalculateTime(einträge_woche[i], einträge_woche[i + 1], nutzer)
-                if calc:
-                    calc.gesetzliche_pausen_hinzufügen()
-                    wochenstunden += calc.gearbeitete_zeit
-                    i += 2
-                else:
-                    i += 1
+            # Berechne Wochenstunden (ohne Stempel: 0, also korrigiert)
+            wochenstunden = sum(
+                self._arbeitszeit_je_tag(nutzer, start_of_week, end_of_week).values(), timedelta()
+            )
             
             # Wenn jetzt <= 40h und Nutzer war minderjährig, ist korrigiert
             if nutzer.is_minor_on_date(start_of_week):
-                return wochenstunden <= timedelta(hours=40)
+                return wochenstunden <= _MAX_WOCHENARBEITSZEIT_MINDERJAEHRIG
             else:
                 # Wenn nicht mehr minderjährig, ist Benachrichtigung irrelevant
                 return True
@@ -3989,11 +4751,11 @@ class ModellTrackTime():
             erlaubte_start_zeit = time(6, 0)
             erlaubte_end_zeit = time(20, 0)
             
-            stmt = select(Zeiteintrag).where(
+            stmt = select(Zeiteintrag.datum, Zeiteintrag.zeit).where(
                 (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
                 (Zeiteintrag.datum == datum)
             )
-            einträge = session.execute(stmt).scalars().all()
+            einträge = session.execute(stmt).all()
             
             # Wenn keine Stempel mehr vorhanden, ist korrigiert
             if not einträge:
@@ -4017,12 +4779,12 @@ class ModellTrackTime():
         """Prüft, ob Pausenzeit-Verstoß am gegebenen Datum korrigiert wurde."""
         try:
             # Hole alle Stempel für diesen Tag
-            stmt = select(Zeiteintrag).where(
+            stmt = select(Zeiteintrag.datum, Zeiteintrag.zeit).where(
                 (Zeiteintrag.mitarbeiter_id == nutzer.mitarbeiter_id) &
                 (Zeiteintrag.datum == datum)
             ).order_by(Zeiteintrag.zeit)
             
-            stempel = list(session.execute(stmt).scalars().all())
+            stempel = list(session.execute(stmt).all())
             
             # Wenn keine Stempel oder ungerade Anzahl, ist "korrigiert" (Tag ist nicht mehr vollständig)
             if len(stempel) < 2 or len(stempel) % 2 != 0:
@@ -4030,6 +4792,9 @@ class ModellTrackTime():
             
             # Prüfe ob Nutzer an diesem Tag minderjährig war
             ist_minderjaehrig = nutzer.is_minor_on_date(datum)
+            autopause_schwelle = (
+                _AUTOPAUSE_SCHWELLE_MINDERJAEHRIG if ist_minderjaehrig else _AUTOPAUSE_SCHWELLE_VOLLJAEHRIG
+            )
             
             # Berechne Arbeitszeit und Pausen (gleiche Logik wie in checke_pausenzeiten)
             gesamt_arbeitszeit = timedelta()
@@ -4048,12 +4813,8 @@ class ModellTrackTime():
                 
                 # Prüfe ob dieser Block automatische Pause auslösen würde
                 # Minderjährige: >= 4.5h, Erwachsene: >= 6h
-                if ist_minderjaehrig:
-                    if arbeitszeit_block >= timedelta(hours=4.5):
-                        hatte_automatische_pause = True
-                else:
-                    if arbeitszeit_block >= timedelta(hours=6):
-                        hatte_automatische_pause = True
+                if arbeitszeit_block >= autopause_schwelle:
+                    hatte_automatische_pause = True
                 
                 gesamt_arbeitszeit += arbeitszeit_block
                 
@@ -4066,21 +4827,12 @@ class ModellTrackTime():
                     gesamt_pausen += pause_dauer
             
             # Bestimme erforderliche Pausenzeit basierend auf Gesamtarbeitszeit
-            erforderliche_pause = timedelta()
-            
-            if ist_minderjaehrig:
-                if gesamt_arbeitszeit >= timedelta(hours=6):
-                    erforderliche_pause = timedelta(minutes=60)
-                elif gesamt_arbeitszeit >= timedelta(hours=4.5):
-                    erforderliche_pause = timedelta(minutes=30)
-            else:
-                if gesamt_arbeitszeit >= timedelta(hours=9):
-                    erforderliche_pause = timedelta(minutes=45)
-                elif gesamt_arbeitszeit >= timedelta(hours=6):
-                    erforderliche_pause = timedelta(minutes=30)
+            erforderliche_pause = timedelta(microseconds=_gesetzliche_pause_us(
+                gesamt_arbeitszeit // _EINE_MIKROSEKUNDE, ist_minderjaehrig
+            ))
             
             # Wenn keine Pause erforderlich, ist korrigiert
-            if erforderliche_pause == timedelta():
+            if erforderliche_pause == _KEINE_ZEIT:
                 return True
             
             # Wenn automatische Pause abgezogen wurde, ist die Pausenregelung erfüllt
@@ -4117,7 +4869,7 @@ class ModellTrackTime():
             heute = date.today()
             gestern = heute - timedelta(days=1)
 
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 logger.error(f"checke_ruhezeiten: Nutzer {self.aktueller_nutzer_id} nicht gefunden.")
                 return
@@ -4125,32 +4877,33 @@ class ModellTrackTime():
             # Prüfe Stempel vom letzter_login bis gestern (nicht nur gestern)
             start_datum = nutzer.letzter_login if nutzer.letzter_login else gestern - timedelta(days=30)
             
-            stmt = select(Zeiteintrag).where(
+            # Pro Tag nur erster und letzter Stempel, per GROUP BY in SQL ermittelt
+            stmt = select(
+                Zeiteintrag.datum,
+                func.min(Zeiteintrag.zeit),
+                func.max(Zeiteintrag.zeit),
+            ).where(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Zeiteintrag.datum >= start_datum) &
                 (Zeiteintrag.datum <= gestern)
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-            einträge = session.scalars(stmt).all()
+            ).group_by(Zeiteintrag.datum).order_by(Zeiteintrag.datum)
+            tage = session.execute(stmt).all()
 
-            if not einträge:
+            if not tage:
                 return
 
-            tage = {}
-            for e in einträge:
-                if e.datum not in tage:
-                    tage[e.datum] = []
-                tage[e.datum].append(e.zeit)
+            # Minderjährigkeit endet mit dem 18. Geburtstag: Gilt am ersten und letzten Tag
+            # derselbe Status, gilt er im ganzen Zeitraum und die Ruhezeit ist fest
+            # (in Mikrosekunden, verglichen wird ganzzahlig ohne datetime-Objekte)
+            minderjaehrig_start = nutzer.is_minor_on_date(tage[0][0])
+            if minderjaehrig_start == nutzer.is_minor_on_date(tage[-1][0]):
+                feste_ruhezeit_us = (12 if minderjaehrig_start else 11) * _US_STUNDE
+            else:
+                feste_ruhezeit_us = None
 
-            sortierte_tage = sorted(tage.keys())
             verletzungen = []
 
-            for i in range(len(sortierte_tage) - 1):
-                tag_heute = sortierte_tage[i]
-                tag_morgen = sortierte_tage[i + 1]
-
-                if tag_morgen > gestern:
-                    break
-
+            for (tag_heute, _, ende_heute), (tag_morgen, beginn_morgen, _) in zip(tage, tage[1:]):
                 # Überspringe nur aufeinanderfolgende Wochenend-Tage (Sa→So)
                 # oder wenn mehr als 1 Tag dazwischen liegt (z.B. Fr→Mo)
                 tage_dazwischen = (tag_morgen - tag_heute).days
@@ -4159,18 +4912,20 @@ class ModellTrackTime():
                     continue
                 
                 # Ruhezeit-Anforderung basierend auf dem *ersten* Tag (tag_heute)
-                erforderliche_ruhezeit = timedelta(hours=12) if nutzer.is_minor_on_date(datum=tag_heute) else timedelta(hours=11)
+                erforderliche_ruhezeit_us = feste_ruhezeit_us or (
+                    (12 if nutzer.is_minor_on_date(datum=tag_heute) else 11) * _US_STUNDE
+                )
 
-                ende_heute = max(tage[tag_heute])
-                beginn_morgen = min(tage[tag_morgen])
+                differenz_us = (
+                    tage_dazwischen * _US_TAG
+                    + _zeit_in_mikrosekunden(beginn_morgen)
+                    - _zeit_in_mikrosekunden(ende_heute)
+                )
 
-                ende_dt = datetime.combine(tag_heute, ende_heute)
-                beginn_dt = datetime.combine(tag_morgen, beginn_morgen)
-                differenz = beginn_dt - ende_dt
+                if differenz_us < erforderliche_ruhezeit_us:
+                    verletzungen.append((tag_heute, tag_morgen, timedelta(microseconds=differenz_us)))
 
-                if differenz < erforderliche_ruhezeit:
-                    self._add_benachrichtigung_safe(code=3, datum=tag_morgen)
-                    verletzungen.append((tag_heute, tag_morgen, differenz))
+            self._add_benachrichtigungen_bulk(3, (tag_morgen for _, tag_morgen, _ in verletzungen))
         
         except SQLAlchemyError as e:
             logger.error(f"DB-Fehler in checke_ruhezeiten: {e}", exc_info=True)
@@ -4195,32 +4950,18 @@ class ModellTrackTime():
         if not session: return
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer: return
 
             end_datum = date.today() - timedelta(days=1)
             start_datum = end_datum - timedelta(weeks=24)
 
-            stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                (Zeiteintrag.datum.between(start_datum, end_datum))
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-            
-            einträge = session.scalars(stmt).all()
-            if not einträge: return
-
-            arbeitstage = {}
-            i = 0
-            while i < len(einträge) - 1:
-                calc = CalculateTime(einträge[i], einträge[i + 1], nutzer)
-                if calc:
-                    calc.gesetzliche_pausen_hinzufügen()
-                    arbeitstage.setdefault(calc.datum, timedelta())
-                    arbeitstage[calc.datum] += calc.gearbeitete_zeit
-                    i += 2
-                else:
-                    i += 1
-            
+            # Ohne Stempel im Zeitraum gibt es keinen Durchschnitt
+            if not self._hat_stempel_im_zeitraum(nutzer.mitarbeiter_id, start_datum, end_datum):
+                logger.debug("checke_durchschnittliche_arbeitszeit: Keine Stempel im Zeitraum.")
+                return
+
+            arbeitstage = self._arbeitszeit_je_tag(nutzer, start_datum, end_datum)
             if not arbeitstage: return
 
             gesamte_arbeitszeit = sum(arbeitstage.values(), timedelta())
@@ -4233,7 +4974,7 @@ class ModellTrackTime():
 
             durchschnittliche_arbeitszeit = gesamte_arbeitszeit / anzahl_arbeitstage
 
-            if durchschnittliche_arbeitszeit > timedelta(hours=8):
+            if durchschnittliche_arbeitszeit > _MAX_DURCHSCHNITT_ARBEITSZEIT:
                 self._add_benachrichtigung_safe(code=4, datum=date.today())
 
         except SQLAlchemyError as e:
@@ -4248,42 +4989,27 @@ class ModellTrackTime():
         if not session: return
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer: return
             
             # Prüfe alle Einträge vom letzter_login bis gestern (nicht nur unvalidierte!)
             start_datum = nutzer.letzter_login if nutzer.letzter_login else date.today() - timedelta(days=30)
-            stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                (Zeiteintrag.datum >= start_datum) &
-                (Zeiteintrag.datum <= date.today() - timedelta(days=1))
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-            einträge = session.scalars(stmt).all()
-
-            tage = {}
-            for daten in einträge:
-                tage.setdefault(daten.datum, timedelta()) # Initialisiert mit timedelta()
-
-            # Zeitberechnung
-            i = 0
-            while i < len(einträge) - 1:
-                calc = CalculateTime(einträge[i], einträge[i+1], nutzer)
-                if calc:
-                    # Sicherstellen, dass das Datum im 'tage'-Dict ist (sollte es sein)
-                    if calc.datum in tage:
-                        calc.gesetzliche_pausen_hinzufügen()
-                        tage[calc.datum] += calc.gearbeitete_zeit
-                    i += 2  
-                else:
-                    i += 1
+            # Zeitberechnung (Tage ohne vollständiges Paar können die Grenze nicht überschreiten)
+            tage = self._arbeitszeit_je_tag(nutzer, start_datum, date.today() - timedelta(days=1))
 
             # Prüfung
+            # 18. Geburtstag einmal bestimmen; pro Tag bleibt nur ein Datumsvergleich
+            # (ohne Geburtsdatum gilt wie in is_minor_on_date die Grenze für Volljährige)
+            volljaehrig_ab = nutzer.volljaehrig_ab if nutzer.geburtsdatum else date.min
+            verstoss_tage = []
             for datum, arbeitszeit in tage.items():
                 if not isinstance(arbeitszeit, timedelta): continue # Sicherheitsscheck
                 
-                max_stunden = timedelta(hours=8) if nutzer.is_minor_on_date(datum=datum) else timedelta(hours=10)
+                max_stunden = _MAX_ARBEITSZEIT_MINDERJAEHRIG if datum < volljaehrig_ab else _MAX_ARBEITSZEIT_VOLLJAEHRIG
                 if arbeitszeit > max_stunden:
-                    self._add_benachrichtigung_safe(code=5, datum=datum)
+                    verstoss_tage.append(datum)
+
+            self._add_benachrichtigungen_bulk(5, verstoss_tage)
 
         except SQLAlchemyError as e:
             logger.error(f"DB-Fehler in checke_max_arbeitszeit: {e}", exc_info=True)
@@ -4314,7 +5040,8 @@ class ModellTrackTime():
             
             4. Für jeden vollständigen Arbeitstag:
                - Stempel paarweise durchgehen (Einstempel, Ausstempel)
-               - CalculateTime(ein, aus, nutzer) → Berechnet Arbeitszeit
+               - _berechne_paar_arbeitszeit(ein, aus, is_minor) → Berechnet Arbeitszeit
+                 (Ganzzahl-Variante von CalculateTime mit):
                  * gesetzliche_pausen_hinzufügen():
                    - Minderjährige: 4.5h→30min, 6h→60min
                    - Erwachsene: 6h→30min, 9h→45min
@@ -4325,7 +5052,7 @@ class ModellTrackTime():
                - Auf Gleitzeit-Konto addieren
             
             5. Tägliche Sollzeit ermitteln:
-               - hole_wochenstunden_am_datum(mitarbeiter_id, datum, fallback)
+               - wochenstunden_aus_historie(historie, datum, fallback) mit einmal geladener Historie
                - berechne_taegliche_sollzeit(wochenstunden) → timedelta(hours=wochenstunden/5)
             
             6. Gleitzeit-Delta berechnen:
@@ -4359,40 +5086,50 @@ class ModellTrackTime():
 
         try:
             # === SCHRITT 0: Nutzer-Objekt aus DB laden ===
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer: 
                 return
 
             # === SCHRITT 1: Unvalidierte Zeiteinträge laden ===
             # Zeitraum: Vom letzten Login bis gestern (heute wird nicht berechnet, da ggf. noch offen)
-            stmt = select(Zeiteintrag).where(
+            # Die Paare (Ein-/Ausstempeln je Tag) bildet SQLite per Fensterfunktion;
+            # ein übrig bleibender Stempel eines Tages taucht nicht auf und bleibt unvalidiert
+            stmt = _stempelpaare_select(
                 (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
                 (Zeiteintrag.validiert == 0)  # Nur noch nicht verarbeitete Einträge
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)  # Chronologisch sortiert
-            einträge = session.scalars(stmt).all()
+            )
+            paare = session.execute(stmt).all()
+
+            # Ohne vollständiges Paar bleibt die Gleitzeit unverändert,
+            # daher weder Historie/Benachrichtigungen laden noch schreiben
+            if not paare:
+                self.aktueller_nutzer_gleitzeit = float(nutzer.gleitzeit or 0)
+                logger.debug("berechne_gleitzeit: Keine vollständigen unvalidierten Stempelpaare – nichts zu berechnen.")
+                return
             
-            logger.debug("Unvalidierte Einträge zur Gleitzeitberechnung:")
-            for e in einträge:
-                logger.debug(f"  {e.datum} {e.zeit}")
+            # Schleife über alle Paare nur, wenn DEBUG-Ausgaben tatsächlich geschrieben werden
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Unvalidierte Stempelpaare zur Gleitzeitberechnung:")
+                for paar in paare:
+                    logger.debug("  %s %s - %s", paar.datum, paar.start, paar.ende)
     
-            arbeitstage ={}
-            benutzte_einträge = [] 
-            
-            i = 0
-            while i < len(einträge) - 1:
-                calc = CalculateTime(einträge[i], einträge[i+1], nutzer)
-                if calc:
-                    calc.gesetzliche_pausen_hinzufügen()
-                    calc.arbeitsfenster_beachten()
-                    
-                    arbeitstage.setdefault(calc.datum, timedelta())
-                    arbeitstage[calc.datum] += calc.gearbeitete_zeit
-
-                    benutzte_einträge.append(einträge[i])
-                    benutzte_einträge.append(einträge[i+1])
-                    i += 2  
-                else:
-                    i += 1  
+            arbeitstage = {}  # Summe der Arbeitszeit je Datum (nur Tage mit vollständigem Paar)
+            benutzte_ids = []  # Nur die Primärschlüssel, für das gemeinsame UPDATE unten
+            # 18. Geburtstag einmal bestimmen (ohne Geburtsdatum: volljährig wie in is_minor_on_date)
+            volljaehrig_ab = nutzer.volljaehrig_ab if nutzer.geburtsdatum else date.min
+
+            # Ganzzahl-Arithmetik statt einem CalculateTime-Objekt pro Paar;
+            # Pausen und Arbeitsfenster wie gesetzliche_pausen_hinzufügen/arbeitsfenster_beachten
+            for datum, paare_tag in groupby(paare, key=itemgetter(0)):
+                is_minor = datum < volljaehrig_ab
+                summe = 0
+                for paar in paare_tag:
+                    summe += _berechne_paar_arbeitszeit(
+                        _zeit_in_mikrosekunden(paar.start), _zeit_in_mikrosekunden(paar.ende), is_minor
+                    )
+                    benutzte_ids.append(paar.start_id)
+                    benutzte_ids.append(paar.ende_id)
+                arbeitstage[datum] = timedelta(microseconds=summe)
 
             fallback_sollstunden = None
             if not self.aktueller_nutzer_vertragliche_wochenstunden or self.aktueller_nutzer_vertragliche_wochenstunden <= 0:
@@ -4402,79 +5139,99 @@ class ModellTrackTime():
                 fallback_sollstunden = 8
 
             gleitzeit_diff_total = timedelta()
+            # Ab hier wird nur noch gelesen: Ausstehende Änderungen hat bereits die
+            # Paar-Abfrage oben geschrieben, deshalb muss keine der folgenden Abfragen
+            # (Historie, Benachrichtigungen, 6.-Arbeitstag-Prüfung je Tag) erneut autoflushen
+            with session.no_autoflush:
+                # Historie einmal laden statt pro Arbeitstag abzufragen
+                historie = lade_wochenstunden_historie(self.aktueller_nutzer_id)
+
+                # Code-1-Tage und Tage mit bereits validierten Einträgen je einmal für den
+                # ganzen Zeitraum laden; die Schleife prüft dann nur noch im Speicher
+                code1_tage = set()
+                validierte_tage = set()
+                if arbeitstage:
+                    erster_tag, letzter_tag = min(arbeitstage), max(arbeitstage)
+                    code1_tage = set(session.scalars(
+                        select(Benachrichtigungen.datum).where(
+                            (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
+                            (Benachrichtigungen.benachrichtigungs_code == 1) &
+                            (Benachrichtigungen.datum.between(erster_tag, letzter_tag))
+                        )
+                    ))
+                    validierte_tage = set(session.scalars(
+                        select(Zeiteintrag.datum).distinct().where(
+                            (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
+                            (Zeiteintrag.validiert == 1) &
+                            (Zeiteintrag.datum.between(erster_tag, letzter_tag))
+                        )
+                    ))
 
-            for datum, arbeitszeit in arbeitstage.items():
-                wochenstunden_tag = hole_wochenstunden_am_datum(
-                    self.aktueller_nutzer_id,
-                    datum,
-                    self.aktueller_nutzer_vertragliche_wochenstunden,
-                )
-                tägliche_arbeitszeit = berechne_taegliche_sollzeit(
-                    wochenstunden_tag,
-                    fallback_stunden=fallback_sollstunden,
-                )
-
-                # === SPEZIALFALL 1: Code 1 Benachrichtigung existiert bereits ===
-                # (Tag wurde als fehlend markiert, Sollzeit bereits früher abgezogen)
-                # Prüfen, ob für den Tag eine "Fehlstempel"-Benachrichtigung (Code 1) existiert
-                exists_stmt = select(Benachrichtigungen).where(
-                    (Benachrichtigungen.mitarbeiter_id == self.aktueller_nutzer_id) &
-                    (Benachrichtigungen.datum == datum) &
-                    (Benachrichtigungen.benachrichtigungs_code == 1)
-                )
-                exists = session.execute(exists_stmt).scalar_one_or_none()
-
-                if exists:
-                    # Es existiert bereits eine Code-1-Benachrichtigung (tägliche Sollzeit wurde früher abgezogen).
-                    # Wenn jetzt Stempel vorhanden sind (arbeitszeit > 0), dann darf der Tag NICHT übersprungen werden.
-                    # Stattdessen fügen wir nur die tatsächlich gearbeitete Zeit hinzu, ohne die tägliche Sollzeit erneut abzuziehen.
-                    gleitzeit_diff_total += arbeitszeit
-                    logger.debug(
-                        f"Tag {datum}: Code 1 existiert – füge nur Arbeitszeit {arbeitszeit} hinzu (Sollzeit nicht erneut abziehen)."
+                for datum, arbeitszeit in arbeitstage.items():
+                    wochenstunden_tag = wochenstunden_aus_historie(
+                        historie,
+                        datum,
+                        self.aktueller_nutzer_vertragliche_wochenstunden,
+                    )
+                    tägliche_arbeitszeit = berechne_taegliche_sollzeit(
+                        wochenstunden_tag,
+                        fallback_stunden=fallback_sollstunden,
                     )
-                    continue
-
-                # === SPEZIALFALL 2: Bereits validierte Einträge vorhanden ===
-                # (Sollzeit wurde bereits früher verrechnet)
-                # NEU: Wenn für diesen Tag bereits validierte Einträge existieren,
-                # dann den Tages-Soll NICHT erneut abziehen, sondern nur die zusätzliche Arbeitszeit addieren.
-                validated_before_stmt = select(Zeiteintrag).where(
-                    (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                    (Zeiteintrag.datum == datum) &
-                    (Zeiteintrag.validiert == 1)
-                )
-                validated_before = session.execute(validated_before_stmt).first() is not None
-
-                if validated_before:
-                    gleitzeit_diff_total += arbeitszeit
-                    logger.debug(f"Tag {datum}: Bereits validierte Einträge vorhanden – füge nur zusätzliche Arbeitszeit {arbeitszeit} hinzu.")
-                    continue
 
-                # === SPEZIALFALL 3: 6. Arbeitstag in der Woche ===
-                # An einem 6.+ Arbeitstag wird KEINE Sollarbeitszeit mehr abgezogen,
-                # da die 5-Tage-Woche bereits erfüllt ist. Nur die Arbeitszeit wird addiert.
-                ist_sechster_tag = self.ist_sechster_arbeitstag_in_woche(datum)
+                    # === SPEZIALFALL 1: Code 1 Benachrichtigung existiert bereits ===
+                    # (Tag wurde als fehlend markiert, Sollzeit bereits früher abgezogen)
+                    # Prüfen, ob für den Tag eine "Fehlstempel"-Benachrichtigung (Code 1) existiert
+                    if datum in code1_tage:
+                        # Es existiert bereits eine Code-1-Benachrichtigung (tägliche Sollzeit wurde früher abgezogen).
+                        # Wenn jetzt Stempel vorhanden sind (arbeitszeit > 0), dann darf der Tag NICHT übersprungen werden.
+                        # Stattdessen fügen wir nur die tatsächlich gearbeitete Zeit hinzu, ohne die tägliche Sollzeit erneut abzuziehen.
+                        gleitzeit_diff_total += arbeitszeit
+                        logger.debug(
+                            "Tag %s: Code 1 existiert – füge nur Arbeitszeit %s hinzu (Sollzeit nicht erneut abziehen).",
+                            datum, arbeitszeit,
+                        )
+                        continue
+
+                    # === SPEZIALFALL 2: Bereits validierte Einträge vorhanden ===
+                    # (Sollzeit wurde bereits früher verrechnet)
+                    # NEU: Wenn für diesen Tag bereits validierte Einträge existieren,
+                    # dann den Tages-Soll NICHT erneut abziehen, sondern nur die zusätzliche Arbeitszeit addieren.
+                    if datum in validierte_tage:
+                        gleitzeit_diff_total += arbeitszeit
+                        logger.debug("Tag %s: Bereits validierte Einträge vorhanden – füge nur zusätzliche Arbeitszeit %s hinzu.", datum, arbeitszeit)
+                        continue
+
+                    # === SPEZIALFALL 3: 6. Arbeitstag in der Woche ===
+                    # An einem 6.+ Arbeitstag wird KEINE Sollarbeitszeit mehr abgezogen,
+                    # da die 5-Tage-Woche bereits erfüllt ist. Nur die Arbeitszeit wird addiert.
+                    ist_sechster_tag = self.ist_sechster_arbeitstag_in_woche(datum)
                 
-                if ist_sechster_tag:
-                    # 6.+ Tag: Nur Arbeitszeit hinzufügen, KEINE Sollzeit abziehen
-                    gleitzeit_diff_total += arbeitszeit
-                    logger.info(
-                        f"Tag {datum}: 6.+ Arbeitstag in Woche – füge nur Arbeitszeit {arbeitszeit} hinzu (KEINE Sollzeit-Abzug)."
-                    )
-                    continue
+                    if ist_sechster_tag:
+                        # 6.+ Tag: Nur Arbeitszeit hinzufügen, KEINE Sollzeit abziehen
+                        gleitzeit_diff_total += arbeitszeit
+                        logger.info(
+                            f"Tag {datum}: 6.+ Arbeitstag in Woche – füge nur Arbeitszeit {arbeitszeit} hinzu (KEINE Sollzeit-Abzug)."
+                        )
+                        continue
 
-                # === NORMALFALL: Erster Durchlauf für diesen Tag ===
-                # Differenz berechnen: Arbeitszeit - Sollzeit
-                if tägliche_arbeitszeit > timedelta():
-                    differenz = arbeitszeit - tägliche_arbeitszeit
-                else:
-                    differenz = arbeitszeit
-                gleitzeit_diff_total += differenz
-                logger.debug(f"Tag {datum}: Regulärer Tag – füge Differenz {differenz} (Arbeitszeit {arbeitszeit} - Soll {tägliche_arbeitszeit}) hinzu.")
-            
-            # Alle benutzten Einträge als validiert markieren
-            for e in benutzte_einträge:
-                e.validiert = True
+                    # === NORMALFALL: Erster Durchlauf für diesen Tag ===
+                    # Differenz berechnen: Arbeitszeit - Sollzeit
+                    if tägliche_arbeitszeit > timedelta():
+                        differenz = arbeitszeit - tägliche_arbeitszeit
+                    else:
+                        differenz = arbeitszeit
+                    gleitzeit_diff_total += differenz
+                    logger.debug("Tag %s: Regulärer Tag – füge Differenz %s (Arbeitszeit %s - Soll %s) hinzu.", datum, differenz, arbeitszeit, tägliche_arbeitszeit)
+            
+            # Alle benutzten Einträge mit einem UPDATE als validiert markieren
+            # (synchronize_session="evaluate" hält die geladenen Objekte konsistent)
+            if benutzte_ids:
+                session.execute(
+                    update(Zeiteintrag)
+                    .where(Zeiteintrag.id.in_(benutzte_ids))
+                    .values(validiert=True),
+                    execution_options={"synchronize_session": "evaluate"},
+                )
             
             # Gleitzeit-Update
             gleitzeit_stunden = float(gleitzeit_diff_total.total_seconds() / 3600)
@@ -4486,7 +5243,9 @@ class ModellTrackTime():
             self.aktueller_nutzer_gleitzeit = neue_gleitzeit
             nutzer.gleitzeit = neue_gleitzeit
             
-            session.commit() # Commit der validierten Einträge und der neuen Gleitzeit
+            # Ein Commit für beides: das UPDATE der Einträge und die Gleitzeit des Nutzers
+            # werden gemeinsam übernommen oder bei einem Fehler gemeinsam verworfen
+            session.commit()
             logger.info(f"Gleitzeit für Nutzer {self.aktueller_nutzer_id} berechnet. {gleitzeit_stunden}h hinzugefügt. Neu: {neue_gleitzeit}h.")
 
         except SQLAlchemyError as e:
@@ -4497,6 +5256,65 @@ class ModellTrackTime():
             session.rollback() # Sicherstellen, dass auch bei Logikfehlern gerolltbackt wird
 
 
+    def _gleitzeit_differenzen_je_tag(self, nutzer, start_datum, end_datum, include_missing_days):
+        """
+        Ermittelt die Gleitzeit-Differenz (Ist - Soll) je Werktag im Zeitraum.
+        
+        Gemeinsamer Kern von berechne_durchschnittliche_gleitzeit und
+        kummuliere_gleitzeit, damit Letztere Monat und Quartal aus dem
+        einmal berechneten Jahr ableiten kann.
+        
+        Args:
+            nutzer (mitarbeiter): Aktueller Mitarbeiter
+            start_datum (date): Erster Tag (inklusive)
+            end_datum (date): Letzter Tag (inklusive)
+            include_missing_days (bool): Werktage ohne Stempel mit voller Sollzeit abziehen
+            
+        Returns:
+            list[tuple[date, int]]: (Tag, Differenz in Mikrosekunden) aufsteigend nach Datum
+            
+        Raises:
+            SQLAlchemyError: Wird an den Aufrufer weitergegeben
+        """
+        fallback_sollstunden = None
+        if not self.aktueller_nutzer_vertragliche_wochenstunden or self.aktueller_nutzer_vertragliche_wochenstunden <= 0:
+            logger.warning(
+                f"berechne_durchschnittliche_gleitzeit: Ungültige aktuelle Wochenstunden ({self.aktueller_nutzer_vertragliche_wochenstunden}), verwende Historie/Fallback."
+            )
+            fallback_sollstunden = 8
+
+        # Arbeitszeit je Tag (gleiche Paarbildung und Pausenregel wie die Durchschnittsprüfung)
+        arbeitstage = self._arbeitszeit_je_tag(nutzer, start_datum, end_datum)
+
+        # Differenzen als ganzzahlige Mikrosekunden statt timedelta-Objekte
+        differenzen = []
+        soll_us_je_wochenstunden = {}
+        # Historie einmal laden statt pro Werktag abzufragen
+        historie = lade_wochenstunden_historie(self.aktueller_nutzer_id)
+
+        # Alle Tage im Bereich (nur Mo–Fr)
+        for tag in _werktage_im_zeitraum(start_datum, end_datum):
+            wochenstunden_tag = wochenstunden_aus_historie(
+                historie,
+                tag,
+                self.aktueller_nutzer_vertragliche_wochenstunden,
+            )
+            soll_us = soll_us_je_wochenstunden.get(wochenstunden_tag)
+            if soll_us is None:
+                soll_us = soll_us_je_wochenstunden[wochenstunden_tag] = berechne_taegliche_sollzeit(
+                    wochenstunden_tag,
+                    fallback_stunden=fallback_sollstunden,
+                ) // _EINE_MIKROSEKUNDE
+
+            arbeitszeit = arbeitstage.get(tag)
+            if arbeitszeit is not None:
+                differenzen.append((tag, arbeitszeit // _EINE_MIKROSEKUNDE - soll_us))
+            elif include_missing_days:
+                differenzen.append((tag, -soll_us))
+
+        return differenzen
+
+
     def berechne_durchschnittliche_gleitzeit(self, start_datum: date, end_datum: date, include_missing_days: bool = False):
         if self.aktueller_nutzer_id is None:
             return {"error": "Kein Nutzer angemeldet"}
@@ -4507,65 +5325,17 @@ class ModellTrackTime():
             return {"error": "Startdatum liegt nach Enddatum"}
 
         try:
-            nutzer = session.get(mitarbeiter, self.aktueller_nutzer_id)
+            nutzer = self.get_aktueller_nutzer()
             if not nutzer:
                 return {"error": "Nutzer nicht gefunden"}
 
-            fallback_sollstunden = None
-            if not self.aktueller_nutzer_vertragliche_wochenstunden or self.aktueller_nutzer_vertragliche_wochenstunden <= 0:
-                logger.warning(
-                    f"berechne_durchschnittliche_gleitzeit: Ungültige aktuelle Wochenstunden ({self.aktueller_nutzer_vertragliche_wochenstunden}), verwende Historie/Fallback."
-                )
-                fallback_sollstunden = 8
-
-            stmt = select(Zeiteintrag).where(
-                (Zeiteintrag.mitarbeiter_id == self.aktueller_nutzer_id) &
-                (Zeiteintrag.datum.between(start_datum, end_datum))
-            ).order_by(Zeiteintrag.datum, Zeiteintrag.zeit)
-
-            einträge = session.scalars(stmt).all()
-
-            arbeitstage = {}
-            if einträge: # Nur berechnen, wenn Einträge vorhanden sind
-                i = 0
-                while i < len(einträge) - 1:
-                    calc = CalculateTime(einträge[i], einträge[i + 1], nutzer)
-                    if calc:
-                        calc.gesetzliche_pausen_hinzufügen()
-                        arbeitstage.setdefault(calc.datum, timedelta())
-                        arbeitstage[calc.datum] += calc.gearbeitete_zeit
-                        i += 2
-                    else:
-                        i += 1
-
-            # Alle Tage im Bereich (nur Mo–Fr)
-            alle_tage = [start_datum + timedelta(days=i) for i in range((end_datum - start_datum).days + 1)]
-            arbeitstage_werktage = [t for t in alle_tage if t.weekday() < 5]
-
-            gleitzeit_differenzen = []
-            berücksichtigte_tage = []
-
-            for tag in arbeitstage_werktage:
-                wochenstunden_tag = hole_wochenstunden_am_datum(
-                    self.aktueller_nutzer_id,
-                    tag,
-                    self.aktueller_nutzer_vertragliche_wochenstunden,
-                )
-                tägliche_arbeitszeit = berechne_taegliche_sollzeit(
-                    wochenstunden_tag,
-                    fallback_stunden=fallback_sollstunden,
-                )
-
-                if tag in arbeitstage:
-                    differenz = arbeitstage[tag] - tägliche_arbeitszeit
-                    gleitzeit_differenzen.append(differenz)
-                    berücksichtigte_tage.append(tag)
-                elif include_missing_days:
-                    differenz = -tägliche_arbeitszeit
-                    gleitzeit_differenzen.append(differenz)
-                    berücksichtigte_tage.append(tag)
-                
-            if not gleitzeit_differenzen:
+            # Ohne fehlende Tage zählen nur Tage mit Stempeln; gibt es keine,
+            # entfällt die Auswertung (Historie, Paarbildung) vollständig
+            if not include_missing_days and not self._hat_stempel_im_zeitraum(nutzer.mitarbeiter_id, start_datum, end_datum):
+                differenzen = []
+            else:
+                differenzen = self._gleitzeit_differenzen_je_tag(nutzer, start_datum, end_datum, include_missing_days)
+            if not differenzen:
                 return {
                     "durchschnitt_gleitzeit_stunden": 0.0,
                     "gesamt_gleitzeit_stunden": 0.0,
@@ -4573,16 +5343,16 @@ class ModellTrackTime():
                     "berücksichtigte_tage": []
                 }
 
-            # Division durch Null ist hier (len(gleitzeit_differenzen)) abgefangen
-            gesamt_gleitzeit = sum(gleitzeit_differenzen, timedelta())
-            durchschnitt = gesamt_gleitzeit / len(gleitzeit_differenzen)
-            durchschnitt_stunden = round(durchschnitt.total_seconds() / 3600, 2)
-            gesamt_stunden = gesamt_gleitzeit.total_seconds() / 3600
+            # Division durch Null ist hier (leere differenzen) abgefangen
+            berücksichtigte_tage = [tag for tag, _ in differenzen]
+            anzahl_tage = len(berücksichtigte_tage)
+            gesamt_stunden = sum(diff_us for _, diff_us in differenzen) / 1_000_000 / 3600
+            durchschnitt_stunden = round(gesamt_stunden / anzahl_tage, 2)
 
             return {
                 "durchschnitt_gleitzeit_stunden": durchschnitt_stunden,
                 "gesamt_gleitzeit_stunden": gesamt_stunden,
-                "anzahl_tage": len(gleitzeit_differenzen),
+                "anzahl_tage": anzahl_tage,
                 "berücksichtigte_tage": berücksichtigte_tage
             }
 
@@ -4605,9 +5375,9 @@ class ModellTrackTime():
         """
         Berechnet kumulierte Gleitzeit für Monat, Quartal und Jahr.
         
-        Verwendet berechne_durchschnittliche_gleitzeit() um die Gleitzeit-Summen
-        für verschiedene Zeiträume zu ermitteln und aktualisiert die entsprechenden
-        Attribute.
+        Ermittelt die Differenzen je Tag einmal für das laufende Jahr
+        (_gleitzeit_differenzen_je_tag) und summiert daraus Monat, Quartal
+        und Jahr, statt jeden Zeitraum einzeln neu zu berechnen.
         
         Note:
             Setzt self.kummulierte_gleitzeit_monat, _quartal, _jahr.
@@ -4622,52 +5392,38 @@ class ModellTrackTime():
 
         heute = date.today()
         include_missing = bool(self.tage_ohne_stempel_beachten)
-
-        # 1. Monat berechnen
-
         start_monat = heute.replace(day=1)
-        ergebnis_monat = self.berechne_durchschnittliche_gleitzeit(start_monat, heute, include_missing)
-        if "error" not in ergebnis_monat:
-            gesamt_stunden_monat = ergebnis_monat.get("gesamt_gleitzeit_stunden")
-            if gesamt_stunden_monat is None:
-                logger.warning("berechne_durchschnittliche_gleitzeit lieferte keine Gesamtstunden für den Monat – fallback auf Durchschnitt")
-                gesamt_stunden_monat = ergebnis_monat.get("durchschnitt_gleitzeit_stunden", 0.0)
-            self.kummulierte_gleitzeit_monat = round(gesamt_stunden_monat, 2)
-        else:
-            logger.warning(f"Fehler bei Kummulation (Monat): {ergebnis_monat.get('error')}")
-            self.kummulierte_gleitzeit_monat = 0.0
-
-
-        # 2. Quartal berechnen
-
-        aktuelles_quartal = (heute.month - 1) // 3 + 1
-        start_monat_quartal = (aktuelles_quartal - 1) * 3 + 1
-        start_quartal = heute.replace(month=start_monat_quartal, day=1)
-        ergebnis_quartal = self.berechne_durchschnittliche_gleitzeit(start_quartal, heute, include_missing)
-        if "error" not in ergebnis_quartal:
-            gesamt_stunden_quartal = ergebnis_quartal.get("gesamt_gleitzeit_stunden")
-            if gesamt_stunden_quartal is None:
-                logger.warning("berechne_durchschnittliche_gleitzeit lieferte keine Gesamtstunden für das Quartal – fallback auf Durchschnitt")
-                gesamt_stunden_quartal = ergebnis_quartal.get("durchschnitt_gleitzeit_stunden", 0.0)
-            self.kummulierte_gleitzeit_quartal = round(gesamt_stunden_quartal, 2)
-        else:
-            logger.warning(f"Fehler bei Kummulation (Quartal): {ergebnis_quartal.get('error')}")
-            self.kummulierte_gleitzeit_quartal = 0.0
+        start_quartal = heute.replace(month=((heute.month - 1) // 3) * 3 + 1, day=1)
+        start_jahr = heute.replace(month=1, day=1)
 
+        # Differenzen je Tag nur einmal für das Jahr bestimmen; Quartal und Monat
+        # sind Teilzeiträume bis heute und werden daraus aufsummiert
+        try:
+            nutzer = self.get_aktueller_nutzer() if session else None
+            if not nutzer:
+                logger.warning("Fehler bei Kummulation: Nutzer nicht gefunden")
+                differenzen = []
+            elif not include_missing and not self._hat_stempel_im_zeitraum(nutzer.mitarbeiter_id, start_jahr, heute):
+                # Keine Stempel im Jahr (z.B. neuer Nutzer): alle Summen bleiben 0
+                differenzen = []
+            else:
+                differenzen = self._gleitzeit_differenzen_je_tag(nutzer, start_jahr, heute, include_missing)
+        except SQLAlchemyError as e:
+            logger.error(f"DB-Fehler bei Kummulation der Gleitzeit: {e}", exc_info=True)
+            session.rollback()
+            differenzen = []
 
-        # 3. Jahr berechnen
+        monat_us = quartal_us = jahr_us = 0
+        for tag, diff_us in differenzen:
+            jahr_us += diff_us
+            if tag >= start_quartal:
+                quartal_us += diff_us
+                if tag >= start_monat:
+                    monat_us += diff_us
 
-        start_jahr = heute.replace(month=1, day=1)
-        ergebnis_jahr = self.berechne_durchschnittliche_gleitzeit(start_jahr, heute, include_missing)
-        if "error" not in ergebnis_jahr:
-            gesamt_stunden_jahr = ergebnis_jahr.get("gesamt_gleitzeit_stunden")
-            if gesamt_stunden_jahr is None:
-                logger.warning("berechne_durchschnittliche_gleitzeit lieferte keine Gesamtstunden für das Jahr – fallback auf Durchschnitt")
-                gesamt_stunden_jahr = ergebnis_jahr.get("durchschnitt_gleitzeit_stunden", 0.0)
-            self.kummulierte_gleitzeit_jahr = round(gesamt_stunden_jahr, 2)
-        else:
-            logger.warning(f"Fehler bei Kummulation (Jahr): {ergebnis_jahr.get('error')}")
-            self.kummulierte_gleitzeit_jahr = 0.0
+        self.kummulierte_gleitzeit_monat = round(monat_us / 1_000_000 / 3600, 2)
+        self.kummulierte_gleitzeit_quartal = round(quartal_us / 1_000_000 / 3600, 2)
+        self.kummulierte_gleitzeit_jahr = round(jahr_us / 1_000_000 / 3600, 2)
 
 
 
@@ -4853,10 +5609,13 @@ class ModellLogin():
             return False
 
         try:
-            stmt = select(mitarbeiter).where(mitarbeiter.name == self.anmeldung_name)
-            nutzer = session.execute(stmt).scalar_one_or_none()
+            # Nur ID und Hash laden; das vollständige Nutzerobjekt lädt ModellTrackTime nach dem Login
+            stmt = select(mitarbeiter.mitarbeiter_id, mitarbeiter.password).where(mitarbeiter.name == self.anmeldung_name)
+            nutzer = session.execute(stmt).one_or_none()
 
             if nutzer is None:
+                # Gleicher bcrypt-Aufwand wie bei vorhandenem Namen (kein Timing-Hinweis auf gültige Namen)
+                verify_password(self.anmeldung_passwort, _DUMMY_PASSWORT_HASH)
                 self.anmeldung_rückmeldung = "Passwort oder Nutzername falsch"
                 logger.warning(f"Fehlgeschlagener Login-Versuch für: {self.anmeldung_name}")
                 return False
@@ -16,36 +16,77 @@ Haupttest-Bereiche:
 - Urlaubs- und Feiertagshandling
 
 Test-Infrastruktur:
-- Isolierte In-Memory-Datenbank pro Test
+- Eine In-Memory-Datenbank pro Testmodul, jeder Test in eigener Transaktion (Rollback)
 - Fixtures für Testbenutzer und Model-Instanz
-- Modul-Reload für saubere SQLAlchemy-Mapper
 
 Autor: Velqor
 Version: 2.0
 """
 
 import pytest
-import importlib
 from datetime import datetime, date, timedelta, time
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import bindparam, create_engine, event, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
-import modell  # wichtig: Basisimport für reload
+import modell
 
 
 # ============================================================
 #  FIXTURE: ISOLIERTE TESTDATENBANK
 # ============================================================
 
+@pytest.fixture(scope="module")
+def db_engine():
+    """
+    Legt die In-Memory-Datenbank einmal pro Testmodul an.
+    
+    Mapper und Tabellen werden nur einmal aufgebaut; die Isolation der
+    einzelnen Tests übernimmt isolated_db per Transaktions-Rollback.
+    
+    Yields:
+        Engine: SQLAlchemy-Engine auf eine gemeinsame In-Memory-Datenbank
+        
+    Note:
+        pysqlite beginnt Transaktionen sonst selbst und bricht SAVEPOINTs;
+        die beiden Event-Hooks überlassen das BEGIN SQLAlchemy.
+    """
+    engine = create_engine("sqlite:///:memory:", echo=False, poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _kein_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    modell.Base.metadata.create_all(engine)
+
+    # Die filter_by(mitarbeiter_id, benachrichtigungs_code, datum)-Prüfungen (in den Tests wie in
+    # modell.py) müssen per Index gesucht werden; fehlt er im Modell, bricht das Modul hier ab
+    with engine.connect() as conn:
+        plan = " ".join(row[3] for row in conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM benachrichtigungen "
+            "WHERE mitarbeiter_id = 1 AND benachrichtigungs_code = 1 AND datum = '2024-01-01'"
+        ))
+    assert "USING INDEX" in plan and "SCAN" not in plan, plan
+
+    yield engine
+    engine.dispose()
+
+
 @pytest.fixture(scope="function", autouse=True)
-def isolated_db(monkeypatch):
+def isolated_db(db_engine, monkeypatch):
     """
-    Erstellt für jeden Test eine isolierte In-Memory-Datenbank.
+    Stellt jedem Test eine Session in einer eigenen, äußeren Transaktion bereit.
     
-    Lädt modell.py neu, um saubere SQLAlchemy-Mapper zu erzwingen
-    und Cross-Test-Kontamination zu verhindern.
+    Commits des Tests (auch aus modell.py heraus) landen nur in SAVEPOINTs;
+    nach dem Test wird die äußere Transaktion verworfen, sodass kein Test
+    Daten eines anderen sieht.
     
     Args:
+        db_engine: Modulweite Test-Engine
         monkeypatch: Pytest fixture für Monkey-Patching
         
     Yields:
@@ -55,20 +96,18 @@ def isolated_db(monkeypatch):
         Wird automatisch vor jedem Test ausgeführt (autouse=True).
         Führt Rollback und Close nach jedem Test aus.
     """
-    importlib.reload(modell)
-
-    engine = create_engine("sqlite:///:memory:", echo=False)
-    modell.Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    test_session = Session()
+    connection = db_engine.connect()
+    transaktion = connection.begin()
+    test_session = Session(bind=connection, join_transaction_mode="create_savepoint")
 
     # Globale Session in modell patchen
     monkeypatch.setattr(modell, "session", test_session)
 
     yield test_session
 
-    test_session.rollback()
     test_session.close()
+    transaktion.rollback()
+    connection.close()
 
 
 @pytest.fixture
@@ -145,11 +184,63 @@ def add_stempel(session, mid, tag, start="08:00", ende="16:00"):
     Note:
         Committet die Stempel automatisch in die Datenbank.
     """
-    s1 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=datetime.strptime(start, "%H:%M").time())
-    s2 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=datetime.strptime(ende, "%H:%M").time())
+    s1 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=time.fromisoformat(start))
+    s2 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=time.fromisoformat(ende))
     session.add_all([s1, s2])
     session.commit()
 
+
+def werktage_zwischen(start, ende):
+    """
+    Liefert alle Werktage (Mo–Fr) von start bis ende (inklusive).
+    
+    Bewusst unabhängig von modell._werktage_im_zeitraum erzeugt, damit ein
+    Fehler im Helfer nicht auch die Testdaten verändert.
+    
+    Args:
+        start (date): Erster Tag
+        ende (date): Letzter Tag
+        
+    Returns:
+        list[date]: Werktage in aufsteigender Reihenfolge
+    """
+    return [
+        date.fromordinal(o) for o in range(start.toordinal(), ende.toordinal() + 1)
+        if date.fromordinal(o).weekday() < 5
+    ]
+
+
+# Vorbereitete Abfragen wie die _STMT_*-Abfragen in modell.py: einmal aufgebaut, danach
+# ändern sich nur die Bind-Parameter und SQLAlchemy nutzt den kompilierten SQL-Cache
+_STMT_BENACHRICHTIGUNG = (
+    select(modell.Benachrichtigungen)
+    .where(
+        (modell.Benachrichtigungen.mitarbeiter_id == bindparam("mitarbeiter_id")) &
+        (modell.Benachrichtigungen.benachrichtigungs_code == bindparam("code"))
+    )
+)
+_STMT_BENACHRICHTIGUNG_AM_TAG = _STMT_BENACHRICHTIGUNG.where(modell.Benachrichtigungen.datum == bindparam("datum"))
+
+
+def hole_benachrichtigung(session, mid, code, datum=None):
+    """
+    Liefert eine Benachrichtigung eines Mitarbeiters mit dem angegebenen Code.
+    
+    Args:
+        session: SQLAlchemy-Session
+        mid (int): Mitarbeiter-ID
+        code (int): Benachrichtigungs-Code
+        datum (date): Optional, nur Benachrichtigungen dieses Tages
+        
+    Returns:
+        Benachrichtigungen: Erster Treffer oder None
+    """
+    if datum is None:
+        return session.scalars(_STMT_BENACHRICHTIGUNG, {"mitarbeiter_id": mid, "code": code}).first()
+    return session.scalars(
+        _STMT_BENACHRICHTIGUNG_AM_TAG, {"mitarbeiter_id": mid, "code": code, "datum": datum}
+    ).first()
+
 # ============================================================
 #  TESTS: HISTORISCHE WOCHENSTUNDEN
 # ============================================================
@@ -195,7 +286,7 @@ def test_wochenstunden_historie_verwendung(model, isolated_db, test_user):
     add_stempel(isolated_db, test_user.mitarbeiter_id, tag_neu, "08:00", "16:30")
 
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     # Vor der Änderung: 8h gearbeitet -> 0h Gleitzeit; nach der Änderung: 8h gearbeitet -> +2h Gleitzeit
     assert test_user.gleitzeit == pytest.approx(2.0, abs=0.05)
@@ -213,6 +304,99 @@ def test_wochenstunden_historie_verwendung(model, isolated_db, test_user):
     assert [h.wochenstunden for h in historie] == [40, 30]
 
 
+def test_get_zeiteintraege_nutzt_vorgeladene_historie(model, isolated_db, test_user):
+    """
+    Die Kalenderansicht liest die Wochenstunden aus der vorgeladenen Historie;
+    eine Änderung der Wochenstunden invalidiert den Cache.
+    """
+    tag = date(2024, 3, 5)
+    isolated_db.add(
+        modell.VertragswochenstundenHistorie(
+            mitarbeiter_id=test_user.mitarbeiter_id, gueltig_ab=date(2024, 1, 1), wochenstunden=40
+        )
+    )
+    isolated_db.commit()
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "08:00", "16:30")
+
+    model.aktuelle_kalendereinträge_für_id = test_user.mitarbeiter_id
+    model.bestimmtes_datum = tag.strftime("%d.%m.%Y")
+    model.get_zeiteinträge()
+    assert model.gleitzeit_bestimmtes_datum_stunden == pytest.approx(0.0)
+
+    model.aktualisiere_vertragliche_wochenstunden(30, gueltig_ab=date(2024, 3, 1))
+    model.get_zeiteinträge()
+    assert model.gleitzeit_bestimmtes_datum_stunden == pytest.approx(2.0)
+
+
+def test_wochenstunden_aus_historie_grenzfaelle():
+    """
+    Binäre Suche: Stichtag am Gültigkeitsbeginn, zwischen zwei Einträgen,
+    vor dem ersten Eintrag (rückwirkend) und ohne Historie (Fallback).
+    """
+    historie = [(date(2024, 1, 1), 40), (date(2024, 3, 1), 30), (date(2024, 6, 1), 20)]
+
+    assert modell.wochenstunden_aus_historie(historie, date(2024, 3, 1), 35) == 30
+    assert modell.wochenstunden_aus_historie(historie, date(2024, 5, 31), 35) == 30
+    assert modell.wochenstunden_aus_historie(historie, date(2025, 1, 1), 35) == 20
+    assert modell.wochenstunden_aus_historie(historie, date(2023, 12, 31), 35) == 40
+    assert modell.wochenstunden_aus_historie([], date(2024, 3, 1), 35) == 35
+
+
+def test_berechne_taegliche_sollzeit_wird_gemerkt():
+    """
+    Wiederholte Aufrufe mit gleichen Argumenten (wie pro Arbeitstag in den
+    Gleitzeitberechnungen) werden aus dem lru_cache bedient.
+    """
+    modell.berechne_taegliche_sollzeit.cache_clear()
+
+    for _ in range(5):
+        assert modell.berechne_taegliche_sollzeit(40, fallback_stunden=None) == timedelta(hours=8)
+    assert modell.berechne_taegliche_sollzeit(0, fallback_stunden=8) == timedelta(hours=8)
+
+    info = modell.berechne_taegliche_sollzeit.cache_info()
+    assert (info.hits, info.misses) == (4, 2)
+
+
+@pytest.mark.parametrize("is_minor, stunden, pause_min", [
+    (False, 5.99, 0), (False, 6, 30), (False, 8.99, 30), (False, 9, 45),
+    (True, 4.49, 0), (True, 4.5, 30), (True, 5.99, 30), (True, 6, 60),
+])
+def test_gesetzliche_pause_stufen(is_minor, stunden, pause_min):
+    """
+    Die gestapelten Pausenstufen ergeben an den Schwellen dieselben Pausen
+    wie die gesetzliche Staffelung (ArbZG § 4 / JArbSchG § 11).
+    """
+    gearbeitet = timedelta(hours=stunden)
+    assert modell._gesetzliche_pause_us(gearbeitet // timedelta(microseconds=1), is_minor) == pause_min * 60_000_000
+
+    class _Nutzer:
+        def is_minor_on_date(self, datum):
+            return is_minor
+
+    start = modell.Zeiteintrag(datum=date(2024, 1, 10), zeit=time(8, 0))
+    ende = modell.Zeiteintrag(datum=date(2024, 1, 10), zeit=(datetime(2024, 1, 10, 8) + gearbeitet).time())
+    calc = modell.CalculateTime(start, ende, _Nutzer())
+    calc.gesetzliche_pausen_hinzufügen()
+    assert calc.gearbeitete_zeit == gearbeitet - timedelta(minutes=pause_min)
+
+
+def test_werktage_im_zeitraum_entspricht_tagesweiser_filterung():
+    """
+    Der wochenweise Sprung über Ordinalzahlen liefert dieselben Werktage wie das
+    tageweise Erzeugen mit weekday()-Filter, auch bei Start/Ende am Wochenende.
+    """
+    for start in (date(2024, 1, 6), date(2024, 1, 8), date(2024, 1, 12)):
+        for laenge in (0, 1, 2, 6, 7, 30, 366):
+            ende = start + timedelta(days=laenge)
+            erwartet = [
+                start + timedelta(days=i) for i in range(laenge + 1)
+                if (start + timedelta(days=i)).weekday() < 5
+            ]
+            assert modell._werktage_im_zeitraum(start, ende) == erwartet
+
+    assert modell._werktage_im_zeitraum(date(2024, 1, 10), date(2024, 1, 9)) == []
+
+
 # ============================================================
 #  TESTS: STANDARDFUNKTIONEN
 # ============================================================
@@ -226,43 +410,38 @@ def test_urlaub_verhindert_gleitzeitabzug(model, isolated_db, test_user):
     gestern = date.today() - timedelta(days=1)
 
     # Erstelle für jeden Tag im Zeitraum (Mo–Fr relevant) einen genehmigten Urlaubseintrag
-    tag = letzter_login
-    inserted = []
-    while tag <= gestern:
-        if tag.weekday() < 5:  # nur Mo–Fr (Arbeitstage)
-            abw = modell.Abwesenheit(
-                mitarbeiter_id=test_user.mitarbeiter_id,
-                datum=tag,
-                typ="Urlaub",
-                genehmigt=True
-            )
-            isolated_db.add(abw)
-            inserted.append(tag)
-        tag += timedelta(days=1)
+    # Ein INSERT mit allen Zeilen statt eines ORM-Objekts pro Tag
+    inserted = werktage_zwischen(letzter_login, gestern)  # nur Mo–Fr (Arbeitstage)
+    isolated_db.execute(insert(modell.Abwesenheit), [
+        {"mitarbeiter_id": test_user.mitarbeiter_id, "datum": tag, "typ": "Urlaub", "genehmigt": True}
+        for tag in inserted
+    ])
     isolated_db.commit()
 
     alt_gleitzeit = test_user.gleitzeit
     model.checke_arbeitstage()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     # Gleitzeit darf unverändert bleiben
     assert test_user.gleitzeit == alt_gleitzeit, f"Gleitzeit wurde geändert (vorher={alt_gleitzeit}, jetzt={test_user.gleitzeit})"
 
     # Für alle eingefügten Tage darf es keine Code-1-Benachrichtigung geben
-    for t in inserted:
-        ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-            mitarbeiter_id=test_user.mitarbeiter_id,
-            benachrichtigungs_code=1,
-            datum=t
-        ).first()
-        assert ben is None, f"Für {t} sollte keine Code-1-Benachrichtigung existieren"
+    # (eine Abfrage über alle Tage, nur die Datumsspalte)
+    treffer = isolated_db.scalars(
+        select(modell.Benachrichtigungen.datum).where(
+            (modell.Benachrichtigungen.mitarbeiter_id == test_user.mitarbeiter_id) &
+            (modell.Benachrichtigungen.benachrichtigungs_code == 1) &
+            (modell.Benachrichtigungen.datum.in_(inserted))
+        )
+    ).all()
+    assert not treffer, f"Für {treffer} sollte keine Code-1-Benachrichtigung existieren"
 
 
 def test_benachrichtigung_bei_fehlendem_stempel(model, isolated_db, test_user):
     """Fehlende Arbeitstage sollen Benachrichtigungen (Code 1) erzeugen."""
     start_gz = test_user.gleitzeit
     model.checke_arbeitstage()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
         mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=1
@@ -289,9 +468,7 @@ def test_benachrichtigung_fehlt_stempel(model, isolated_db, test_user):
     fehlende = model.checke_stempel()
     assert tag in fehlende
 
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=2
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 2)
     assert ben is not None
 
 
@@ -309,7 +486,7 @@ def test_nachtraeglicher_stempel_an_gestempelten_tag(model, isolated_db, test_us
 
     # Erster Gleitzeitlauf (verarbeitet existierende Stempel)
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
     gleitzeit_nach_erster_berechnung = test_user.gleitzeit
 
     # Stempel werden nachgetragen
@@ -320,7 +497,7 @@ def test_nachtraeglicher_stempel_an_gestempelten_tag(model, isolated_db, test_us
 
     # Zweiter Gleitzeitlauf — sollte Gleitzeit korrekt erhöhen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     assert test_user.gleitzeit > gleitzeit_nach_erster_berechnung, (
         f"Gleitzeit sollte nach dem Nachtragen steigen: "
@@ -342,7 +519,7 @@ def test_gleitzeit_an_urlaubstag_bleibt_gleich(model, isolated_db, test_user):
 
     vor = test_user.gleitzeit
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     assert test_user.gleitzeit == vor
 '''
@@ -367,9 +544,7 @@ def test_checke_ruhezeiten_verstoss(model, isolated_db, test_user):
     isolated_db.commit()
 
     model.checke_ruhezeiten()
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=3
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 3)
     assert ben is not None, "Ruhezeit-Verstoß wurde nicht erkannt"
 
 
@@ -377,36 +552,32 @@ def test_checke_ruhezeiten_verstoss(model, isolated_db, test_user):
 def test_checke_durchschnittliche_arbeitszeit_zu_lang(model, isolated_db, test_user):
     """Durchschnittliche Arbeitszeit > 8h → Benachrichtigung Code 4."""
     start = date.today() - timedelta(days=10)
-    for i in range(5):
-        tag = start + timedelta(days=i)
-        if tag.weekday() < 5:
-            s1 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(8, 0))
-            s2 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(17, 30))
-            isolated_db.add_all([s1, s2])
+    werktage = werktage_zwischen(start, start + timedelta(days=4))
+    isolated_db.execute(insert(modell.Zeiteintrag), [
+        {"mitarbeiter_id": test_user.mitarbeiter_id, "datum": tag, "zeit": zeit}
+        for tag in werktage
+        for zeit in (time(8, 0), time(17, 30))
+    ])
     isolated_db.commit()
 
     model.checke_durchschnittliche_arbeitszeit()
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=4
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 4)
     assert ben is not None
 
 
 def test_checke_durchschnittliche_arbeitszeit_ok(model, isolated_db, test_user):
     """Durchschnitt ≤ 8h → keine Benachrichtigung."""
     start = date.today() - timedelta(days=10)
-    for i in range(5):
-        tag = start + timedelta(days=i)
-        if tag.weekday() < 5:
-            s1 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(8, 0))
-            s2 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(15, 30))
-            isolated_db.add_all([s1, s2])
+    werktage = werktage_zwischen(start, start + timedelta(days=4))
+    isolated_db.execute(insert(modell.Zeiteintrag), [
+        {"mitarbeiter_id": test_user.mitarbeiter_id, "datum": tag, "zeit": zeit}
+        for tag in werktage
+        for zeit in (time(8, 0), time(15, 30))
+    ])
     isolated_db.commit()
 
     model.checke_durchschnittliche_arbeitszeit()
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=4
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 4)
     assert ben is None
 
 
@@ -427,36 +598,41 @@ def test_arbeit_an_sonntag_erzeugt_benachrichtigung(model, isolated_db, test_use
     model.checke_sonn_feiertage()
 
     # Prüfen, ob die Benachrichtigung erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=6,
-        datum=letzter_sonntag
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 6, letzter_sonntag)
 
     assert ben is not None, "Für Arbeit an einem Sonntag wurde keine Benachrichtigung erstellt."
 
 
 def test_arbeit_an_feiertag_erzeugt_benachrichtigung(model, isolated_db, test_user):
     """Prüft, ob Arbeit an einem Feiertag eine Benachrichtigung (Code 6) erzeugt."""
-    # Fester Feiertag (Tag der Deutschen Einheit) im letzten Jahr, um sicher im Zeitraum zu sein
-    feiertag = date(date.today().year - 1, 10, 3)
+    # Feiertag aus der (gemerkten) Feiertagsmenge des Vorjahres wählen, um sicher im Zeitraum zu sein:
+    # den letzten Di–Fr-Feiertag nach einem normalen Werktag, damit nur der Feiertag die Meldung auslöst
+    feiertage = modell._feiertags_ordinale(date.today().year - 1)
+    feiertag = max(
+        tag for tag in map(date.fromordinal, feiertage)
+        if 0 < tag.weekday() < 5 and (tag - timedelta(days=1)).toordinal() not in feiertage
+    )
+    werktag = feiertag - timedelta(days=1)
     test_user.letzter_login = feiertag - timedelta(days=5)
     isolated_db.commit()
 
-    # Stempel am Feiertag hinzufügen
+    # Stempel am Feiertag und am Werktag davor hinzufügen
     add_stempel(isolated_db, test_user.mitarbeiter_id, feiertag)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, werktag)
 
     # Funktion ausführen
     model.checke_sonn_feiertage()
 
-    # Prüfen, ob die Benachrichtigung erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=6,
-        datum=feiertag
-    ).first()
+    # Nur der Feiertag erhält eine Benachrichtigung, der Werktag davor nicht
+    code6_tage = set(isolated_db.scalars(
+        select(modell.Benachrichtigungen.datum).where(
+            (modell.Benachrichtigungen.mitarbeiter_id == test_user.mitarbeiter_id) &
+            (modell.Benachrichtigungen.benachrichtigungs_code == 6)
+        )
+    ))
 
-    assert ben is not None, "Für Arbeit an einem Feiertag wurde keine Benachrichtigung erstellt."
+    assert code6_tage == {feiertag}, \
+        f"Code 6 genau für den Feiertag {feiertag} erwartet, erhalten für: {sorted(code6_tage)}"
 
 
 def test_arbeit_an_werktag_erzeugt_keine_sonntags_benachrichtigung(model, isolated_db, test_user):
@@ -472,10 +648,7 @@ def test_arbeit_an_werktag_erzeugt_keine_sonntags_benachrichtigung(model, isolat
     model.checke_sonn_feiertage()
 
     # Prüfen, dass KEINE Benachrichtigung erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=6
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 6)
 
     assert ben is None, "Für Arbeit an einem normalen Werktag wurde fälschlicherweise eine Benachrichtigung erstellt."
 
@@ -515,7 +688,7 @@ def test_arbeitsfenster_und_ruhezeit_interaktion(model, isolated_db, test_user):
     
     # Funktion ausführen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
  
     # Erwartung berechnen:
     # Tag 1: 1h Arbeit (statt 2h) - 8h Soll = -7h
@@ -529,14 +702,11 @@ def test_arbeitsfenster_und_ruhezeit_interaktion(model, isolated_db, test_user):
 
     # --- TEIL 2: RUHEZEITPRÜFUNG PRÜFEN ---
 
-    # Funktion ausführen
-    model.checke_ruhezeiten()
+    # Alle Arbeitszeitschutz-Prüfungen in einem Durchlauf ausführen
+    model.checke_arbeitszeitschutz()
 
     # Prüfen, ob die Benachrichtigung (Code 3) für den Verstoß erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=3
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 3)
 
     assert ben is not None, "Ruhezeitverstoß wurde nicht erkannt, obwohl Stempel außerhalb des Arbeitsfensters lagen."
 
@@ -570,7 +740,7 @@ def test_arbeitsfenster_edge_case(model, isolated_db, test_user):
     
     # Funktion ausführen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
  
     # Erwartung berechnen:
     # Tag 1: 0h Arbeit (statt 2h) - 8h Soll = -8h
@@ -598,7 +768,7 @@ def test_arbeitsfenster_edge_case(model, isolated_db, test_user):
     
     # Funktion ausführen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
  
     # Erwartung berechnen:
     # Tag 1: 0h Arbeit (statt 1,5h) - 8h Soll = -8h
@@ -608,3 +778,1035 @@ def test_arbeitsfenster_edge_case(model, isolated_db, test_user):
     assert test_user.gleitzeit == pytest.approx(erwartete_gleitzeit), \
         "Die Gleitzeit wurde falsch berechnet. Zeit außerhalb des Arbeitsfensters wurde mitgezählt."
 
+
+
+def test_tagesarbeitszeit_entspricht_calculatetime(test_user):
+    """
+    Der Ganzzahl-Pfad für get_zeiteinträge muss dieselbe Arbeitszeit liefern
+    wie CalculateTime (Pausenabzug und Arbeitsfenster).
+    """
+    tag = date(2024, 3, 5)
+    paare = [
+        (time(5, 30), time(15, 45)),   # Morgenruhe + 45min Pause
+        (time(8, 0), time(14, 0)),     # genau 6h -> 30min Pause
+        (time(21, 0), time(23, 30)),   # Nachtruhe ab 22 Uhr
+        (time(9, 15, 30, 250), time(11, 0)),
+    ]
+    for start, ende in paare:
+        e1 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=start)
+        e2 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=ende)
+        calc = modell.CalculateTime(e1, e2, test_user)
+        calc.gesetzliche_pausen_hinzufügen()
+        calc.arbeitsfenster_beachten()
+        assert modell._berechne_tagesarbeitszeit([start, ende], False) == calc.gearbeitete_zeit
+
+    # Ausstempeln vor Einstempeln -> langsamer Pfad über CalculateTime
+    assert modell._berechne_tagesarbeitszeit([time(12, 0), time(8, 0)], False) is None
+
+
+def test_update_letzter_login_rollback(model, isolated_db, test_user, monkeypatch):
+    """
+    letzter_login wird auf heute gesetzt; schlägt der Commit fehl,
+    bleibt der alte Wert erhalten.
+    """
+    letzter_login_vorher = test_user.letzter_login
+
+    def _fehler():
+        raise ValueError("Testfehler")
+
+    with monkeypatch.context() as m:
+        m.setattr(isolated_db, "commit", _fehler)
+        result = model.update_letzter_login()
+    assert result["error"] == "Exception"
+    isolated_db.refresh(test_user, ["letzter_login"])
+    assert test_user.letzter_login == letzter_login_vorher
+
+    assert model.update_letzter_login() is True
+    isolated_db.refresh(test_user, ["letzter_login"])
+    assert test_user.letzter_login == date.today()
+
+
+def test_create_fehlermeldung_formate():
+    """
+    Prüft die Benachrichtigungstexte: ISO-Datum, TT.MM.JJJJ für Codes 7-9, feste Texte und unbekannte Codes.
+    """
+    tag = date(2025, 11, 7)
+    b3 = modell.Benachrichtigungen(benachrichtigungs_code=3, datum=tag)
+    assert b3.create_fehlermeldung() == \
+        "Achtung, am 2025-11-07 wurden die gesetzlichen Ruhezeiten nicht eingehalten"
+
+    b7 = modell.Benachrichtigungen(benachrichtigungs_code=7, datum=tag)
+    assert b7.create_fehlermeldung().startswith("In der Woche vom 07.11.2025 ")
+
+    b4 = modell.Benachrichtigungen(benachrichtigungs_code=4, datum=tag)
+    assert b4.create_fehlermeldung() == modell.Benachrichtigungen.CODES[4]
+
+    b1 = modell.Benachrichtigungen(benachrichtigungs_code=1, datum=tag)
+    assert b1.create_fehlermeldung().startswith("An den Tag 2025-11-07 wurde nicht gestempelt.")
+
+    b99 = modell.Benachrichtigungen(benachrichtigungs_code=99, datum=tag)
+    assert b99.create_fehlermeldung().startswith("Unbekannte Benachrichtigung (Code: 99)")
+
+
+def test_normalize_to_date_formate():
+    """
+    Prüft den schnellen Parser und den strptime-Rückfall von _normalize_to_date.
+    """
+    assert modell._normalize_to_date("05.03.2024") == date(2024, 3, 5)
+    assert modell._normalize_to_date("05/03/2024") == date(2024, 3, 5)
+    assert modell._normalize_to_date("2024-03-05") == date(2024, 3, 5)
+    assert modell._normalize_to_date("5.3.2024") == date(2024, 3, 5)
+    assert modell._normalize_to_date("30.02.2024") is None
+    assert modell._fast_parse_datum("05/03/2024", ".") is None
+
+
+def test_get_employees_liefert_unterstellte_und_eigenen_namen(model, isolated_db, test_user):
+    """
+    get_employees liefert die Namen aller unterstellten Mitarbeiter plus den eigenen Namen.
+    """
+    isolated_db.add(
+        modell.mitarbeiter(
+            name="Azubi", password="x", vertragliche_wochenstunden=40,
+            geburtsdatum=date(2000, 1, 1), letzter_login=date.today(),
+            vorgesetzter_id=test_user.mitarbeiter_id,
+        )
+    )
+    isolated_db.commit()
+    model.aktueller_nutzer_name = test_user.name
+
+    model.get_employees()
+    assert model.mitarbeiter == ["Azubi", "Testuser"]
+
+
+def test_get_zeiteintraege_markiert_stempel_ausserhalb_arbeitsfenster(model, isolated_db, test_user):
+    """
+    Stempel außerhalb von 06:00-22:00 werden in der Kalenderansicht als problematisch markiert.
+    """
+    tag = date(2024, 3, 5)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "05:59", "22:00")
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "22:01", "22:30")
+
+    model.aktuelle_kalendereinträge_für_id = test_user.mitarbeiter_id
+    model.bestimmtes_datum = tag.strftime("%d.%m.%Y")
+    model.get_zeiteinträge()
+
+    markierungen = [(e.zeit, ungueltig) for e, ungueltig in model.zeiteinträge_bestimmtes_datum]
+    assert markierungen == [
+        (time(5, 59), True), (time(22, 0), False), (time(22, 1), True), (time(22, 30), True)
+    ]
+
+
+def test_ist_sonn_oder_feiertag(model):
+    """
+    Feiertage (über die Ordinal-Menge), Sonntage und Werktage werden korrekt erkannt.
+    """
+    assert model.ist_sonn_oder_feiertag(date(2024, 10, 3)) is True    # Tag der Deutschen Einheit
+    assert model.ist_sonn_oder_feiertag("06/10/2024") is True         # Sonntag
+    assert model.ist_sonn_oder_feiertag(date(2024, 10, 4)) is False   # Freitag
+
+
+def test_bulk_delete_urlaub_und_popups(model, isolated_db, test_user):
+    """
+    Urlaubseinträge und heutige PopUps werden mit einem DELETE entfernt;
+    die Rückgabe entspricht der Anzahl gelöschter Zeilen.
+    """
+    mid = test_user.mitarbeiter_id
+    tag = date(2024, 3, 5)
+    popup = modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=10, datum=date.today(),
+                                      ist_popup=True, popup_uhrzeit=time(21, 0))
+    isolated_db.add_all([
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=tag, typ="Urlaub"),
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=tag, typ="Krankheit"),
+        popup,
+        modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=3, datum=date.today()),
+    ])
+    isolated_db.commit()
+    popup_id = popup.id
+
+    assert model.loesche_urlaub_am_datum(tag) == 1
+    assert isolated_db.query(modell.Abwesenheit).filter_by(mitarbeiter_id=mid).count() == 1
+
+    assert model.delete_all_popup_benachrichtigungen_for_today() == 1
+    verbleibend = isolated_db.query(modell.Benachrichtigungen).filter_by(mitarbeiter_id=mid).all()
+    assert [b.benachrichtigungs_code for b in verbleibend] == [3]
+    # Gelöschtes PopUp ist auch aus der Session entfernt und wird nicht erneut gefunden
+    assert popup not in isolated_db
+    assert model.delete_popup_benachrichtigung(popup_id) is False
+
+
+def test_manueller_stempel_an_abwesenheitstag_abgelehnt(model, isolated_db, test_user):
+    """
+    Mehrere Abwesenheiten am selben Tag blockieren den manuellen Stempel ebenso wie eine einzelne.
+    """
+    tag = date(2024, 3, 5)
+    isolated_db.add_all([
+        modell.Abwesenheit(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, typ="Urlaub"),
+        modell.Abwesenheit(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, typ="Urlaub"),
+    ])
+    isolated_db.commit()
+
+    assert model.hat_urlaub_am_datum(tag) is True
+    assert model.hat_urlaub_am_datum(tag + timedelta(days=1)) is False
+
+    model.nachtragen_datum = tag.strftime("%d/%m/%Y")
+    model.manueller_stempel_uhrzeit = "08:00"
+    model.manueller_stempel_hinzufügen()
+    assert model.feedback_manueller_stempel == "An diesem Tag ist bereits eine Abwesenheit eingetragen."
+
+
+def test_get_abwesenheiten_monat(model, isolated_db, test_user):
+    """
+    Urlaubs- und Krankheitstage eines Monats werden gemeinsam geladen und getrennt zurückgegeben.
+    """
+    mid = test_user.mitarbeiter_id
+    isolated_db.add_all([
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=date(2024, 3, 4), typ="Urlaub"),
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=date(2024, 3, 5), typ="Krankheit"),
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=date(2024, 3, 6), typ="Fortbildung"),
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=date(2024, 4, 1), typ="Urlaub"),
+    ])
+    isolated_db.commit()
+    model.aktuelle_kalendereinträge_für_id = mid
+
+    urlaub, krank = model.get_abwesenheiten_monat(2024, 3)
+    assert urlaub == [date(2024, 3, 4)]
+    assert krank == [date(2024, 3, 5)]
+    assert model.get_urlaubstage_monat(2024, 3) == model.urlaubstage_aktueller_monat == urlaub
+    assert model.get_krankheitstage_monat(2024, 3) == krank
+
+
+def test_durchschnittliche_gleitzeit_mit_historienwechsel(model, isolated_db, test_user):
+    """
+    Die einmal geladene Historie liefert je Tag die zum Datum gültigen Wochenstunden.
+    """
+    mid = test_user.mitarbeiter_id
+    isolated_db.add_all([
+        modell.VertragswochenstundenHistorie(mitarbeiter_id=mid, gueltig_ab=date(2024, 1, 1), wochenstunden=40),
+        modell.VertragswochenstundenHistorie(mitarbeiter_id=mid, gueltig_ab=date(2024, 1, 10), wochenstunden=20),
+    ])
+    isolated_db.commit()
+    add_stempel(isolated_db, mid, date(2024, 1, 8), "08:00", "16:30")
+    add_stempel(isolated_db, mid, date(2024, 1, 10), "08:00", "16:30")
+
+    result = model.berechne_durchschnittliche_gleitzeit(date(2024, 1, 8), date(2024, 1, 10))
+
+    # 08.01.: 8h bei 8h Soll -> 0h; 10.01.: 8h bei 4h Soll -> +4h
+    assert result["berücksichtigte_tage"] == [date(2024, 1, 8), date(2024, 1, 10)]
+    assert result["gesamt_gleitzeit_stunden"] == pytest.approx(4.0)
+
+
+def test_durchschnittliche_gleitzeit_mit_fehlenden_tagen(model, isolated_db, test_user):
+    """
+    Mit include_missing_days zählen Werktage ohne Stempel mit voller Sollzeit ins Minus;
+    das Wochenende bleibt unberücksichtigt.
+    """
+    mid = test_user.mitarbeiter_id
+    isolated_db.add(modell.VertragswochenstundenHistorie(mitarbeiter_id=mid, gueltig_ab=date(2024, 1, 1), wochenstunden=40))
+    isolated_db.commit()
+    add_stempel(isolated_db, mid, date(2024, 1, 8), "08:00", "17:45")
+
+    ohne = model.berechne_durchschnittliche_gleitzeit(date(2024, 1, 8), date(2024, 1, 14))
+    mit = model.berechne_durchschnittliche_gleitzeit(date(2024, 1, 8), date(2024, 1, 14), include_missing_days=True)
+
+    assert ohne["anzahl_tage"] == 1
+    assert ohne["durchschnitt_gleitzeit_stunden"] == pytest.approx(1.0)
+    assert mit["anzahl_tage"] == 5
+    assert mit["gesamt_gleitzeit_stunden"] == pytest.approx(-31.0)
+    assert mit["durchschnitt_gleitzeit_stunden"] == pytest.approx(-6.2)
+
+
+@pytest.mark.parametrize("include_missing", [False, True])
+def test_kummuliere_gleitzeit_entspricht_einzelberechnung(model, isolated_db, test_user, include_missing):
+    """
+    Monat und Quartal werden aus der Jahresberechnung abgeleitet und stimmen mit
+    einer getrennten Berechnung je Zeitraum überein.
+    """
+    mid = test_user.mitarbeiter_id
+    heute = date.today()
+    for abstand, ende in ((1, "17:45"), (40, "15:00"), (100, "18:00")):
+        tag = heute - timedelta(days=abstand)
+        if tag.year == heute.year:
+            add_stempel(isolated_db, mid, tag, "08:00", ende)
+    model.tage_ohne_stempel_beachten = include_missing
+
+    model.kummuliere_gleitzeit()
+
+    start_quartal = heute.replace(month=((heute.month - 1) // 3) * 3 + 1, day=1)
+    for start, wert in (
+        (heute.replace(day=1), model.kummulierte_gleitzeit_monat),
+        (start_quartal, model.kummulierte_gleitzeit_quartal),
+        (heute.replace(month=1, day=1), model.kummulierte_gleitzeit_jahr),
+    ):
+        einzeln = model.berechne_durchschnittliche_gleitzeit(start, heute, include_missing)
+        assert wert == pytest.approx(round(einzeln["gesamt_gleitzeit_stunden"], 2))
+
+
+def test_kummuliere_gleitzeit_liest_stempel_nur_einmal(model, isolated_db, test_user, monkeypatch):
+    """
+    Monat, Quartal und Jahr entstehen aus genau einer Paarbildung über das laufende Jahr.
+    """
+    heute = date.today()
+    add_stempel(isolated_db, test_user.mitarbeiter_id, heute.replace(month=1, day=1), "08:00", "16:00")
+    model.tage_ohne_stempel_beachten = False
+
+    aufrufe = []
+    original = model._arbeitszeit_je_tag
+
+    def gezaehlt(nutzer, start_datum, end_datum):
+        aufrufe.append((start_datum, end_datum))
+        return original(nutzer, start_datum, end_datum)
+
+    monkeypatch.setattr(model, "_arbeitszeit_je_tag", gezaehlt)
+    model.kummuliere_gleitzeit()
+
+    assert aufrufe == [(heute.replace(month=1, day=1), heute)]
+
+
+def test_checke_arbeitszeitschutz_bildet_stempelpaare_einmal(model, isolated_db, test_user):
+    """
+    Durchschnitts-, Höchstarbeitszeit- und Korrektur-Prüfungen teilen sich eine
+    vorgeladene Arbeitszeit je Tag; die Paar-Abfrage läuft nur einmal.
+    """
+    mid = test_user.mitarbeiter_id
+    gestern = date.today() - timedelta(days=1)
+    for abstand in range(1, 8):
+        add_stempel(isolated_db, mid, gestern - timedelta(days=abstand), "07:00", "18:30")
+
+    paar_abfragen = []
+
+    def zaehle(conn, cursor, statement, parameters, context, executemany):
+        if "row_number()" in statement.lower():
+            paar_abfragen.append(statement)
+
+    verbindung = isolated_db.connection()
+    event.listen(verbindung, "before_cursor_execute", zaehle)
+    try:
+        model.checke_arbeitszeitschutz()
+    finally:
+        event.remove(verbindung, "before_cursor_execute", zaehle)
+
+    codes = set(isolated_db.scalars(
+        select(modell.Benachrichtigungen.benachrichtigungs_code).where(modell.Benachrichtigungen.mitarbeiter_id == mid)
+    ))
+    assert {4, 5} <= codes
+    assert len(paar_abfragen) == 1
+    assert model._arbeitszeit_vorrat is None
+
+
+def test_ohne_stempel_entfaellt_gleitzeitauswertung(model, isolated_db, test_user, monkeypatch):
+    """
+    Ohne Stempel im Zeitraum prüft ein EXISTS vorab, die Auswertung je Tag läuft gar nicht erst.
+    """
+    mid = test_user.mitarbeiter_id
+    assert not model._hat_stempel_im_zeitraum(mid, date(2024, 1, 1), date(2024, 1, 31))
+
+    def nicht_aufrufen(*args, **kwargs):
+        raise AssertionError("Auswertung trotz leerem Zeitraum")
+
+    monkeypatch.setattr(model, "_gleitzeit_differenzen_je_tag", nicht_aufrufen)
+    monkeypatch.setattr(model, "_arbeitszeit_je_tag", nicht_aufrufen)
+    model.tage_ohne_stempel_beachten = False
+
+    ergebnis = model.berechne_durchschnittliche_gleitzeit(date(2024, 1, 1), date(2024, 1, 31))
+    model.kummuliere_gleitzeit()
+    model.checke_durchschnittliche_arbeitszeit()
+
+    assert ergebnis["anzahl_tage"] == 0
+    assert model.kummulierte_gleitzeit_jahr == 0.0
+
+    add_stempel(isolated_db, mid, date(2024, 1, 8), "08:00", "16:00")
+    assert model._hat_stempel_im_zeitraum(mid, date(2024, 1, 1), date(2024, 1, 31))
+    assert model._hat_stempel_im_zeitraum(mid, date(2024, 1, 1), date(2024, 1, 31), nur_unvalidiert=True)
+    assert not model._hat_stempel_im_zeitraum(mid, date(2024, 1, 9), date(2024, 1, 31))
+
+
+def test_login_prueft_nur_id_und_hash(isolated_db, test_user, monkeypatch):
+    """
+    Login vergleicht gegen den bcrypt-Hash; auch ein unbekannter Name durchläuft
+    genau eine Hash-Prüfung (gegen den Dummy-Hash).
+    """
+    test_user.password = modell.hash_password("geheim123")
+    isolated_db.commit()
+    pruefungen = []
+    original = modell.verify_password
+    monkeypatch.setattr(modell, "verify_password", lambda pw, h: pruefungen.append(h) or original(pw, h))
+
+    login = modell.ModellLogin()
+    login.anmeldung_name, login.anmeldung_passwort = "Testuser", "geheim123"
+    assert login.login() is True
+    assert login.anmeldung_mitarbeiter_id_validiert == test_user.mitarbeiter_id
+
+    login.anmeldung_passwort = "falsch"
+    assert login.login() is False
+
+    login.anmeldung_name = "Unbekannt"
+    assert login.login() is False
+    assert login.anmeldung_rückmeldung == "Passwort oder Nutzername falsch"
+    assert pruefungen[-1] == modell._DUMMY_PASSWORT_HASH
+    assert len(pruefungen) == 3
+
+
+def test_safe_db_operation_commit_und_rollback(model, isolated_db, test_user):
+    """
+    _safe_db_operation gibt den Rückgabewert direkt zurück und rollt bei Fehlern zurück.
+    """
+    gleitzeit_vorher = test_user.gleitzeit
+
+    def _setzen_und_fehler():
+        test_user.gleitzeit = 99
+        raise ValueError("Testfehler")
+
+    result = model._safe_db_operation(_setzen_und_fehler)
+    assert result["error"] == "Exception"
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == gleitzeit_vorher
+
+    assert model._safe_db_operation(lambda x, y=0: x + y, 1, y=2) == 3
+
+
+def test_stempel_eines_tages_nutzen_index_ohne_sortierung(isolated_db):
+    """
+    Die Tagesabfrage der Stempel wird über ix_ze_mid_datum_zeit beantwortet,
+    ohne dass SQLite für ORDER BY zusätzlich sortieren muss.
+    """
+    stmt = modell.select(modell.Zeiteintrag).where(
+        (modell.Zeiteintrag.mitarbeiter_id == 1) &
+        (modell.Zeiteintrag.datum == date(2024, 1, 8))
+    ).order_by(modell.Zeiteintrag.zeit)
+    sql = str(stmt.compile(isolated_db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[3] for row in isolated_db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+
+    assert "ix_ze_mid_datum_zeit" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_get_pending_popups_filtert_vergangene_in_sql(model, isolated_db, test_user):
+    """
+    Nur heutige PopUps mit Uhrzeit in der Zukunft werden geliefert, aufsteigend nach Uhrzeit.
+    """
+    mid = test_user.mitarbeiter_id
+    heute = date.today()
+    isolated_db.add_all([
+        modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=11, datum=heute,
+                                  ist_popup=True, popup_uhrzeit=time(23, 59, 59, 999999)),
+        modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=10, datum=heute,
+                                  ist_popup=True, popup_uhrzeit=time(23, 59, 59, 999998)),
+        modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=10, datum=heute - timedelta(days=1),
+                                  ist_popup=True, popup_uhrzeit=time(23, 59, 59, 999999)),
+        modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=9, datum=heute,
+                                  ist_popup=True, popup_uhrzeit=time(0, 0)),
+        modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=4, datum=heute, ist_popup=True),
+    ])
+    isolated_db.commit()
+
+    pending = model.get_pending_popups_for_today()
+
+    assert [(code, uhrzeit) for code, uhrzeit, _ in pending] == [
+        (10, time(23, 59, 59, 999998)),
+        (11, time(23, 59, 59, 999999)),
+    ]
+
+
+def test_revert_gleitzeit_zieht_angerechnete_tageszeit_ab(model, isolated_db, test_user):
+    """
+    Beim Zurücksetzen eines validierten Tages wird genau die zuvor angerechnete
+    Differenz (inkl. Pausen- und Arbeitsfensterabzug) von der Gleitzeit abgezogen.
+    """
+    tag = date(2024, 1, 10)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "08:00", "18:00")  # 10h - 45min Pause
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "19:00", "23:00")  # nur bis 22:00 angerechnet
+    for e in isolated_db.query(modell.Zeiteintrag).all():
+        e.validiert = True
+    # 9,25h + 3h gearbeitet bei 8h Sollzeit
+    test_user.gleitzeit = 4.25
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = 4.25
+
+    model.set_entries_unvalidated_and_revert_gleitzeit(tag.strftime("%d/%m/%Y"))
+
+    isolated_db.refresh(test_user, ["gleitzeit", "letzter_login"])
+    assert test_user.gleitzeit == pytest.approx(0.0)
+    assert test_user.letzter_login == tag
+    assert not any(e.validiert for e in isolated_db.query(modell.Zeiteintrag).all())
+
+
+def test_aktualisiere_wochenstunden_upsert_selbes_datum(model, isolated_db, test_user):
+    """
+    Eine zweite Änderung mit demselben Gültigkeitsdatum überschreibt den Historieneintrag.
+    """
+    stichtag = date(2024, 5, 1)
+    model.aktualisiere_vertragliche_wochenstunden(30, gueltig_ab=stichtag)
+    result = model.aktualisiere_vertragliche_wochenstunden(25, gueltig_ab=stichtag)
+
+    assert result["alte_wochenstunden"] == 30
+    historie = isolated_db.query(modell.VertragswochenstundenHistorie).filter_by(
+        mitarbeiter_id=test_user.mitarbeiter_id
+    ).all()
+    assert [(h.gueltig_ab, h.wochenstunden) for h in historie] == [(stichtag, 25)]
+    isolated_db.refresh(test_user, ["vertragliche_wochenstunden"])
+    assert test_user.vertragliche_wochenstunden == 25
+
+
+def test_revert_gleitzeit_bei_fehlstempel_benachrichtigung(model, isolated_db, test_user):
+    """
+    Existiert für den Tag eine Fehlstempel-Benachrichtigung (Code 1), wird die abgezogene
+    Sollzeit wieder gutgeschrieben und die Benachrichtigung gelöscht.
+    """
+    tag = date(2024, 1, 10)
+    isolated_db.add(modell.Benachrichtigungen(
+        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=1, datum=tag
+    ))
+    test_user.gleitzeit = -8
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = -8
+
+    model.set_entries_unvalidated_and_revert_gleitzeit(tag.strftime("%d/%m/%Y"))
+
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == pytest.approx(0.0)
+    assert isolated_db.query(modell.Benachrichtigungen).filter_by(
+        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=1
+    ).count() == 0
+
+
+def test_get_stempel_status_heute(model, isolated_db, test_user):
+    """
+    Anzahl und letzte Uhrzeit der heutigen Stempel kommen aus einer Aggregat-Abfrage.
+    """
+    assert model.get_stempel_status_heute() == (0, None)
+
+    add_stempel(isolated_db, test_user.mitarbeiter_id, date.today(), "08:00", "12:00")
+    isolated_db.add(modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=date.today(), zeit=time(12, 30)))
+    add_stempel(isolated_db, test_user.mitarbeiter_id, date.today() - timedelta(days=1), "08:00", "18:00")
+
+    assert model.get_stempel_status_heute() == (3, time(12, 30))
+
+
+def test_set_ampel_farbe_mit_vorgewandelten_schwellen(model):
+    """
+    Ampelschwellen werden bei Zuweisung gewandelt; ungültige Werte führen zu Gelb.
+    """
+    model.aktueller_nutzer_ampel_grün = "5"
+    model.aktueller_nutzer_ampel_rot = 10
+
+    for gleitzeit, farbe in [(0, "green"), (-5, "green"), (7.5, "yellow"), (-10, "yellow"), (10.5, "red")]:
+        model.aktueller_nutzer_gleitzeit = gleitzeit
+        model.set_ampel_farbe()
+        assert model.ampel_status == farbe
+
+    model.aktueller_nutzer_ampel_rot = "abc"
+    assert model.aktueller_nutzer_ampel_rot == "abc"
+    model.set_ampel_farbe()
+    assert model.ampel_status == "yellow"
+
+
+def test_get_pending_popups_cache_wird_bei_aenderung_verworfen(model, isolated_db, test_user):
+    """
+    Das zwischengespeicherte PopUp-Ergebnis wird beim Anlegen und Löschen von PopUps verworfen.
+    """
+    assert model.get_pending_popups_for_today() == []
+
+    model._add_benachrichtigung_safe(11, date.today(), ist_popup=True, popup_uhrzeit=time(23, 59, 59, 999999))
+    pending = model.get_pending_popups_for_today()
+    assert [code for code, _, _ in pending] == [11]
+
+    assert model.delete_popup_benachrichtigung(pending[0][2]) is True
+    assert model.get_pending_popups_for_today() == []
+
+
+def test_manueller_stempel_duplikat_abgelehnt(model, isolated_db, test_user):
+    """
+    Ein identischer Stempel (gleiches Datum, gleiche Uhrzeit) wird nicht erneut angelegt.
+    """
+    tag = date(2024, 3, 5)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "08:00", "16:00")
+
+    model.nachtragen_datum = tag.strftime("%d/%m/%Y")
+    model.manueller_stempel_uhrzeit = "08:00"
+    model.manueller_stempel_hinzufügen()
+
+    assert model.feedback_manueller_stempel == "Ein identischer Stempel existiert bereits."
+    assert isolated_db.query(modell.Zeiteintrag).filter_by(mitarbeiter_id=test_user.mitarbeiter_id).count() == 2
+
+
+def test_get_nutzer_verwendet_cache_fuer_eingeloggten_nutzer(model, isolated_db, test_user):
+    """
+    Der eingeloggte Nutzer kommt aus dem Cache, andere Mitarbeiter werden aus der DB geladen.
+    """
+    kollege = modell.mitarbeiter(
+        name="Kollege", password="1234", vertragliche_wochenstunden=20,
+        geburtsdatum=date(1985, 5, 5), gleitzeit=0, letzter_login=date.today(),
+    )
+    isolated_db.add(kollege)
+    isolated_db.commit()
+
+    model.get_user_info()
+    assert model._get_nutzer(test_user.mitarbeiter_id) is model._cached_aktueller_nutzer
+    assert model._get_nutzer(kollege.mitarbeiter_id).name == "Kollege"
+    assert model._get_nutzer(9999) is None
+
+
+def test_checke_arbeitstage_mit_vorgeladenen_stempeln_und_abwesenheiten(model, isolated_db, test_user):
+    """
+    Fehlende Werktage werden aus einer Stempel-Abfrage ermittelt; Tage mit (auch mehreren)
+    Abwesenheiten werden erkannt und ohne Gleitzeitabzug übersprungen.
+    """
+    mid = test_user.mitarbeiter_id
+    gestern = date.today() - timedelta(days=1)
+    werktage = werktage_zwischen(test_user.letzter_login, gestern)
+    ohne_alles, mit_abwesenheit = werktage[0], werktage[1]
+    for tag in werktage[2:]:
+        add_stempel(isolated_db, mid, tag, "08:00", "16:30")
+    isolated_db.add_all([
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=mit_abwesenheit, typ="Urlaub"),
+        modell.Abwesenheit(mitarbeiter_id=mid, datum=mit_abwesenheit, typ="Fortbildung"),
+    ])
+    isolated_db.commit()
+
+    fehlende = model.checke_arbeitstage()
+
+    assert fehlende == [ohne_alles, mit_abwesenheit]
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == pytest.approx(-8.0)
+    code1 = isolated_db.query(modell.Benachrichtigungen).filter_by(mitarbeiter_id=mid, benachrichtigungs_code=1).all()
+    assert [b.datum for b in code1] == [ohne_alles]
+
+
+def test_checke_arbeitstage_zieht_pro_tag_nur_einmal_ab(model, isolated_db, test_user):
+    """
+    Bereits benachrichtigte Fehltage (Code 1) werden bei erneuter Prüfung nicht nochmals abgezogen.
+    """
+    mid = test_user.mitarbeiter_id
+
+    model.checke_arbeitstage()
+    model.checke_arbeitstage()
+
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    anzahl_code1 = isolated_db.query(modell.Benachrichtigungen).filter_by(
+        mitarbeiter_id=mid, benachrichtigungs_code=1
+    ).count()
+    assert anzahl_code1 > 0
+    assert test_user.gleitzeit == pytest.approx(-8.0 * anzahl_code1)
+    assert model.aktueller_nutzer_gleitzeit == pytest.approx(test_user.gleitzeit)
+
+
+def test_add_benachrichtigungen_bulk_ueberspringt_vorhandene(model, isolated_db, test_user):
+    """
+    Mehrere Tage werden gemeinsam angelegt; vorhandene Benachrichtigungen und
+    doppelte Tage in der Eingabe führen zu keinen Duplikaten.
+    """
+    mid = test_user.mitarbeiter_id
+    tag1 = date.today() - timedelta(days=3)
+    tag2 = date.today() - timedelta(days=2)
+    isolated_db.add(modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=2, datum=tag1))
+    isolated_db.commit()
+
+    angelegt = model._add_benachrichtigungen_bulk(2, [tag1, tag2, tag2])
+
+    assert angelegt == 1
+    daten = sorted(
+        b.datum for b in isolated_db.query(modell.Benachrichtigungen).filter_by(
+            mitarbeiter_id=mid, benachrichtigungs_code=2
+        )
+    )
+    assert daten == [tag1, tag2]
+    assert model._add_benachrichtigungen_bulk(2, []) == 0
+
+
+def test_session_verwirft_objekte_nach_commit_nicht(isolated_db, test_user):
+    """
+    Die Anwendungs-Session behält geladene Objekte nach einem Commit (expire_on_commit=False):
+    Bearbeiten und Löschen eines Stempels über mehrere Commits lösen keine Nachlade-SELECTs aus.
+    """
+    verbindung = isolated_db.get_bind()
+    app_session = modell.Session.session_factory(bind=verbindung, join_transaction_mode="create_savepoint")
+    selects = []
+
+    def _mitschreiben(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    eintrag = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=date(2024, 1, 10), zeit=time(8, 0))
+    app_session.add(eintrag)
+    app_session.commit()
+
+    event.listen(verbindung, "before_cursor_execute", _mitschreiben)
+    try:
+        assert eintrag.id is not None and eintrag.zeit == time(8, 0)
+
+        eintrag.zeit = time(8, 30)
+        app_session.commit()
+        assert (eintrag.datum, eintrag.zeit) == (date(2024, 1, 10), time(8, 30))
+
+        app_session.delete(eintrag)
+        app_session.commit()
+        assert eintrag.mitarbeiter_id == test_user.mitarbeiter_id
+    finally:
+        event.remove(verbindung, "before_cursor_execute", _mitschreiben)
+        app_session.close()
+
+    assert selects == []
+    assert isolated_db.get(modell.Zeiteintrag, eintrag.id) is None
+
+
+def test_revert_gleitzeit_ohne_commit_wird_mit_rollback_verworfen(model, isolated_db, test_user):
+    """
+    Mit commit=False bleibt die Rücksetzung Teil der Transaktion des Aufrufers:
+    ein Rollback verwirft sie, die Modell-Gleitzeit wird danach neu geladen.
+    """
+    tag = date(2024, 1, 10)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "08:00", "18:00")  # 9,25h bei 8h Sollzeit
+    for e in isolated_db.query(modell.Zeiteintrag).all():
+        e.validiert = True
+    test_user.gleitzeit = 1.25
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = 1.25
+
+    model.set_entries_unvalidated_and_revert_gleitzeit(tag.strftime("%d/%m/%Y"), commit=False)
+    assert model.aktueller_nutzer_gleitzeit == pytest.approx(0.0)
+    isolated_db.rollback()
+    model._gleitzeit_nach_rollback_synchronisieren()
+
+    assert model.aktueller_nutzer_gleitzeit == pytest.approx(1.25)
+    assert all(e.validiert for e in isolated_db.query(modell.Zeiteintrag).all())
+
+
+def test_berechne_gleitzeit_validiert_einträge_per_update(model, isolated_db, test_user):
+    """
+    Verarbeitete Paare werden per UPDATE validiert; ein einzelner offener Stempel bleibt
+    unvalidiert und bereits geladene Objekte zeigen den neuen Stand.
+    """
+    mid = test_user.mitarbeiter_id
+    tag = date.today() - timedelta(days=2)
+    add_stempel(isolated_db, mid, tag, "08:00", "16:30")
+    offen = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=time(17, 0))
+    isolated_db.add(offen)
+    isolated_db.commit()
+    geladen = isolated_db.query(modell.Zeiteintrag).order_by(modell.Zeiteintrag.zeit).all()
+
+    model.berechne_gleitzeit()
+
+    assert [e.validiert for e in geladen] == [True, True, False]
+
+
+def test_berechne_gleitzeit_code1_und_validierter_tag_in_einem_lauf(model, isolated_db, test_user):
+    """
+    Fehltag (Code 1) und Tag mit bereits validierten Einträgen werden im selben Lauf
+    erkannt: an beiden zählt nur die neue Arbeitszeit, ohne erneuten Sollzeit-Abzug.
+    """
+    mid = test_user.mitarbeiter_id
+    fehltag = date(2024, 1, 10)
+    validierter_tag = date(2024, 1, 11)
+    isolated_db.add(modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=1, datum=fehltag))
+    add_stempel(isolated_db, mid, validierter_tag, "08:00", "12:00")
+    for e in isolated_db.query(modell.Zeiteintrag).all():
+        e.validiert = True
+    isolated_db.commit()
+    add_stempel(isolated_db, mid, fehltag, "09:00", "11:00")
+    add_stempel(isolated_db, mid, validierter_tag, "13:00", "14:30")
+    test_user.gleitzeit = 0.0
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = 0.0
+
+    model.berechne_gleitzeit()
+
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == pytest.approx(3.5)
+
+
+def test_berechne_gleitzeit_mehrere_paare_mit_arbeitsfenster(model, isolated_db, test_user):
+    """
+    Mehrere Paare eines Tages werden je Paar mit Pause und Arbeitsfenster verrechnet;
+    ein übrig bleibender Stempel bleibt unvalidiert.
+    """
+    mid = test_user.mitarbeiter_id
+    tag = date(2024, 1, 10)
+    add_stempel(isolated_db, mid, tag, "05:00", "09:00")
+    add_stempel(isolated_db, mid, tag, "10:00", "23:00")
+    isolated_db.add(modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=time(23, 30)))
+    test_user.gleitzeit = 0.0
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = 0.0
+
+    model.berechne_gleitzeit()
+
+    # 05-09: 4h - 1h vor 6 Uhr = 3h; 10-23: 13h - 45min Pause - 1h nach 22 Uhr = 11,25h; Soll 8h
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == pytest.approx(6.25)
+    offen = isolated_db.query(modell.Zeiteintrag).filter_by(validiert=False).all()
+    assert [e.zeit for e in offen] == [time(23, 30)]
+
+
+def test_berechne_gleitzeit_ohne_paar_bricht_frueh_ab(model, isolated_db, test_user):
+    """
+    Ohne vollständiges Paar bleibt die Gleitzeit unverändert; der Modellwert wird
+    trotzdem mit dem Nutzer abgeglichen und der Einzelstempel bleibt unvalidiert.
+    """
+    mid = test_user.mitarbeiter_id
+    isolated_db.add(modell.Zeiteintrag(mitarbeiter_id=mid, datum=date(2024, 1, 10), zeit=time(8, 0)))
+    test_user.gleitzeit = 2.5
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = 0.0
+
+    model.berechne_gleitzeit()
+
+    assert model.aktueller_nutzer_gleitzeit == pytest.approx(2.5)
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == pytest.approx(2.5)
+    assert not isolated_db.query(modell.Zeiteintrag).one().validiert
+
+
+def test_revert_gleitzeit_akzeptiert_date_objekt(model, isolated_db, test_user):
+    """
+    Aufrufer mit vorhandenem date-Objekt übergeben es direkt, ohne Umweg über einen String.
+    """
+    tag = date(2024, 1, 10)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, tag, "08:00", "18:00")
+    for e in isolated_db.query(modell.Zeiteintrag).all():
+        e.validiert = True
+    test_user.gleitzeit = 1.25
+    isolated_db.commit()
+    model.aktueller_nutzer_gleitzeit = 1.25
+
+    model.set_entries_unvalidated_and_revert_gleitzeit(tag)
+
+    isolated_db.refresh(test_user, ["gleitzeit"])
+    assert test_user.gleitzeit == pytest.approx(0.0)
+    assert not any(e.validiert for e in isolated_db.query(modell.Zeiteintrag).all())
+
+
+def test_urlaub_eintragen_ueber_fehltag_und_doppelt(model, isolated_db, test_user):
+    """
+    Urlaub auf einem Fehltag (Code 1) gibt den Sollzeit-Abzug zurück und entfernt die
+    Benachrichtigung; ein zweiter Eintrag am selben Tag meldet den vorhandenen Typ.
+    """
+    mid = test_user.mitarbeiter_id
+    tag = date(2024, 1, 10)
+    isolated_db.add(modell.Benachrichtigungen(mitarbeiter_id=mid, benachrichtigungs_code=1, datum=tag))
+    test_user.gleitzeit = -8.0
+    isolated_db.commit()
+    model.nachtragen_datum = tag.strftime("%d/%m/%Y")
+    model.neuer_abwesenheitseintrag_art = "Urlaub"
+
+    model.urlaub_eintragen()
+
+    assert model.feedback_manueller_stempel.endswith("erfolgreich eingetragen")
+    assert model.aktueller_nutzer_gleitzeit == pytest.approx(0.0)
+    assert isolated_db.query(modell.Benachrichtigungen).filter_by(mitarbeiter_id=mid).count() == 0
+
+    model.neuer_abwesenheitseintrag_art = "Krankheit"
+    model.urlaub_eintragen()
+
+    assert model.feedback_manueller_stempel == "An diesem Tag ist bereits 'Urlaub' eingetragen."
+
+
+def test_add_benachrichtigung_safe_legt_nur_einmal_an(model, isolated_db, test_user):
+    """Die EXISTS-Prüfung verhindert eine zweite Benachrichtigung mit gleichem Code und Datum."""
+    tag = date.today() - timedelta(days=1)
+
+    model._add_benachrichtigung_safe(5, tag)
+    model._add_benachrichtigung_safe(5, tag)
+
+    assert isolated_db.query(modell.Benachrichtigungen).filter_by(
+        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=5, datum=tag
+    ).count() == 1
+
+
+@pytest.mark.parametrize("durchlauf", [1, 2])
+def test_isolated_db_rollt_commits_zwischen_tests_zurueck(isolated_db, test_user, durchlauf):
+    """
+    Die Datenbank wird pro Modul nur einmal angelegt; Commits eines Tests (auch
+    aus modell.py über session.commit()) sind im nächsten Test nicht mehr sichtbar.
+    """
+    assert isolated_db.scalars(select(modell.mitarbeiter.name)).all() == ["Testuser"]
+    assert isolated_db.scalars(select(modell.Zeiteintrag.id)).all() == []
+
+    add_stempel(isolated_db, test_user.mitarbeiter_id, date(2024, 1, 8))
+    modell.session.commit()
+    assert len(isolated_db.scalars(select(modell.Zeiteintrag.id)).all()) == 2
+
+
+def test_initialize_indexes_legt_code_index_an(tmp_path):
+    """
+    Auch Datenbanken aus initialize_database (ohne UNIQUE-Constraint auf benachrichtigungen)
+    beantworten Code-Prüfungen über ix_ben_mid_code_datum statt per Tabellenscan.
+    """
+    import sqlite3
+
+    db_path = str(tmp_path / "index_test.db")
+    modell.initialize_database(db_path)
+    modell.initialize_indexes(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT datum FROM benachrichtigungen "
+            "WHERE mitarbeiter_id = 1 AND benachrichtigungs_code = 1 AND datum BETWEEN '2024-01-01' AND '2024-01-31'"
+        ))
+    finally:
+        conn.close()
+
+    assert "ix_ben_mid_code_datum" in plan
+
+
+def test_initialize_indexes_deckt_validiert_abfragen_ab(tmp_path):
+    """
+    Die Abfragen der Gleitzeitberechnung auf validiert laufen als Suche über den
+    abdeckenden Index ix_ze_mid_val_datum_zeit.
+    """
+    import sqlite3
+
+    db_path = str(tmp_path / "index_test.db")
+    modell.initialize_database(db_path)
+    modell.initialize_indexes(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        plaene = [
+            " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+            for sql in (
+                "SELECT id, datum, zeit FROM zeiteinträge WHERE mitarbeiter_id = 1 AND validiert = 0 "
+                "ORDER BY datum, zeit",
+                "SELECT DISTINCT datum FROM zeiteinträge WHERE mitarbeiter_id = 1 AND validiert = 1 "
+                "AND datum BETWEEN '2024-01-01' AND '2024-12-31'",
+            )
+        ]
+    finally:
+        conn.close()
+
+    for plan in plaene:
+        assert "COVERING INDEX ix_ze_mid_val_datum_zeit" in plan
+
+
+def test_checke_ruhezeiten_nutzt_letzten_und_ersten_stempel(model, isolated_db, test_user):
+    """
+    Maßgeblich sind der letzte Stempel des Vortags und der erste des Folgetags,
+    auch wenn ein Tag mehrere Stempelpaare hat.
+    """
+    mid = test_user.mitarbeiter_id
+    heute = date.today()
+    tag1 = heute - timedelta(days=4)
+    tag2 = heute - timedelta(days=3)
+    tag3 = heute - timedelta(days=2)
+    add_stempel(isolated_db, mid, tag1, "08:00", "12:00")
+    add_stempel(isolated_db, mid, tag1, "13:00", "22:00")   # Ende 22:00
+    add_stempel(isolated_db, mid, tag2, "09:00", "21:00")   # 11h Ruhe -> ok, Ende 21:00
+    add_stempel(isolated_db, mid, tag3, "07:00", "12:00")   # 10h Ruhe -> Verstoß
+
+    model.checke_ruhezeiten()
+
+    daten = [
+        b.datum for b in isolated_db.query(modell.Benachrichtigungen).filter_by(
+            mitarbeiter_id=mid, benachrichtigungs_code=3
+        )
+    ]
+    assert daten == [tag3]
+
+
+def test_checke_ruhezeiten_18_geburtstag_im_zeitraum(model, isolated_db, test_user):
+    """
+    Wird der Nutzer im Prüfzeitraum volljährig, gilt vorher 12h und danach 11h Ruhezeit.
+    """
+    mid = test_user.mitarbeiter_id
+    heute = date.today()
+    geburtstag_18 = heute - timedelta(days=3)
+    if (geburtstag_18.month, geburtstag_18.day) == (2, 29):
+        geburtstag_18 -= timedelta(days=1)
+    test_user.geburtsdatum = geburtstag_18.replace(year=geburtstag_18.year - 18)
+    isolated_db.commit()
+
+    # Jeweils 11,5h Ruhezeit: für Minderjährige zu wenig, für Volljährige ausreichend
+    add_stempel(isolated_db, mid, heute - timedelta(days=6), "08:00", "20:00")
+    add_stempel(isolated_db, mid, heute - timedelta(days=5), "07:30", "12:00")
+    add_stempel(isolated_db, mid, heute - timedelta(days=2), "08:00", "20:00")
+    add_stempel(isolated_db, mid, heute - timedelta(days=1), "07:30", "12:00")
+
+    model.checke_ruhezeiten()
+
+    daten = [
+        b.datum for b in isolated_db.query(modell.Benachrichtigungen).filter_by(
+            mitarbeiter_id=mid, benachrichtigungs_code=3
+        )
+    ]
+    assert daten == [heute - timedelta(days=5)]
+
+
+def test_checke_max_arbeitszeit_18_geburtstag_im_zeitraum(model, isolated_db, test_user):
+    """
+    Vor dem 18. Geburtstag gilt die Grenze von 8h, ab dem Geburtstag die von 10h.
+    """
+    mid = test_user.mitarbeiter_id
+    heute = date.today()
+    geburtstag_18 = heute - timedelta(days=3)
+    if (geburtstag_18.month, geburtstag_18.day) == (2, 29):
+        geburtstag_18 -= timedelta(days=1)
+    test_user.geburtsdatum = geburtstag_18.replace(year=geburtstag_18.year - 18)
+    isolated_db.commit()
+
+    # Jeweils rund 9h netto: über der Grenze für Minderjährige, unter der für Volljährige
+    add_stempel(isolated_db, mid, heute - timedelta(days=5), "08:00", "17:45")
+    add_stempel(isolated_db, mid, heute - timedelta(days=1), "08:00", "17:45")
+
+    model.checke_max_arbeitszeit()
+
+    daten = [
+        b.datum for b in isolated_db.query(modell.Benachrichtigungen).filter_by(
+            mitarbeiter_id=mid, benachrichtigungs_code=5
+        )
+    ]
+    assert daten == [heute - timedelta(days=5)]
+
+
+def test_arbeitszeit_je_tag_aggregiert_paare_und_mehrfachstempel(model, isolated_db, test_user):
+    """
+    Tage mit zwei Stempeln kommen aus MIN/MAX, Tage mit mehr Stempeln werden paarweise
+    ausgewertet; ein überzähliger Stempel zählt nicht, ein Einzelstempel ergibt keinen Tag.
+    """
+    mid = test_user.mitarbeiter_id
+    add_stempel(isolated_db, mid, date(2024, 1, 8), "08:00", "17:00")
+    add_stempel(isolated_db, mid, date(2024, 1, 9), "08:00", "12:00")
+    add_stempel(isolated_db, mid, date(2024, 1, 9), "13:00", "17:00")
+    add_stempel(isolated_db, mid, date(2024, 1, 10), "08:00", "12:00")
+    for tag, uhrzeit in ((date(2024, 1, 10), time(13, 0)), (date(2024, 1, 11), time(9, 0))):
+        isolated_db.add(modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=uhrzeit))
+    isolated_db.commit()
+
+    arbeitstage = model._arbeitszeit_je_tag(test_user, date(2024, 1, 1), date(2024, 1, 31))
+
+    assert arbeitstage == {
+        date(2024, 1, 8): timedelta(hours=8, minutes=15),
+        date(2024, 1, 9): timedelta(hours=8),
+        date(2024, 1, 10): timedelta(hours=4),
+    }
+
+
+def test_pruefe_sonn_feiertag_korrigiert_mit_mehreren_stempeln(model, isolated_db, test_user):
+    """
+    Ein Sonntag mit vollständigem Stempelpaar gilt erst nach dem Löschen aller Stempel als korrigiert.
+    """
+    sonntag = date(2024, 1, 7)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, sonntag, "08:00", "12:00")
+
+    assert model._pruefe_sonn_feiertag_korrigiert(test_user, sonntag) is False
+
+    isolated_db.query(modell.Zeiteintrag).delete()
+    isolated_db.commit()
+    assert model._pruefe_sonn_feiertag_korrigiert(test_user, sonntag) is True
+
+
+def test_feedback_stempel_wird_erst_beim_lesen_erzeugt(model, isolated_db, test_user):
+    """
+    checke_stempel merkt sich die Tage mit ungerader Stempelanzahl; der Feedback-Text
+    nennt sie im deutschen Format und wird durch Zurücksetzen geleert.
+    """
+    tag = date.today() - timedelta(days=2)
+    isolated_db.add(modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(8, 0)))
+    isolated_db.commit()
+
+    assert model.checke_stempel() == [tag]
+    assert model.feedback_stempel == (
+        f"An den Tagen {tag.strftime('%d.%m.%Y')} fehlt ein Stempel, bitte tragen sie diesen nach"
+    )
+
+    model.feedback_stempel = ""
+    assert model.feedback_stempel == ""
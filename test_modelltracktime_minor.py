@@ -17,36 +17,77 @@ Haupttest-Bereiche:
 - Urlaubs- und Feiertagshandling
 
 Test-Infrastruktur:
-- Isolierte In-Memory-Datenbank pro Test
+- Eine In-Memory-Datenbank pro Testmodul, jeder Test in eigener Transaktion (Rollback)
 - Fixtures für minderjährigen Testbenutzer (17 Jahre)
-- Modul-Reload für saubere SQLAlchemy-Mapper
 
 Autor: Velqor
 Version: 2.0
 """
 
 import pytest
-import importlib
 from datetime import datetime, date, timedelta, time
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import bindparam, create_engine, event, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
-import modell  # wichtig: Basisimport für reload
+import modell
 
 
 # ============================================================
 #  FIXTURE: ISOLIERTE TESTDATENBANK
 # ============================================================
 
+@pytest.fixture(scope="module")
+def db_engine():
+    """
+    Legt die In-Memory-Datenbank einmal pro Testmodul an.
+    
+    Mapper und Tabellen werden nur einmal aufgebaut; die Isolation der
+    einzelnen Tests übernimmt isolated_db per Transaktions-Rollback.
+    
+    Yields:
+        Engine: SQLAlchemy-Engine auf eine gemeinsame In-Memory-Datenbank
+        
+    Note:
+        pysqlite beginnt Transaktionen sonst selbst und bricht SAVEPOINTs;
+        die beiden Event-Hooks überlassen das BEGIN SQLAlchemy.
+    """
+    engine = create_engine("sqlite:///:memory:", echo=False, poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _kein_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    modell.Base.metadata.create_all(engine)
+
+    # Die filter_by(mitarbeiter_id, benachrichtigungs_code, datum)-Prüfungen (in den Tests wie in
+    # modell.py) müssen per Index gesucht werden; fehlt er im Modell, bricht das Modul hier ab
+    with engine.connect() as conn:
+        plan = " ".join(row[3] for row in conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM benachrichtigungen "
+            "WHERE mitarbeiter_id = 1 AND benachrichtigungs_code = 1 AND datum = '2024-01-01'"
+        ))
+    assert "USING INDEX" in plan and "SCAN" not in plan, plan
+
+    yield engine
+    engine.dispose()
+
+
 @pytest.fixture(scope="function", autouse=True)
-def isolated_db(monkeypatch):
+def isolated_db(db_engine, monkeypatch):
     """
-    Erstellt für jeden Test eine isolierte In-Memory-Datenbank.
+    Stellt jedem Test eine Session in einer eigenen, äußeren Transaktion bereit.
     
-    Lädt modell.py neu, um saubere SQLAlchemy-Mapper zu erzwingen
-    und Cross-Test-Kontamination zu verhindern.
+    Commits des Tests (auch aus modell.py heraus) landen nur in SAVEPOINTs;
+    nach dem Test wird die äußere Transaktion verworfen, sodass kein Test
+    Daten eines anderen sieht.
     
     Args:
+        db_engine: Modulweite Test-Engine
         monkeypatch: Pytest fixture für Monkey-Patching
         
     Yields:
@@ -56,20 +97,18 @@ def isolated_db(monkeypatch):
         Wird automatisch vor jedem Test ausgeführt (autouse=True).
         Führt Rollback und Close nach jedem Test aus.
     """
-    importlib.reload(modell)
-
-    engine = create_engine("sqlite:///:memory:", echo=False)
-    modell.Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    test_session = Session()
+    connection = db_engine.connect()
+    transaktion = connection.begin()
+    test_session = Session(bind=connection, join_transaction_mode="create_savepoint")
 
     # Globale Session in modell patchen
     monkeypatch.setattr(modell, "session", test_session)
 
     yield test_session
 
-    test_session.rollback()
     test_session.close()
+    transaktion.rollback()
+    connection.close()
 
 @pytest.fixture
 def test_user(isolated_db):
@@ -150,12 +189,64 @@ def add_stempel(session, mid, tag, start="08:00", ende="16:00"):
     Note:
         Committet die Stempel automatisch in die Datenbank.
     """
-    s1 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=datetime.strptime(start, "%H:%M").time())
-    s2 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=datetime.strptime(ende, "%H:%M").time())
+    s1 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=time.fromisoformat(start))
+    s2 = modell.Zeiteintrag(mitarbeiter_id=mid, datum=tag, zeit=time.fromisoformat(ende))
     session.add_all([s1, s2])
     session.commit()
 
 
+def werktage_zwischen(start, ende):
+    """
+    Liefert alle Werktage (Mo–Fr) von start bis ende (inklusive).
+    
+    Bewusst unabhängig von modell._werktage_im_zeitraum erzeugt, damit ein
+    Fehler im Helfer nicht auch die Testdaten verändert.
+    
+    Args:
+        start (date): Erster Tag
+        ende (date): Letzter Tag
+        
+    Returns:
+        list[date]: Werktage in aufsteigender Reihenfolge
+    """
+    return [
+        date.fromordinal(o) for o in range(start.toordinal(), ende.toordinal() + 1)
+        if date.fromordinal(o).weekday() < 5
+    ]
+
+
+# Vorbereitete Abfragen wie die _STMT_*-Abfragen in modell.py: einmal aufgebaut, danach
+# ändern sich nur die Bind-Parameter und SQLAlchemy nutzt den kompilierten SQL-Cache
+_STMT_BENACHRICHTIGUNG = (
+    select(modell.Benachrichtigungen)
+    .where(
+        (modell.Benachrichtigungen.mitarbeiter_id == bindparam("mitarbeiter_id")) &
+        (modell.Benachrichtigungen.benachrichtigungs_code == bindparam("code"))
+    )
+)
+_STMT_BENACHRICHTIGUNG_AM_TAG = _STMT_BENACHRICHTIGUNG.where(modell.Benachrichtigungen.datum == bindparam("datum"))
+
+
+def hole_benachrichtigung(session, mid, code, datum=None):
+    """
+    Liefert eine Benachrichtigung eines Mitarbeiters mit dem angegebenen Code.
+    
+    Args:
+        session: SQLAlchemy-Session
+        mid (int): Mitarbeiter-ID
+        code (int): Benachrichtigungs-Code
+        datum (date): Optional, nur Benachrichtigungen dieses Tages
+        
+    Returns:
+        Benachrichtigungen: Erster Treffer oder None
+    """
+    if datum is None:
+        return session.scalars(_STMT_BENACHRICHTIGUNG, {"mitarbeiter_id": mid, "code": code}).first()
+    return session.scalars(
+        _STMT_BENACHRICHTIGUNG_AM_TAG, {"mitarbeiter_id": mid, "code": code, "datum": datum}
+    ).first()
+
+
 # ============================================================
 #  TESTS: STANDARDFUNKTIONEN
 # ============================================================
@@ -177,43 +268,38 @@ def test_urlaub_verhindert_gleitzeitabzug_minor(model, isolated_db, test_user):
     gestern = date.today() - timedelta(days=1)
 
     # Erstelle für jeden Tag im Zeitraum (Mo–Fr relevant) einen genehmigten Urlaubseintrag
-    tag = letzter_login
-    inserted = []
-    while tag <= gestern:
-        if tag.weekday() < 5:  # nur Mo–Fr (Arbeitstage)
-            abw = modell.Abwesenheit(
-                mitarbeiter_id=test_user.mitarbeiter_id,
-                datum=tag,
-                typ="Urlaub",
-                genehmigt=True
-            )
-            isolated_db.add(abw)
-            inserted.append(tag)
-        tag += timedelta(days=1)
+    # Ein INSERT mit allen Zeilen statt eines ORM-Objekts pro Tag
+    inserted = werktage_zwischen(letzter_login, gestern)  # nur Mo–Fr (Arbeitstage)
+    isolated_db.execute(insert(modell.Abwesenheit), [
+        {"mitarbeiter_id": test_user.mitarbeiter_id, "datum": tag, "typ": "Urlaub", "genehmigt": True}
+        for tag in inserted
+    ])
     isolated_db.commit()
 
     alt_gleitzeit = test_user.gleitzeit
     model.checke_arbeitstage()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     # Gleitzeit darf unverändert bleiben
     assert test_user.gleitzeit == alt_gleitzeit, f"Gleitzeit wurde geändert (vorher={alt_gleitzeit}, jetzt={test_user.gleitzeit})"
 
     # Für alle eingefügten Tage darf es keine Code-1-Benachrichtigung geben
-    for t in inserted:
-        ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-            mitarbeiter_id=test_user.mitarbeiter_id,
-            benachrichtigungs_code=1,
-            datum=t
-        ).first()
-        assert ben is None, f"Für {t} sollte keine Code-1-Benachrichtigung existieren"
+    # (eine Abfrage über alle Tage, nur die Datumsspalte)
+    treffer = isolated_db.scalars(
+        select(modell.Benachrichtigungen.datum).where(
+            (modell.Benachrichtigungen.mitarbeiter_id == test_user.mitarbeiter_id) &
+            (modell.Benachrichtigungen.benachrichtigungs_code == 1) &
+            (modell.Benachrichtigungen.datum.in_(inserted))
+        )
+    ).all()
+    assert not treffer, f"Für {treffer} sollte keine Code-1-Benachrichtigung existieren"
 
 
 def test_benachrichtigung_bei_fehlendem_stempel_minor(model, isolated_db, test_user):
     """Fehlende Arbeitstage sollen Benachrichtigungen (Code 1) erzeugen."""
     start_gz = test_user.gleitzeit
     model.checke_arbeitstage()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
         mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=1
@@ -240,9 +326,7 @@ def test_benachrichtigung_fehlt_stempel_minor(model, isolated_db, test_user):
     fehlende = model.checke_stempel()
     assert tag in fehlende
 
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=2
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 2)
     assert ben is not None
 
 
@@ -260,7 +344,7 @@ def test_nachtraeglicher_stempel_an_gestempelten_tag_minor(model, isolated_db, t
 
     # Erster Gleitzeitlauf (verarbeitet existierende Stempel)
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
     gleitzeit_nach_erster_berechnung = test_user.gleitzeit
 
     # Stempel werden nachgetragen
@@ -271,7 +355,7 @@ def test_nachtraeglicher_stempel_an_gestempelten_tag_minor(model, isolated_db, t
 
     # Zweiter Gleitzeitlauf — sollte Gleitzeit korrekt erhöhen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     assert test_user.gleitzeit > gleitzeit_nach_erster_berechnung, (
         f"Gleitzeit sollte nach dem Nachtragen steigen: "
@@ -293,7 +377,7 @@ def test_gleitzeit_an_urlaubstag_bleibt_gleich(model, isolated_db, test_user):
 
     vor = test_user.gleitzeit
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     assert test_user.gleitzeit == vor
 '''
@@ -308,36 +392,32 @@ def test_gleitzeit_an_urlaubstag_bleibt_gleich(model, isolated_db, test_user):
 def test_checke_durchschnittliche_arbeitszeit_zu_lang_minor(model, isolated_db, test_user):
     """Durchschnittliche Arbeitszeit > 8h → Benachrichtigung Code 4."""
     start = date.today() - timedelta(days=10)
-    for i in range(5):
-        tag = start + timedelta(days=i)
-        if tag.weekday() < 5:
-            s1 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(8, 0))
-            s2 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(17, 30))
-            isolated_db.add_all([s1, s2])
+    werktage = werktage_zwischen(start, start + timedelta(days=4))
+    isolated_db.execute(insert(modell.Zeiteintrag), [
+        {"mitarbeiter_id": test_user.mitarbeiter_id, "datum": tag, "zeit": zeit}
+        for tag in werktage
+        for zeit in (time(8, 0), time(17, 30))
+    ])
     isolated_db.commit()
 
     model.checke_durchschnittliche_arbeitszeit()
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=4
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 4)
     assert ben is not None
 
 
 def test_checke_durchschnittliche_arbeitszeit_ok_minor(model, isolated_db, test_user):
     """Durchschnitt ≤ 8h → keine Benachrichtigung."""
     start = date.today() - timedelta(days=10)
-    for i in range(5):
-        tag = start + timedelta(days=i)
-        if tag.weekday() < 5:
-            s1 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(8, 0))
-            s2 = modell.Zeiteintrag(mitarbeiter_id=test_user.mitarbeiter_id, datum=tag, zeit=time(15, 30))
-            isolated_db.add_all([s1, s2])
+    werktage = werktage_zwischen(start, start + timedelta(days=4))
+    isolated_db.execute(insert(modell.Zeiteintrag), [
+        {"mitarbeiter_id": test_user.mitarbeiter_id, "datum": tag, "zeit": zeit}
+        for tag in werktage
+        for zeit in (time(8, 0), time(15, 30))
+    ])
     isolated_db.commit()
 
     model.checke_durchschnittliche_arbeitszeit()
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=4
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 4)
     assert ben is None
 
 
@@ -358,36 +438,41 @@ def test_arbeit_an_sonntag_erzeugt_benachrichtigung_minor(model, isolated_db, te
     model.checke_sonn_feiertage()
 
     # Prüfen, ob die Benachrichtigung erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=6,
-        datum=letzter_sonntag
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 6, letzter_sonntag)
 
     assert ben is not None, "Für Arbeit an einem Sonntag wurde keine Benachrichtigung erstellt."
 
 
 def test_arbeit_an_feiertag_erzeugt_benachrichtigung_minor(model, isolated_db, test_user):
     """Prüft, ob Arbeit an einem Feiertag eine Benachrichtigung (Code 6) erzeugt."""
-    # Fester Feiertag (Tag der Deutschen Einheit) im letzten Jahr, um sicher im Zeitraum zu sein
-    feiertag = date(date.today().year - 1, 10, 3)
+    # Feiertag aus der (gemerkten) Feiertagsmenge des Vorjahres wählen, um sicher im Zeitraum zu sein:
+    # den letzten Di–Fr-Feiertag nach einem normalen Werktag, damit nur der Feiertag die Meldung auslöst
+    feiertage = modell._feiertags_ordinale(date.today().year - 1)
+    feiertag = max(
+        tag for tag in map(date.fromordinal, feiertage)
+        if 0 < tag.weekday() < 5 and (tag - timedelta(days=1)).toordinal() not in feiertage
+    )
+    werktag = feiertag - timedelta(days=1)
     test_user.letzter_login = feiertag - timedelta(days=5)
     isolated_db.commit()
 
-    # Stempel am Feiertag hinzufügen
+    # Stempel am Feiertag und am Werktag davor hinzufügen
     add_stempel(isolated_db, test_user.mitarbeiter_id, feiertag)
+    add_stempel(isolated_db, test_user.mitarbeiter_id, werktag)
 
     # Funktion ausführen
     model.checke_sonn_feiertage()
 
-    # Prüfen, ob die Benachrichtigung erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=6,
-        datum=feiertag
-    ).first()
+    # Nur der Feiertag erhält eine Benachrichtigung, der Werktag davor nicht
+    code6_tage = set(isolated_db.scalars(
+        select(modell.Benachrichtigungen.datum).where(
+            (modell.Benachrichtigungen.mitarbeiter_id == test_user.mitarbeiter_id) &
+            (modell.Benachrichtigungen.benachrichtigungs_code == 6)
+        )
+    ))
 
-    assert ben is not None, "Für Arbeit an einem Feiertag wurde keine Benachrichtigung erstellt."
+    assert code6_tage == {feiertag}, \
+        f"Code 6 genau für den Feiertag {feiertag} erwartet, erhalten für: {sorted(code6_tage)}"
 
 
 def test_arbeit_an_werktag_erzeugt_keine_sonntags_benachrichtigung_minor(model, isolated_db, test_user):
@@ -403,10 +488,7 @@ def test_arbeit_an_werktag_erzeugt_keine_sonntags_benachrichtigung_minor(model,
     model.checke_sonn_feiertage()
 
     # Prüfen, dass KEINE Benachrichtigung erstellt wurde
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id,
-        benachrichtigungs_code=6
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 6)
 
     assert ben is None, "Für Arbeit an einem normalen Werktag wurde fälschlicherweise eine Benachrichtigung erstellt."
 
@@ -443,7 +525,7 @@ def test_arbeitsfenster_edge_case(model, isolated_db, test_user):
     
     # Funktion ausführen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
  
     # Erwartung berechnen:
     # Tag 1: 0h Arbeit (statt 2h) - 8h Soll = -8h
@@ -471,7 +553,7 @@ def test_arbeitsfenster_edge_case(model, isolated_db, test_user):
     
     # Funktion ausführen
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
  
     # Erwartung berechnen:
     # Tag 1: 0h Arbeit (statt 1,5h) - 8h Soll = -8h
@@ -496,7 +578,7 @@ def test_minderjaehriger_pausen(model, isolated_db, test_user):
     add_stempel(isolated_db, test_user.mitarbeiter_id, tag, start="08:00", ende="13:00") # 5h Arbeit
     
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
     
     # Erwartung: 5h Arbeit - 0.5h Pause - 8h Soll = -3.5h
     assert test_user.gleitzeit == pytest.approx(-3.5), "Falsche Pausenzeit bei >4.5h Arbeit für Minderjährige."
@@ -510,7 +592,7 @@ def test_minderjaehriger_pausen(model, isolated_db, test_user):
     add_stempel(isolated_db, test_user.mitarbeiter_id, tag, start="08:00", ende="15:00") # 7h Arbeit
     
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     # Erwartung: 7h Arbeit - 1h Pause - 8h Soll = -2h
     assert test_user.gleitzeit == pytest.approx(-2.0), "Falsche Pausenzeit bei >6h Arbeit für Minderjährige."
@@ -525,7 +607,7 @@ def test_minderjaehriger_arbeitsfenster(model, isolated_db, test_user):
     add_stempel(isolated_db, test_user.mitarbeiter_id, tag, start="19:00", ende="21:00")
     
     model.berechne_gleitzeit()
-    isolated_db.refresh(test_user)
+    isolated_db.refresh(test_user, ["gleitzeit"])
 
     # Erwartung: 1h Arbeit - 8h Soll = -7h
     assert test_user.gleitzeit == pytest.approx(-7.0), "Arbeitszeit außerhalb des 20:00-Fensters wurde für Minderjährige gezählt."
@@ -543,9 +625,7 @@ def test_minderjaehriger_ruhezeit(model, isolated_db, test_user):
 
     model.checke_ruhezeiten()
     
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=3
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 3)
     assert ben is not None, "Ruhezeitverstoß von <12h für Minderjährige wurde nicht erkannt."
 
 
@@ -561,9 +641,7 @@ def test_minderjaehriger_max_wochenstunden(model, isolated_db, test_user):
 
     model.checke_wochenstunden_minderjaehrige()
 
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=7
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 7)
     assert ben is not None, "Verstoß gegen 40h-Woche für Minderjährige wurde nicht erkannt."
 
 
@@ -579,7 +657,108 @@ def test_minderjaehriger_max_arbeitstage(model, isolated_db, test_user):
 
     model.checke_arbeitstage_pro_woche_minderjaehrige()
 
-    ben = isolated_db.query(modell.Benachrichtigungen).filter_by(
-        mitarbeiter_id=test_user.mitarbeiter_id, benachrichtigungs_code=8
-    ).first()
+    ben = hole_benachrichtigung(isolated_db, test_user.mitarbeiter_id, 8)
     assert ben is not None, "Verstoß gegen 5-Tage-Woche für Minderjährige wurde nicht erkannt."
+
+
+def test_is_minor_on_date_geburtstagsgrenze():
+    """
+    Prüft die Altersgrenze am 18. Geburtstag und die Aktualisierung
+    des Geburtsdatum-Caches bei geänderten Werten.
+    """
+    m = modell.mitarbeiter(name="Grenzfall", geburtsdatum=date(2008, 3, 1))
+    assert m.is_minor_on_date(date(2026, 2, 28)) is True
+    assert m.is_minor_on_date(date(2026, 3, 1)) is False
+
+    m.geburtsdatum = date(2008, 12, 31)
+    assert m.is_minor_on_date(date(2026, 3, 1)) is True
+
+    # Geburtstag am 29.02.: volljährig ab 01.03. im Nicht-Schaltjahr
+    m.geburtsdatum = date(2008, 2, 29)
+    assert m.volljaehrig_ab == date(2026, 3, 1)
+    assert m.is_minor_on_date(date(2026, 2, 28)) is True
+    assert m.is_minor_on_date(datetime(2026, 3, 1, 8, 0)) is False
+
+
+def test_hat_bereits_5_tage_gearbeitet_in_woche(model, isolated_db, test_user):
+    """
+    Zählt unterschiedliche Stempeltage der Woche (mehrere Paare am selben Tag zählen einfach).
+    """
+    montag = date(2024, 3, 4)
+    for offset in range(4):
+        add_stempel(isolated_db, test_user.mitarbeiter_id, montag + timedelta(days=offset), "08:00", "10:00")
+    add_stempel(isolated_db, test_user.mitarbeiter_id, montag, "11:00", "12:00")
+    assert model.hat_bereits_5_tage_gearbeitet_in_woche(montag) is False
+
+    add_stempel(isolated_db, test_user.mitarbeiter_id, montag + timedelta(days=4), "08:00", "10:00")
+    assert model.hat_bereits_5_tage_gearbeitet_in_woche(montag + timedelta(days=6)) is True
+
+
+def test_minderjaehriger_wochenpruefungen_ueber_mehrere_wochen(model, isolated_db, test_user):
+    """
+    Wochenprüfungen (Code 7/8) gruppieren alle Stempel des Zeitraums nach Woche:
+    nur vollständige Wochen mit Verstoß werden gemeldet, die laufende Woche nicht.
+    """
+    mid = test_user.mitarbeiter_id
+    heute = date.today()
+    montag_aktuell = heute - timedelta(days=heute.weekday())
+    woche_verstoss = montag_aktuell - timedelta(weeks=2)
+    woche_ok = montag_aktuell - timedelta(weeks=1)
+
+    for i in range(6):
+        add_stempel(isolated_db, mid, woche_verstoss + timedelta(days=i), start="07:00", ende="15:00")
+    for i in range(3):
+        add_stempel(isolated_db, mid, woche_ok + timedelta(days=i), start="08:00", ende="12:00")
+    for i in range(heute.weekday()):
+        add_stempel(isolated_db, mid, montag_aktuell + timedelta(days=i), start="07:00", ende="20:00")
+
+    model.checke_wochenstunden_minderjaehrige()
+    model.checke_arbeitstage_pro_woche_minderjaehrige()
+
+    for code in (7, 8):
+        daten = [
+            b.datum for b in isolated_db.query(modell.Benachrichtigungen).filter_by(
+                mitarbeiter_id=mid, benachrichtigungs_code=code
+            )
+        ]
+        assert daten == [woche_verstoss]
+
+
+def test_minderjaehriger_arbeitszeitfenster(model, isolated_db, test_user):
+    """
+    Stempel außerhalb 6:00-20:00 erzeugen eine Benachrichtigung (Code 9) je Tag,
+    auch bei mehreren Verstößen am selben Tag.
+    """
+    mid = test_user.mitarbeiter_id
+    tag = date.today() - timedelta(days=3)
+    add_stempel(isolated_db, mid, tag, start="05:30", ende="21:00")
+    add_stempel(isolated_db, mid, tag - timedelta(days=1), start="08:00", ende="16:00")
+
+    model.checke_arbeitszeitfenster_minderjaehrige()
+
+    daten = [
+        b.datum for b in isolated_db.query(modell.Benachrichtigungen).filter_by(
+            mitarbeiter_id=mid, benachrichtigungs_code=9
+        )
+    ]
+    assert daten == [tag]
+
+
+def test_minderjaehriger_wochenstunden_mit_offenem_stempel(model, isolated_db, test_user):
+    """
+    Ein einzelner offener Stempel an einem Tag verschiebt die Paarbildung der
+    folgenden Tage nicht; die Woche wird weiterhin als >40h erkannt.
+    """
+    mid = test_user.mitarbeiter_id
+    start_woche = date.today() - timedelta(days=10)
+    start_woche -= timedelta(days=start_woche.weekday())
+
+    for i in range(5):
+        add_stempel(isolated_db, mid, start_woche + timedelta(days=i), start="07:00", ende="16:30")
+    isolated_db.add(modell.Zeiteintrag(mitarbeiter_id=mid, datum=start_woche, zeit=time(17, 0)))
+    isolated_db.commit()
+
+    model.checke_wochenstunden_minderjaehrige()
+
+    ben = hole_benachrichtigung(isolated_db, mid, 7)
+    assert ben is not None and ben.datum == start_woche
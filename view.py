@@ -18,6 +18,7 @@ import time
 import holidays
 import sys
 import os
+from functools import lru_cache
 
 from datetime import datetime as dt, time as dt_time
 from kivy.uix.screenmanager import Screen
@@ -74,6 +75,23 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+@lru_cache(maxsize=8)
+def feiertage_im_jahr(jahr):
+    """
+    Liefert die deutschen Feiertage eines Jahres als frozenset von Datumswerten.
+    
+    Der Kalender prüft jede Zelle einzeln; durch den Cache wird die
+    Feiertagstabelle pro Jahr nur einmal von der holidays-Bibliothek erzeugt.
+    
+    Args:
+        jahr (int): Kalenderjahr
+        
+    Returns:
+        frozenset[datetime.date]: Alle bundesweiten Feiertage des Jahres
+    """
+    return frozenset(holidays.Germany(years=jahr))
+
+
 class LoginView(Screen):
     """
     Anmelde-Screen der Anwendung.
@@ -1862,8 +1880,7 @@ class MonthCalendar(BoxLayout):
             Berücksichtigt bundesweite deutsche Feiertage.
         """
 
-        de_holidays = holidays.Germany(years=[date.year])
-        return date in de_holidays
+        return date in feiertage_im_jahr(date.year)
 
 
 class LinedGridLayout(GridLayout):